@@ -1,8 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
+import bisect
+import gzip
+import hashlib
 import json
+import logging
 import os
-from datetime import datetime
+import time
+from collections.abc import AsyncIterator, Iterable, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
@@ -10,27 +21,63 @@ from uuid import uuid4
 from zoneinfo import ZoneInfo
 
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+from backend.sqlite_repository import SqliteRepository
+from backend.supabase_repository import SupabaseRepository, build_supabase_client
+from empetur_core.armazenamento import BaseRowStore
+from empetur_core.busca import SEARCH_MIN_SIMILARITY, AtrativoSearchIndex
+from empetur_core.cache_consolidacao import build_cache_key
 from empetur_core.consolidacao import (
     BASE_FIELDNAMES,
     FILE_PREFIX,
+    SchemaPlan,
+    base_row_key,
     build_dashboard_payload,
-    consolidate_csv_content,
+    hash_csv_bytes,
+    iter_consolidated_csv_content,
     normalize_questionario_name,
     write_csv,
-    write_json,
 )
+from empetur_core.datas import parse_iso_timestamp
+from empetur_core.duplicados import DuplicateReport, add_deduplicated_totals, detect_duplicates
+from empetur_core.historico import BaseRowsHistory, RowKey
+from empetur_core.indices import INDEX_FIELDS, BaseRowIndex, parse_filter_datetime
+from empetur_core.reconciliacao import build_collected_blocks, reconcile_previstos
+from empetur_core.resumos import ResumoState
+from empetur_core.serializacao import dumps_json, write_bytes_atomic
 
 
+LOGGER = logging.getLogger("empetur.backend")
 BASE_DIR = Path(__file__).resolve().parent.parent
 APP_TIMEZONE = ZoneInfo("America/Sao_Paulo")
 DEFAULT_PAYLOAD_PATH = BASE_DIR / "data" / "consolidado" / "dashboard_payload.json"
 DEFAULT_BASE_CSV_PATH = BASE_DIR / "data" / "consolidado" / "empetur_tabela_base.csv"
 DEFAULT_MUNICIPIOS_STATUS_PATH = BASE_DIR / "data" / "operacional" / "municipios_status.json"
 DEFAULT_PREVISTOS_PATH = BASE_DIR / "data" / "operacional" / "previstos_atrativos.json"
+DEFAULT_SYNC_STATE_PATH = BASE_DIR / "data" / "operacional" / "sync_estado.json"
+DEFAULT_SQLITE_PATH = BASE_DIR / "data" / "operacional" / "empetur.sqlite3"
+BASE_ROWS_PAGE_SIZE = 1000
+BASE_ROWS_MAX_PAGE_SIZE = 5000
+QUERY_FILTER_FIELDS = {
+    "regiao": "regiao",
+    "municipio": "municipio",
+    "categoria": "categoria",
+    "questionario": "questionario_preenchido",
+    "pesquisador": "pesquisador",
+}
+PAYLOAD_GZIP_LEVEL = 6
+PAYLOAD_BROTLI_QUALITY = 5
 DEFAULT_DISABLED_FORMS = {
     normalize_questionario_name("Sistema Marítimo e Fluvial"),
     normalize_questionario_name("Sistema Aéreo"),
@@ -85,6 +132,8 @@ def get_settings() -> dict[str, object]:
             os.getenv("EMPETUR_MUNICIPIOS_STATUS_FILE", str(DEFAULT_MUNICIPIOS_STATUS_PATH))
         ),
         "previstos_path": Path(os.getenv("EMPETUR_PREVISTOS_FILE", str(DEFAULT_PREVISTOS_PATH))),
+        "sync_state_path": Path(os.getenv("EMPETUR_SYNC_STATE_FILE", str(DEFAULT_SYNC_STATE_PATH))),
+        "sqlite_path": Path(os.getenv("EMPETUR_SQLITE_FILE", str(DEFAULT_SQLITE_PATH))),
         "supabase_url": normalize_supabase_url(os.getenv("SUPABASE_URL")),
         "supabase_service_role_key": os.getenv("SUPABASE_SERVICE_ROLE_KEY", "").strip(),
         "supabase_schema": os.getenv("SUPABASE_SCHEMA", "public").strip() or "public",
@@ -94,21 +143,101 @@ def get_settings() -> dict[str, object]:
         or "empetur_tabela_base",
         "supabase_table_previstos": os.getenv("SUPABASE_TABLE_PREVISTOS", "empetur_previstos_atrativos").strip()
         or "empetur_previstos_atrativos",
+        "supabase_table_sync_state": os.getenv("SUPABASE_TABLE_SYNC_ESTADO", "empetur_sync_estado").strip()
+        or "empetur_sync_estado",
+        "supabase_http2": os.getenv("SUPABASE_HTTP2", "").strip().lower() in {"1", "true", "yes"},
+        "supabase_max_connections": max(int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20")), 1),
+        "supabase_page_size": max(int(os.getenv("SUPABASE_PAGE_SIZE", "1000")), 1),
+        "supabase_max_concurrency": max(int(os.getenv("SUPABASE_MAX_CONCURRENCY", "4")), 1),
+        "supabase_base_persist_mode": os.getenv("SUPABASE_BASE_PERSIST_MODE", "diff").strip().lower() or "diff",
+        "supabase_upsert_batch_size": max(int(os.getenv("SUPABASE_UPSERT_BATCH_SIZE", "500")), 1),
         "cors_origins": parse_cors_origins(os.getenv("EMPETUR_CORS_ORIGINS")),
         "ipesquisa_base_url": os.getenv("IPESQUISA_BASE_URL", "https://sistema.ipesquisa.net").rstrip("/"),
         "ipesquisa_api_path": os.getenv("IPESQUISA_API_PATH", "/api/v1/pesquisa/{id}/get-csv-cases").strip(),
         "ipesquisa_client_id": os.getenv("IPESQUISA_CLIENT_ID", "").strip(),
         "ipesquisa_client_secret": os.getenv("IPESQUISA_CLIENT_SECRET", "").strip(),
         "ipesquisa_timeout_seconds": int(os.getenv("IPESQUISA_TIMEOUT_SECONDS", "60")),
+        "ipesquisa_max_concurrency": max(int(os.getenv("IPESQUISA_MAX_CONCURRENCY", "4")), 1),
+        "ipesquisa_datetime_format": os.getenv("IPESQUISA_DATETIME_FORMAT", "%Y-%m-%d %H:%M:%S"),
+        "ipesquisa_sync_overlap_minutes": max(int(os.getenv("IPESQUISA_SYNC_OVERLAP_MINUTES", "60")), 0),
+        "ipesquisa_full_refresh_hours": max(int(os.getenv("IPESQUISA_FULL_REFRESH_HOURS", "24")), 0),
         "ipesquisa_form_map": form_map,
         "ipesquisa_disabled_forms": parse_disabled_forms(os.getenv("IPESQUISA_DISABLED_FORMS")),
     }
 
 
+APP_RESOURCES: dict[str, Any] = {}
+
+
+def build_supabase_repository() -> SupabaseRepository:
+    settings = get_settings()
+    return SupabaseRepository(
+        build_supabase_client(
+            http2=bool(settings["supabase_http2"]),
+            max_connections=int(settings["supabase_max_connections"]),
+        ),
+        base_url=str(settings["supabase_url"]),
+        service_role_key=str(settings["supabase_service_role_key"]),
+        schema=str(settings["supabase_schema"]),
+        table_status=str(settings["supabase_table_status"]),
+        table_base=str(settings["supabase_table_base"]),
+        table_previstos=str(settings["supabase_table_previstos"]),
+        table_sync_state=str(settings["supabase_table_sync_state"]),
+        page_size=int(settings["supabase_page_size"]),
+        max_concurrency=int(settings["supabase_max_concurrency"]),
+        persist_mode=str(settings["supabase_base_persist_mode"]),
+        upsert_batch_size=int(settings["supabase_upsert_batch_size"]),
+    )
+
+
+def get_supabase_repository() -> SupabaseRepository:
+    repository = APP_RESOURCES.get("supabase")
+    if repository is None:
+        repository = build_supabase_repository()
+        APP_RESOURCES["supabase"] = repository
+    return repository
+
+
+def build_sqlite_repository() -> SqliteRepository:
+    settings = get_settings()
+    return SqliteRepository(
+        settings["sqlite_path"],
+        page_size=int(settings["supabase_page_size"]),
+        status_json_path=settings["municipios_status_path"],
+        previstos_json_path=settings["previstos_path"],
+        sync_state_json_path=settings["sync_state_path"],
+        base_csv_path=settings["base_csv_path"],
+        form_map=settings["ipesquisa_form_map"],
+    )
+
+
+def get_repository() -> SupabaseRepository | SqliteRepository:
+    if has_supabase_status_backend():
+        return get_supabase_repository()
+    repository = APP_RESOURCES.get("sqlite")
+    if repository is None:
+        repository = build_sqlite_repository()
+        APP_RESOURCES["sqlite"] = repository
+    return repository
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    get_repository()
+    try:
+        yield
+    finally:
+        APP_RESOURCES.pop("sqlite", None)
+        repository = APP_RESOURCES.pop("supabase", None)
+        if repository is not None:
+            await repository.client.aclose()
+
+
 app = FastAPI(
     title="EMPETUR Dashboard API",
     version="0.2.0",
     description="API do dashboard EMPETUR com sincronizacao manual a partir do iPesquisa.",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -131,6 +260,7 @@ class SyncRequest(BaseModel):
     forms: list[SyncForm] = Field(default_factory=list)
     dt_gravacao_inicio: str | None = None
     dt_gravacao_fim: str | None = None
+    full_refresh: bool = False
     persist_local: bool = True
 
 
@@ -150,15 +280,162 @@ class PrevistoReplaceRequest(BaseModel):
     rows: list[PrevistoRow] = Field(default_factory=list)
 
 
-def parse_generated_timestamp(value: str | None) -> datetime | None:
-    if not value:
+@dataclass(frozen=True)
+class SerializedPayload:
+    etag: str
+    body: bytes
+    gzip_body: bytes
+    brotli_body: bytes | None
+
+
+def current_local_datetime() -> datetime:
+    return datetime.now(APP_TIMEZONE).replace(tzinfo=None, microsecond=0)
+
+
+def cache_base_state(state: ResumoState, history: BaseRowsHistory) -> None:
+    SYNC_CACHE["resumo_state"] = state
+    SYNC_CACHE["history"] = history
+    SYNC_CACHE["base_generation"] = SYNC_CACHE.get("base_generation", 0) + 1
+    SYNC_CACHE.pop("base_index", None)
+
+
+async def read_base_state_from_repository() -> ResumoState:
+    stores: dict[str, BaseRowStore] = {}
+    async for page in get_repository().iter_base_row_pages():
+        for row in page:
+            codigo_pesquisa = row["codigo_pesquisa"]
+            store = stores.get(codigo_pesquisa)
+            if store is None:
+                store = stores[codigo_pesquisa] = BaseRowStore()
+            store.append(row)
+    state = ResumoState()
+    for codigo_pesquisa, store in stores.items():
+        state.replace_form(codigo_pesquisa, store)
+    return state
+
+
+async def load_base_state_from_repository() -> tuple[ResumoState, BaseRowsHistory, dict[str, Any]] | None:
+    state = await read_base_state_from_repository()
+    if not len(state):
         return None
-    for fmt in ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
-        try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
+    history = BaseRowsHistory.from_forms(state.rows_by_form, current_local_datetime())
+    SYNC_CACHE.pop("search_index", None)
+    cache_base_state(state, history)
+    resumos = add_deduplicated_totals(state.build_resumos(), await get_duplicate_report())
+    payload = build_payload_from_rows(state, resumos)
+    cache_payload(payload, state)
+    return state, history, payload
+
+
+def cache_payload(payload: dict[str, Any], state: ResumoState | None = None, sync_run_id: str = "") -> None:
+    SYNC_CACHE.pop("serialized_payload", None)
+    SYNC_CACHE["sync_run_id"] = sync_run_id
+    SYNC_CACHE["payload"] = {key: value for key, value in payload.items() if key != "base_rows"}
+    SYNC_CACHE["base_rows"] = state if state is not None else BaseRowStore(payload.get("base_rows") or [])
+    SYNC_CACHE["generated_at"] = str(payload.get("generated_at", ""))
+
+
+def read_cached_payload() -> dict[str, Any] | None:
+    summary = SYNC_CACHE.get("payload")
+    if not summary:
+        return None
+    return {
+        "generated_at": summary.get("generated_at", ""),
+        "generated_date": summary.get("generated_date", ""),
+        "base_rows": SYNC_CACHE["base_rows"].to_dicts(),
+        **summary,
+    }
+
+
+def serialize_payload(payload: dict[str, Any], sync_run_id: str = "") -> SerializedPayload:
+    body = dumps_json(payload, compact=True)
+    if sync_run_id:
+        seed = f"{payload.get('generated_at', '')}|{sync_run_id}".encode("utf-8")
+    else:
+        seed = body
+    return SerializedPayload(
+        etag=hashlib.sha256(seed).hexdigest()[:32],
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=PAYLOAD_GZIP_LEVEL, mtime=0),
+        brotli_body=brotli.compress(body, quality=PAYLOAD_BROTLI_QUALITY) if brotli is not None else None,
+    )
+
+
+async def get_cached_serialized_payload() -> SerializedPayload | None:
+    serialized = SYNC_CACHE.get("serialized_payload")
+    if serialized is not None:
+        return serialized
+    payload = read_cached_payload()
+    if payload is None:
+        return None
+    serialized = await asyncio.to_thread(serialize_payload, payload, str(SYNC_CACHE.get("sync_run_id", "")))
+    SYNC_CACHE["serialized_payload"] = serialized
+    return serialized
+
+
+def parse_accept_encoding(raw_value: str | None) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for item in (raw_value or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
             continue
-    return None
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_payload_encoding(raw_value: str | None, serialized: SerializedPayload) -> str:
+    accepted = parse_accept_encoding(raw_value)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if serialized.brotli_body is not None else ["gzip"]
+    for coding in candidates:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return "identity"
+
+
+def etag_matches(raw_value: str | None, etag: str) -> bool:
+    if not raw_value:
+        return False
+    for item in raw_value.split(","):
+        candidate = item.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate.partition("-")[0] == etag:
+            return True
+    return False
+
+
+def build_payload_response(request: Request, serialized: SerializedPayload) -> Response:
+    coding = choose_payload_encoding(request.headers.get("accept-encoding"), serialized)
+    etag = serialized.etag if coding == "identity" else f"{serialized.etag}-{coding}"
+    headers = {
+        "ETag": f'"{etag}"',
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(request.headers.get("if-none-match"), serialized.etag):
+        return Response(status_code=304, headers=headers)
+    if coding == "br":
+        body = serialized.brotli_body
+    elif coding == "gzip":
+        body = serialized.gzip_body
+    else:
+        body = serialized.body
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 def read_payload_from_disk(path: Path) -> dict:
@@ -167,11 +444,51 @@ def read_payload_from_disk(path: Path) -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-async def read_payload_from_url(url: str) -> dict:
+def get_source_payload(source: tuple[str, ...]) -> SerializedPayload | None:
+    cached = SYNC_CACHE.get("source_payload")
+    return cached["serialized"] if cached is not None and cached["source"] == source else None
+
+
+def cache_source_payload(
+    source: tuple[str, ...], serialized: SerializedPayload, validators: dict[str, str] | None = None
+) -> SerializedPayload:
+    SYNC_CACHE["source_payload"] = {"source": source, "serialized": serialized, "validators": validators or {}}
+    return serialized
+
+
+def serialize_payload_file(path: Path) -> SerializedPayload:
+    # Arquivo igual (mesmo mtime e tamanho) reaproveita a serializacao e a compressao da requisicao anterior.
+    if not path.exists():
+        raise FileNotFoundError(f"Arquivo de payload nao encontrado em: {path}")
+    stat = path.stat()
+    source = ("arquivo", str(path), str(stat.st_mtime_ns), str(stat.st_size))
+    serialized = get_source_payload(source)
+    if serialized is None:
+        serialized = cache_source_payload(source, serialize_payload(read_payload_from_disk(path)))
+    return serialized
+
+
+async def fetch_payload_from_url(url: str) -> SerializedPayload:
+    cached = SYNC_CACHE.get("source_payload")
+    same_url = cached is not None and cached["source"][:2] == ("url", url)
+    headers: dict[str, str] = {}
+    if same_url:
+        if "etag" in cached["validators"]:
+            headers["If-None-Match"] = cached["validators"]["etag"]
+        if "last-modified" in cached["validators"]:
+            headers["If-Modified-Since"] = cached["validators"]["last-modified"]
     async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        return response.json()
+        response = await client.get(url, headers=headers)
+    if same_url and response.status_code == 304:
+        return cached["serialized"]
+    response.raise_for_status()
+    # Sem ETag no servidor remoto, o hash do corpo ainda evita recomprimir um payload que nao mudou.
+    source = ("url", url, hashlib.sha256(response.content).hexdigest())
+    validators = {key: response.headers[key] for key in ("etag", "last-modified") if key in response.headers}
+    serialized = get_source_payload(source)
+    if serialized is None:
+        serialized = await asyncio.to_thread(serialize_payload, json.loads(response.content))
+    return cache_source_payload(source, serialized, validators)
 
 
 def build_auth() -> httpx.BasicAuth | None:
@@ -234,39 +551,47 @@ async def fetch_ipesquisa_csv(
     return response.content
 
 
-def persist_sync_outputs(payload: dict, all_rows: list[dict[str, str]]) -> None:
+def persist_sync_outputs(payload_body: bytes, all_rows: list[dict[str, str]]) -> None:
     settings = get_settings()
-    write_json(settings["payload_path"], payload)
+    write_bytes_atomic(settings["payload_path"], payload_body)
     write_csv(settings["base_csv_path"], BASE_FIELDNAMES, all_rows)
 
 
-def read_municipios_status() -> dict[str, bool]:
-    path = get_settings()["municipios_status_path"]
-    if not path.exists():
-        return {}
+def parse_sync_state_datetime(value: str) -> datetime | None:
     try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=500, detail=f"Arquivo de status invalido: {exc}") from exc
+        parsed = datetime.fromisoformat(str(value or "").strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=APP_TIMEZONE)
+    return parsed.astimezone(APP_TIMEZONE)
 
-    if not isinstance(raw, dict):
-        return {}
 
-    return {
-        str(key): bool(value)
-        for key, value in raw.items()
-    }
+def resolve_incremental_start(entry: dict[str, str] | None, exec_now: datetime) -> datetime | None:
+    settings = get_settings()
+    full_refresh_hours = int(settings["ipesquisa_full_refresh_hours"])
+    if not entry or full_refresh_hours <= 0:
+        return None
+    last_sync = parse_sync_state_datetime(entry.get("ultima_sincronizacao", ""))
+    last_full = parse_sync_state_datetime(entry.get("ultima_carga_completa", ""))
+    if last_sync is None or last_full is None:
+        return None
+    if exec_now - last_full >= timedelta(hours=full_refresh_hours):
+        return None
+    return last_sync - timedelta(minutes=int(settings["ipesquisa_sync_overlap_minutes"]))
 
 
-def write_municipios_status(status_map: dict[str, bool]) -> dict[str, bool]:
-    path = get_settings()["municipios_status_path"]
-    path.parent.mkdir(parents=True, exist_ok=True)
-    payload = {
-        key: bool(value)
-        for key, value in sorted(status_map.items())
+def merge_form_rows(
+    existing: Iterable[Mapping[str, str]], incoming: list[dict[str, str]]
+) -> list[dict[str, str]]:
+    to_dicts = getattr(existing, "to_dicts", None)
+    merged = {
+        base_row_key(row): row
+        for row in (to_dicts() if to_dicts is not None else (dict(row) for row in existing))
     }
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return payload
+    for row in incoming:
+        merged[base_row_key(row)] = row
+    return list(merged.values())
 
 
 def has_supabase_status_backend() -> bool:
@@ -274,462 +599,439 @@ def has_supabase_status_backend() -> bool:
     return bool(settings["supabase_url"] and settings["supabase_service_role_key"])
 
 
-def build_supabase_headers(write: bool = False) -> dict[str, str]:
-    settings = get_settings()
-    headers = {
-        "apikey": str(settings["supabase_service_role_key"]),
-        "Authorization": f"Bearer {settings['supabase_service_role_key']}",
-        "Accept": "application/json",
-        "Accept-Profile": str(settings["supabase_schema"]),
-    }
-    if write:
-        headers["Content-Type"] = "application/json"
-        headers["Prefer"] = "resolution=merge-duplicates,return=representation"
-        headers["Content-Profile"] = str(settings["supabase_schema"])
-    return headers
-
-
-def build_supabase_status_url() -> str:
-    settings = get_settings()
-    return f"{settings['supabase_url']}/rest/v1/{settings['supabase_table_status']}"
-
-
-def build_supabase_previstos_url() -> str:
-    settings = get_settings()
-    return f"{settings['supabase_url']}/rest/v1/{settings['supabase_table_previstos']}"
+def build_payload_from_rows(
+    rows: Iterable[Mapping[str, str]], resumos: dict[str, list[dict[str, str]]] | None = None
+) -> dict[str, Any]:
+    latest_timestamp = max((row.get("data_hora_execucao_carga_ts", "") for row in rows), default="")
+    generated_dt = parse_iso_timestamp(latest_timestamp)
+    if generated_dt is None:
+        generated_dt = datetime.now(APP_TIMEZONE)
+    exec_timestamp = generated_dt.strftime("%d/%m/%Y %H:%M:%S")
+    exec_date = generated_dt.strftime("%d/%m/%Y")
+    return build_dashboard_payload(rows, exec_date, exec_timestamp, resumos)
 
 
-def build_supabase_base_url() -> str:
-    settings = get_settings()
-    return f"{settings['supabase_url']}/rest/v1/{settings['supabase_table_base']}"
+@app.get("/healthz")
+def healthcheck() -> dict[str, str]:
+    return {"status": "ok"}
 
 
-def read_municipios_status_from_supabase() -> dict[str, bool]:
-    url = build_supabase_status_url()
-    params = {"select": "municipio_slug,concluido"}
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url, params=params, headers=build_supabase_headers())
-    try:
-        response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Falha ao ler status de municipios no Supabase: {exc.response.status_code}",
-        ) from exc
+@app.get("/api/municipios/status")
+async def get_municipios_status() -> dict[str, dict[str, bool]]:
+    return {"concluded": await get_repository().read_municipios_status()}
 
-    data = response.json()
-    if not isinstance(data, list):
-        return {}
 
+@app.put("/api/municipios/status/{municipio_slug}")
+async def update_municipio_status(municipio_slug: str, request: MunicipioStatusUpdate) -> dict[str, Any]:
+    saved = await get_repository().write_municipio_status(municipio_slug, request.concluido)
     return {
-        str(item.get("municipio_slug", "")): bool(item.get("concluido"))
-        for item in data
-        if item.get("municipio_slug")
+        "status": "ok",
+        "municipio_slug": municipio_slug,
+        "concluido": request.concluido,
+        "concluded": saved,
     }
 
 
-def write_municipio_status_to_supabase(municipio_slug: str, concluido: bool) -> dict[str, bool]:
-    url = build_supabase_status_url()
-    payload = [{"municipio_slug": municipio_slug, "concluido": concluido}]
-    params = {"on_conflict": "municipio_slug"}
-    with httpx.Client(timeout=30.0) as client:
-        response = client.post(url, params=params, headers=build_supabase_headers(write=True), json=payload)
-    try:
-        response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Falha ao gravar status de municipios no Supabase: {exc.response.status_code}",
-        ) from exc
-
-    return read_municipios_status_from_supabase()
-
-
-def has_supabase_previstos_backend() -> bool:
-    return has_supabase_status_backend()
-
-
-def has_supabase_base_backend() -> bool:
-    return has_supabase_status_backend()
-
-
-def normalize_base_row(row: dict[str, Any]) -> dict[str, str]:
-    normalized: dict[str, str] = {}
-    for field in BASE_FIELDNAMES:
-        normalized[field] = str(row.get(field, "") or "").strip()
-    return normalized
+@app.get("/api/previstos/{municipio_slug}")
+async def get_previstos_by_municipio(municipio_slug: str) -> dict[str, Any]:
+    rows = await get_repository().read_previstos_by_municipio(municipio_slug)
+    return {
+        "municipio_slug": municipio_slug,
+        "rows": rows,
+        "total": len(rows),
+    }
 
 
-def validate_base_rows_for_supabase(rows: list[dict[str, Any]]) -> None:
-    missing_identifiers = [
-        row
-        for row in rows
-        if not str(row.get("codigo_pesquisa", "") or "").strip()
-        or not str(row.get("nro_identificacao", "") or "").strip()
-    ]
-    if missing_identifiers:
-        sample = missing_identifiers[0]
-        raise HTTPException(
-            status_code=422,
-            detail=(
-                "Nao foi possivel persistir a base consolidada no Supabase porque ha registros sem "
-                "'codigo_pesquisa' ou 'nro_identificacao'. "
-                f"Exemplo: questionario='{sample.get('questionario_preenchido', '')}', "
-                f"municipio='{sample.get('municipio', '')}', atrativo='{sample.get('nome_atrativo', '')}'."
-            ),
-        )
+@app.get("/api/previstos-resumo")
+async def get_previstos_summary() -> dict[str, Any]:
+    return await get_repository().read_previstos_summary()
 
 
-def read_base_rows_from_supabase() -> list[dict[str, str]]:
-    url = build_supabase_base_url()
-    params = {
-        "select": ",".join(BASE_FIELDNAMES),
-        "order": "data_inicio_coleta.asc.nullslast,questionario_preenchido.asc,nro_identificacao.asc",
+@app.put("/api/previstos/{municipio_slug}")
+async def replace_previstos_by_municipio(
+    municipio_slug: str, request: PrevistoReplaceRequest
+) -> dict[str, Any]:
+    rows = [row.model_dump() for row in request.rows]
+    saved_rows = await get_repository().replace_previstos_by_municipio(municipio_slug, rows)
+    SYNC_CACHE["previstos_revision"] = SYNC_CACHE.get("previstos_revision", 0) + 1
+    return {
+        "status": "ok",
+        "municipio_slug": municipio_slug,
+        "rows": saved_rows,
+        "total": len(saved_rows),
     }
-    with httpx.Client(timeout=60.0) as client:
-        response = client.get(url, params=params, headers=build_supabase_headers())
-    try:
-        response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Falha ao ler base consolidada no Supabase: {exc.response.status_code}",
-        ) from exc
 
-    data = response.json()
-    if not isinstance(data, list):
-        return []
-    return [normalize_base_row(item or {}) for item in data]
 
+@app.get("/api/dashboard/payload")
+async def get_dashboard_payload(request: Request) -> Response:
+    settings = get_settings()
+    payload_url = settings["payload_url"]
+    payload_path = settings["payload_path"]
 
-def replace_base_rows_for_form_supabase(codigo_pesquisa: int, rows: list[dict[str, Any]]) -> int:
-    url = build_supabase_base_url()
-    codigo = str(codigo_pesquisa)
-    delete_params = {"codigo_pesquisa": f"eq.{codigo}"}
-    with httpx.Client(timeout=60.0) as client:
-        delete_response = client.delete(url, params=delete_params, headers=build_supabase_headers())
-    try:
-        delete_response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(
-            status_code=502,
-            detail=(
-                f"Falha ao limpar registros anteriores do questionario {codigo_pesquisa} "
-                f"na base consolidada do Supabase: {exc.response.status_code}"
-            ),
-        ) from exc
+    serialized = await get_cached_serialized_payload()
+    if serialized is not None:
+        return build_payload_response(request, serialized)
 
-    normalized_rows = [normalize_base_row(row) for row in rows]
-    if not normalized_rows:
-        return 0
+    if await load_base_state_from_repository() is not None:
+        return build_payload_response(request, await get_cached_serialized_payload())
+
+    if payload_url:
+        try:
+            serialized = await fetch_payload_from_url(str(payload_url))
+        except httpx.HTTPError as exc:
+            raise HTTPException(status_code=502, detail=f"Falha ao buscar payload remoto: {exc}") from exc
+        return build_payload_response(request, serialized)
 
-    with httpx.Client(timeout=60.0) as client:
-        insert_response = client.post(
-            url,
-            headers=build_supabase_headers(write=True),
-            json=normalized_rows,
-        )
     try:
-        insert_response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
+        serialized = await asyncio.to_thread(serialize_payload_file, payload_path)
+    except FileNotFoundError as exc:
         raise HTTPException(
-            status_code=502,
+            status_code=503,
             detail=(
-                f"Falha ao gravar registros do questionario {codigo_pesquisa} "
-                f"na base consolidada do Supabase: {exc.response.status_code}"
+                "Payload do dashboard indisponivel. Rode uma sincronizacao do iPesquisa "
+                "ou configure EMPETUR_PAYLOAD_URL."
             ),
         ) from exc
-
-    return len(normalized_rows)
-
-
-def persist_base_rows_to_supabase(rows: list[dict[str, Any]]) -> dict[str, int]:
-    validate_base_rows_for_supabase(rows)
-    rows_by_form: dict[int, list[dict[str, Any]]] = {}
-    for row in rows:
-        codigo = int(str(row.get("codigo_pesquisa", "")).strip())
-        rows_by_form.setdefault(codigo, []).append(row)
-
-    persisted_by_form: dict[str, int] = {}
-    for codigo_pesquisa, form_rows in rows_by_form.items():
-        persisted_by_form[str(codigo_pesquisa)] = replace_base_rows_for_form_supabase(codigo_pesquisa, form_rows)
-    return persisted_by_form
-
-
-def build_payload_from_rows(rows: list[dict[str, str]]) -> dict[str, Any]:
-    generated_dt = max(
-        (
-            parsed
-            for parsed in (
-                parse_generated_timestamp(row.get("data_hora_execucao_carga", ""))
-                for row in rows
-            )
-            if parsed is not None
-        ),
-        default=None,
-    )
-    if generated_dt is None:
-        generated_dt = datetime.now(APP_TIMEZONE)
-    exec_timestamp = generated_dt.strftime("%d/%m/%Y %H:%M:%S")
-    exec_date = generated_dt.strftime("%d/%m/%Y")
-    return build_dashboard_payload(rows, exec_date, exec_timestamp)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=500, detail=f"Payload invalido: {exc}") from exc
+    return build_payload_response(request, serialized)
 
 
-def normalize_previsto_row(municipio_slug: str, row: dict[str, Any]) -> dict[str, str]:
-    return {
-        "municipio_slug": municipio_slug,
-        "regiao": str(row.get("regiao", "") or "").strip(),
-        "municipio": str(row.get("municipio", "") or "").strip(),
-        "categoria": str(row.get("categoria", "") or "").strip(),
-        "referencia": str(row.get("referencia", "") or "").strip(),
-        "atrativo": str(row.get("atrativo", "") or "").strip(),
-    }
+def encode_base_rows_cursor(key: RowKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key), ensure_ascii=False).encode("utf-8")).decode("ascii")
 
 
-def read_previstos_local() -> dict[str, list[dict[str, str]]]:
-    path = get_settings()["previstos_path"]
-    if not path.exists():
-        return {}
+def decode_base_rows_cursor(cursor: str) -> RowKey:
     try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=500, detail=f"Arquivo de previstos invalido: {exc}") from exc
-    if not isinstance(raw, dict):
-        return {}
-    result: dict[str, list[dict[str, str]]] = {}
-    for key, value in raw.items():
-        if not isinstance(value, list):
-            continue
-        result[str(key)] = [normalize_previsto_row(str(key), item or {}) for item in value]
-    return result
-
-
-def write_previstos_local(data: dict[str, list[dict[str, str]]]) -> dict[str, list[dict[str, str]]]:
-    path = get_settings()["previstos_path"]
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-    return data
+        codigo_pesquisa, nro_identificacao = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error) as exc:
+        raise HTTPException(status_code=400, detail="Cursor de paginacao invalido.") from exc
+    return str(codigo_pesquisa), str(nro_identificacao)
 
 
-def read_previstos_by_municipio_local(municipio_slug: str) -> list[dict[str, str]]:
-    return read_previstos_local().get(municipio_slug, [])
+def read_base_row(state: ResumoState, history: BaseRowsHistory, key: RowKey) -> dict[str, str] | None:
+    position = history.locate(key)
+    if position is None:
+        return None
+    return dict(state.get_form_rows(key[0])[position])
 
 
-def read_previstos_summary_local() -> dict[str, Any]:
-    data = read_previstos_local()
-    by_municipio = {
-        municipio_slug: len(rows)
-        for municipio_slug, rows in data.items()
-    }
-    return {
-        "total_previstos": sum(by_municipio.values()),
-        "municipios": by_municipio,
-    }
+def paginate_keys(keys: list[RowKey], cursor: str | None, limit: int) -> tuple[list[RowKey], str | None]:
+    start = bisect.bisect_right(keys, decode_base_rows_cursor(cursor)) if cursor else 0
+    page = keys[start : start + limit]
+    next_cursor = encode_base_rows_cursor(page[-1]) if start + limit < len(keys) and page else None
+    return page, next_cursor
 
 
-def replace_previstos_by_municipio_local(
-    municipio_slug: str, rows: list[dict[str, Any]]
-) -> list[dict[str, str]]:
-    data = read_previstos_local()
-    data[municipio_slug] = [normalize_previsto_row(municipio_slug, row) for row in rows]
-    write_previstos_local(data)
-    return data[municipio_slug]
-
-
-def read_previstos_by_municipio_supabase(municipio_slug: str) -> list[dict[str, str]]:
-    url = build_supabase_previstos_url()
-    params = {
-        "select": "municipio_slug,regiao,municipio,categoria,referencia,atrativo",
-        "municipio_slug": f"eq.{municipio_slug}",
-        "order": "categoria.asc,referencia.asc,atrativo.asc",
-    }
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url, params=params, headers=build_supabase_headers())
-    try:
-        response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
+@app.get("/api/base-rows")
+async def get_base_rows(
+    limit: int = Query(BASE_ROWS_PAGE_SIZE, ge=1, le=BASE_ROWS_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    since: str | None = None,
+) -> dict[str, Any]:
+    state: ResumoState | None = SYNC_CACHE.get("resumo_state")
+    history: BaseRowsHistory | None = SYNC_CACHE.get("history")
+    if state is None or history is None:
+        loaded = await load_base_state_from_repository()
+        if loaded is not None:
+            state, history, _ = loaded
+    if state is None or history is None:
         raise HTTPException(
-            status_code=502,
-            detail=f"Falha ao ler previstos no Supabase: {exc.response.status_code}",
-        ) from exc
-    data = response.json()
-    if not isinstance(data, list):
-        return []
-    return [normalize_previsto_row(municipio_slug, item or {}) for item in data]
-
+            status_code=503,
+            detail="Base consolidada indisponivel. Rode uma sincronizacao do iPesquisa.",
+        )
 
-def read_previstos_summary_supabase() -> dict[str, Any]:
-    url = build_supabase_previstos_url()
-    params = {
-        "select": "municipio_slug",
+    response: dict[str, Any] = {
+        "mode": "full",
+        "sync_run_id": history.latest_sync_run_id,
+        "generated_at": str(SYNC_CACHE.get("generated_at", "")),
     }
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url, params=params, headers=build_supabase_headers())
     try:
-        response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
+        changes = history.changes_since(since) if since else None
+    except ValueError as exc:
         raise HTTPException(
-            status_code=502,
-            detail=f"Falha ao ler resumo de previstos no Supabase: {exc.response.status_code}",
+            status_code=400,
+            detail="Parametro since invalido. Use um sync_run_id ou uma data e hora.",
         ) from exc
-    data = response.json()
-    if not isinstance(data, list):
-        return {"total_previstos": 0, "municipios": {}}
-
-    by_municipio: dict[str, int] = {}
-    for item in data:
-        municipio_slug = str((item or {}).get("municipio_slug", "")).strip()
-        if not municipio_slug:
-            continue
-        by_municipio[municipio_slug] = by_municipio.get(municipio_slug, 0) + 1
+    if changes is None:
+        keys, next_cursor = paginate_keys(history.sorted_keys(), cursor, limit)
+        rows = [read_base_row(state, history, key) for key in keys]
+        response.update(
+            {
+                "total": len(history.sorted_keys()),
+                "rows": [row for row in rows if row is not None],
+                "deleted": [],
+                "next_cursor": next_cursor,
+            }
+        )
+        return response
+
+    changed, deleted = changes
+    keys, next_cursor = paginate_keys(sorted(changed | deleted), cursor, limit)
+    rows: list[dict[str, str]] = []
+    deleted_keys: list[dict[str, str]] = []
+    for key in keys:
+        row = read_base_row(state, history, key) if key in changed else None
+        if row is None:
+            deleted_keys.append({"codigo_pesquisa": key[0], "nro_identificacao": key[1]})
+        else:
+            rows.append(row)
+    response.update(
+        {
+            "mode": "delta",
+            "since": since,
+            "total": len(changed) + len(deleted),
+            "rows": rows,
+            "deleted": deleted_keys,
+            "next_cursor": next_cursor,
+        }
+    )
+    return response
+
+
+@dataclass(frozen=True)
+class BaseQueryFilters:
+    filters: dict[str, list[str]]
+    start: datetime | None
+    end: datetime | None
+
+
+def build_base_query_filters(
+    regiao: list[str] | None = Query(None),
+    municipio: list[str] | None = Query(None),
+    categoria: list[str] | None = Query(None),
+    questionario: list[str] | None = Query(None),
+    pesquisador: list[str] | None = Query(None),
+    data_inicio: str | None = None,
+    data_fim: str | None = None,
+) -> BaseQueryFilters:
+    selected = {
+        "regiao": regiao,
+        "municipio": municipio,
+        "categoria": categoria,
+        "questionario": questionario,
+        "pesquisador": pesquisador,
+    }
+    start = parse_filter_datetime(data_inicio)
+    end = parse_filter_datetime(data_fim, end=True)
+    if data_inicio and start is None:
+        raise HTTPException(status_code=422, detail="Parametro 'data_inicio' invalido.")
+    if data_fim and end is None:
+        raise HTTPException(status_code=422, detail="Parametro 'data_fim' invalido.")
+    return BaseQueryFilters(
+        filters={QUERY_FILTER_FIELDS[name]: values for name, values in selected.items() if values},
+        start=start,
+        end=end,
+    )
+
 
+async def get_base_state() -> ResumoState:
+    state: ResumoState | None = SYNC_CACHE.get("resumo_state")
+    if state is None:
+        loaded = await load_base_state_from_repository()
+        if loaded is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Base consolidada indisponivel. Rode uma sincronizacao do iPesquisa.",
+            )
+        state = loaded[0]
+    return state
+
+
+async def get_base_index() -> BaseRowIndex:
+    index: BaseRowIndex | None = SYNC_CACHE.get("base_index")
+    if index is not None:
+        return index
+    state = await get_base_state()
+    generation = SYNC_CACHE.get("base_generation")
+    index = await asyncio.to_thread(BaseRowIndex, list(state.rows_by_form.values()))
+    if SYNC_CACHE.get("base_generation") == generation:
+        SYNC_CACHE["base_index"] = index
+    return index
+
+
+@app.get("/api/base-rows/query")
+async def query_base_rows(
+    filters: BaseQueryFilters = Depends(build_base_query_filters),
+    limit: int = Query(BASE_ROWS_PAGE_SIZE, ge=1, le=BASE_ROWS_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+) -> dict[str, Any]:
+    index = await get_base_index()
+    started = time.perf_counter()
+    matched = index.match(filters.filters, filters.start, filters.end)
+    rows = index.select(matched, offset, limit)
     return {
-        "total_previstos": sum(by_municipio.values()),
-        "municipios": by_municipio,
+        "total": matched.bit_count(),
+        "limit": limit,
+        "offset": offset,
+        "rows": rows,
+        "tempo_consulta_ms": round((time.perf_counter() - started) * 1000, 2),
     }
 
 
-def replace_previstos_by_municipio_supabase(
-    municipio_slug: str, rows: list[dict[str, Any]]
-) -> list[dict[str, str]]:
-    url = build_supabase_previstos_url()
-    delete_params = {"municipio_slug": f"eq.{municipio_slug}"}
-    with httpx.Client(timeout=30.0) as client:
-        delete_response = client.delete(url, params=delete_params, headers=build_supabase_headers())
-    try:
-        delete_response.raise_for_status()
-    except httpx.HTTPStatusError as exc:
+@app.get("/api/base-rows/aggregate")
+async def aggregate_base_rows(
+    group_by: list[str] = Query(["municipio"]),
+    filters: BaseQueryFilters = Depends(build_base_query_filters),
+) -> dict[str, Any]:
+    fields = [QUERY_FILTER_FIELDS.get(name, name) for name in group_by]
+    invalid = [name for name, field in zip(group_by, fields) if field not in INDEX_FIELDS]
+    if invalid or not fields or len(set(fields)) != len(fields):
         raise HTTPException(
-            status_code=502,
-            detail=f"Falha ao limpar previstos no Supabase: {exc.response.status_code}",
-        ) from exc
+            status_code=422,
+            detail=f"Parametro 'group_by' invalido. Valores aceitos, sem repeticao: {', '.join(QUERY_FILTER_FIELDS)}.",
+        )
+    index = await get_base_index()
+    started = time.perf_counter()
+    matched = index.match(filters.filters, filters.start, filters.end)
+    return {
+        "total": matched.bit_count(),
+        "group_by": fields,
+        "grupos": index.aggregate(matched, fields),
+        "tempo_consulta_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
 
-    normalized_rows = [normalize_previsto_row(municipio_slug, row) for row in rows]
-    if normalized_rows:
-        with httpx.Client(timeout=30.0) as client:
-            insert_response = client.post(
-                url,
-                headers=build_supabase_headers(write=True),
-                json=normalized_rows,
-            )
-        try:
-            insert_response.raise_for_status()
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(
-                status_code=502,
-                detail=f"Falha ao gravar previstos no Supabase: {exc.response.status_code}",
-            ) from exc
 
-    return read_previstos_by_municipio_supabase(municipio_slug)
+def update_search_index(search_index: AtrativoSearchIndex, stores: Mapping[str, BaseRowStore]) -> None:
+    for codigo_pesquisa, store in stores.items():
+        search_index.replace_form(codigo_pesquisa, store)
 
 
-@app.get("/healthz")
-def healthcheck() -> dict[str, str]:
-    return {"status": "ok"}
+async def get_search_index() -> AtrativoSearchIndex:
+    index: AtrativoSearchIndex | None = SYNC_CACHE.get("search_index")
+    if index is not None:
+        return index
+    state = await get_base_state()
+    generation = SYNC_CACHE.get("base_generation")
+    index = await asyncio.to_thread(AtrativoSearchIndex.from_forms, dict(state.rows_by_form))
+    if SYNC_CACHE.get("base_generation") == generation:
+        SYNC_CACHE["search_index"] = index
+    return index
 
 
-@app.get("/api/municipios/status")
-def get_municipios_status() -> dict[str, dict[str, bool]]:
-    if has_supabase_status_backend():
-        return {"concluded": read_municipios_status_from_supabase()}
-    return {"concluded": read_municipios_status()}
+@app.get("/api/atrativos/search")
+async def search_atrativos(
+    q: str = Query(..., min_length=1, max_length=200),
+    municipio: list[str] | None = Query(None),
+    categoria: list[str] | None = Query(None),
+    limit: int = Query(20, ge=1, le=200),
+    min_similarity: float = Query(SEARCH_MIN_SIMILARITY, ge=0.0, le=1.0),
+) -> dict[str, Any]:
+    index = await get_search_index()
+    started = time.perf_counter()
+    total, results = index.search(q, limit, min_similarity, municipio or (), categoria or ())
+    return {
+        "q": q,
+        "total": total,
+        "results": results,
+        "tempo_consulta_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
 
 
-@app.put("/api/municipios/status/{municipio_slug}")
-def update_municipio_status(municipio_slug: str, request: MunicipioStatusUpdate) -> dict[str, Any]:
-    if has_supabase_status_backend():
-        saved = write_municipio_status_to_supabase(municipio_slug, request.concluido)
-    else:
-        status_map = read_municipios_status()
-        status_map[municipio_slug] = request.concluido
-        saved = write_municipios_status(status_map)
+def build_reconciliation(
+    forms: list[Iterable[Mapping[str, str]]], previstos: list[dict[str, str]]
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    report = reconcile_previstos(
+        previstos, build_collected_blocks(row for rows in forms for row in rows)
+    )
+    report["tempo_processamento_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+async def get_reconciliation() -> dict[str, Any]:
+    state = await get_base_state()
+    key = (SYNC_CACHE.get("base_generation"), SYNC_CACHE.get("previstos_revision", 0))
+    cached = SYNC_CACHE.get("reconciliacao")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    previstos = await get_repository().read_previstos()
+    report = await asyncio.to_thread(build_reconciliation, list(state.rows_by_form.values()), previstos)
+    if (SYNC_CACHE.get("base_generation"), SYNC_CACHE.get("previstos_revision", 0)) == key:
+        SYNC_CACHE["reconciliacao"] = (key, report)
+    return report
+
+
+@app.get("/api/reconciliacao-resumo")
+async def get_reconciliation_summary() -> dict[str, Any]:
+    report = await get_reconciliation()
     return {
-        "status": "ok",
-        "municipio_slug": municipio_slug,
-        "concluido": request.concluido,
-        "concluded": saved,
+        "totais": report["totais"],
+        "municipios": report["municipios"],
+        "tempo_processamento_ms": report["tempo_processamento_ms"],
     }
 
 
-@app.get("/api/previstos/{municipio_slug}")
-def get_previstos_by_municipio(municipio_slug: str) -> dict[str, Any]:
-    rows = (
-        read_previstos_by_municipio_supabase(municipio_slug)
-        if has_supabase_previstos_backend()
-        else read_previstos_by_municipio_local(municipio_slug)
-    )
+@app.get("/api/reconciliacao/{municipio_slug}")
+async def get_reconciliation_by_municipio(
+    municipio_slug: str,
+    status: str | None = Query(None, pattern="^(encontrado|ausente|ambiguo)$"),
+) -> dict[str, Any]:
+    report = await get_reconciliation()
+    rows = report["resultados"].get(municipio_slug, [])
+    if status:
+        rows = [row for row in rows if row["status"] == status]
     return {
         "municipio_slug": municipio_slug,
+        "resumo": report["municipios"].get(municipio_slug),
         "rows": rows,
         "total": len(rows),
     }
 
 
-@app.get("/api/previstos-resumo")
-def get_previstos_summary() -> dict[str, Any]:
-    summary = (
-        read_previstos_summary_supabase()
-        if has_supabase_previstos_backend()
-        else read_previstos_summary_local()
-    )
-    return summary
+def build_duplicate_report(
+    forms: list[Iterable[Mapping[str, str]]], previous: DuplicateReport | None = None
+) -> DuplicateReport:
+    started = time.perf_counter()
+    report = detect_duplicates((row for rows in forms for row in rows), previous)
+    report.tempo_processamento_ms = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+async def get_duplicate_report() -> DuplicateReport:
+    state = await get_base_state()
+    generation = SYNC_CACHE.get("base_generation")
+    cached = SYNC_CACHE.get("duplicados")
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    # O relatorio anterior deixa a nova geracao recalcular so os municipios cujas linhas mudaram.
+    previous = cached[1] if cached is not None else None
+    report = await asyncio.to_thread(build_duplicate_report, list(state.rows_by_form.values()), previous)
+    if SYNC_CACHE.get("base_generation") == generation:
+        SYNC_CACHE["duplicados"] = (generation, report)
+    return report
+
+
+@app.get("/api/duplicados-resumo")
+async def get_duplicates_summary() -> dict[str, Any]:
+    report = await get_duplicate_report()
+    return {
+        "totais": report.totais(),
+        "municipios": report.totais_por_municipio,
+        "tempo_processamento_ms": report.tempo_processamento_ms,
+        "municipios_recalculados": report.municipios_recalculados,
+    }
 
 
-@app.put("/api/previstos/{municipio_slug}")
-def replace_previstos_by_municipio(
-    municipio_slug: str, request: PrevistoReplaceRequest
+@app.get("/api/duplicados")
+async def list_duplicates(
+    municipio: list[str] | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
 ) -> dict[str, Any]:
-    rows = [row.model_dump() for row in request.rows]
-    saved_rows = (
-        replace_previstos_by_municipio_supabase(municipio_slug, rows)
-        if has_supabase_previstos_backend()
-        else replace_previstos_by_municipio_local(municipio_slug, rows)
-    )
+    report = await get_duplicate_report()
+    clusters = report.clusters
+    if municipio:
+        selected = set(municipio)
+        clusters = [cluster for cluster in clusters if cluster["municipio"] in selected]
     return {
-        "status": "ok",
-        "municipio_slug": municipio_slug,
-        "rows": saved_rows,
-        "total": len(saved_rows),
+        "total": len(clusters),
+        "limit": limit,
+        "offset": offset,
+        "grupos": clusters[offset : offset + limit],
     }
 
 
-@app.get("/api/dashboard/payload")
-async def get_dashboard_payload() -> dict:
-    settings = get_settings()
-    payload_url = settings["payload_url"]
-    payload_path = settings["payload_path"]
-
-    if SYNC_CACHE.get("payload"):
-        return SYNC_CACHE["payload"]
-
-    if has_supabase_base_backend():
-        supabase_rows = read_base_rows_from_supabase()
-        if supabase_rows:
-            payload = build_payload_from_rows(supabase_rows)
-            SYNC_CACHE["payload"] = payload
-            SYNC_CACHE["generated_at"] = payload.get("generated_at", "")
-            return payload
-
-    if payload_url:
-        try:
-            return await read_payload_from_url(str(payload_url))
-        except httpx.HTTPError as exc:
-            raise HTTPException(status_code=502, detail=f"Falha ao buscar payload remoto: {exc}") from exc
-
-    try:
-        return read_payload_from_disk(payload_path)
-    except FileNotFoundError as exc:
-        raise HTTPException(
-            status_code=503,
-            detail=(
-                "Payload do dashboard indisponivel. Rode uma sincronizacao do iPesquisa "
-                "ou configure EMPETUR_PAYLOAD_URL."
-            ),
-        ) from exc
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=500, detail=f"Payload invalido: {exc}") from exc
-
-
 @app.post("/api/sync/ipesquisa")
 async def sync_ipesquisa(request: SyncRequest) -> dict[str, Any]:
     settings = get_settings()
@@ -765,59 +1067,181 @@ async def sync_ipesquisa(request: SyncRequest) -> dict[str, Any]:
     exec_date = exec_now.strftime("%d/%m/%Y")
     exec_timestamp = exec_now.strftime("%d/%m/%Y %H:%M:%S")
     sync_run_id = str(uuid4())
+    revision_at = exec_now.replace(tzinfo=None, microsecond=0)
+
+    state: ResumoState | None = SYNC_CACHE.get("resumo_state")
+    history: BaseRowsHistory | None = SYNC_CACHE.get("history")
+    if state is None or history is None:
+        state = await read_base_state_from_repository()
+        history = BaseRowsHistory.from_forms(state.rows_by_form, revision_at)
+        SYNC_CACHE.pop("search_index", None)
+
+    explicit_range = bool(request.dt_gravacao_inicio or request.dt_gravacao_fim)
+    repository = get_repository()
+    sync_state = {} if explicit_range else await repository.read_sync_state()
+    incremental_starts: dict[str, datetime] = {}
+    if not explicit_range and not request.full_refresh:
+        for form in forms:
+            codigo_pesquisa = str(form.codigo_pesquisa)
+            if not state.has_form(codigo_pesquisa):
+                continue
+            incremental_start = resolve_incremental_start(sync_state.get(codigo_pesquisa), exec_now)
+            if incremental_start is not None:
+                incremental_starts[codigo_pesquisa] = incremental_start
+
+    def resolve_download_range(form: SyncForm) -> tuple[str | None, str | None]:
+        if explicit_range:
+            return request.dt_gravacao_inicio, request.dt_gravacao_fim
+        incremental_start = incremental_starts.get(str(form.codigo_pesquisa))
+        if incremental_start is None:
+            return None, None
+        return incremental_start.strftime(str(settings["ipesquisa_datetime_format"])), None
 
     timeout = httpx.Timeout(float(settings["ipesquisa_timeout_seconds"]))
     all_rows: list[dict[str, str]] = []
+    rows_by_form: dict[str, list[dict[str, str]]] = {}
     download_summary: list[dict[str, Any]] = []
 
-    async with httpx.AsyncClient(timeout=timeout, auth=auth) as client:
-        for form in forms:
-            questionario = normalize_questionario_name(form.questionario)
+    semaphore = asyncio.Semaphore(int(settings["ipesquisa_max_concurrency"]))
+
+    async def download_form(client: httpx.AsyncClient, form: SyncForm) -> tuple[bytes, float]:
+        async with semaphore:
+            started = time.perf_counter()
+            dt_gravacao_inicio, dt_gravacao_fim = resolve_download_range(form)
             csv_bytes = await fetch_ipesquisa_csv(
                 client,
-                questionario,
+                normalize_questionario_name(form.questionario),
                 form.codigo_pesquisa,
-                request.dt_gravacao_inicio,
-                request.dt_gravacao_fim,
+                dt_gravacao_inicio,
+                dt_gravacao_fim,
             )
+            return csv_bytes, time.perf_counter() - started
+
+    download_started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=timeout, auth=auth) as client:
+        tasks = [asyncio.create_task(download_form(client, form)) for form in forms]
+        try:
+            downloads = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    download_elapsed = time.perf_counter() - download_started
+
+    content_hashes: dict[str, str] = {}
+    for form, (csv_bytes, elapsed) in zip(forms, downloads):
+        questionario = normalize_questionario_name(form.questionario)
+        codigo_pesquisa = str(form.codigo_pesquisa)
+        # O hash guardado tambem cobre a versao das regras de consolidacao, como a chave do cache da CLI: depois de
+        # um deploy que muda a consolidacao, um CSV igual ao anterior volta a ser consolidado.
+        content_hash = build_cache_key(build_csv_file_name(questionario), hash_csv_bytes(csv_bytes))
+        content_hashes[codigo_pesquisa] = content_hash
+        unchanged = (
+            not explicit_range
+            and state.has_form(codigo_pesquisa)
+            and sync_state.get(codigo_pesquisa, {}).get("hash_conteudo") == content_hash
+        )
+        form_rows: list[dict[str, str]] = []
+        plans: list[SchemaPlan] = []
+        if not unchanged:
+            form_rows = rows_by_form.setdefault(codigo_pesquisa, [])
             try:
-                rows = consolidate_csv_content(
+                for row in iter_consolidated_csv_content(
                     build_csv_file_name(questionario),
                     csv_bytes,
                     exec_date,
                     exec_timestamp,
-                )
+                    plans.append,
+                ):
+                    row["codigo_pesquisa"] = codigo_pesquisa
+                    row["sync_run_id"] = sync_run_id
+                    form_rows.append(row)
             except KeyError as exc:
                 raise HTTPException(
                     status_code=422,
                     detail=f"Falha ao consolidar o questionario '{questionario}': {exc}",
                 ) from exc
-            for row in rows:
-                row["codigo_pesquisa"] = str(form.codigo_pesquisa)
-                row["sync_run_id"] = sync_run_id
-            all_rows.extend(rows)
-            download_summary.append(
-                {
-                    "questionario": questionario,
-                    "codigo_pesquisa": form.codigo_pesquisa,
-                    "linhas_consolidadas": len(rows),
-                }
+        colunas_aproximadas = dict(plans[0].fuzzy_columns) if plans else {}
+        if colunas_aproximadas:
+            LOGGER.warning(
+                "Questionario '%s' (%s): colunas resolvidas por comparacao aproximada: %s",
+                questionario,
+                codigo_pesquisa,
+                ", ".join(f"{field} <- '{column}'" for field, column in colunas_aproximadas.items()),
             )
+        dt_gravacao_inicio, _ = resolve_download_range(form)
+        download_summary.append(
+            {
+                "questionario": questionario,
+                "codigo_pesquisa": form.codigo_pesquisa,
+                "modo_carga": (
+                    "intervalo"
+                    if explicit_range
+                    else "incremental"
+                    if codigo_pesquisa in incremental_starts
+                    else "completa"
+                ),
+                "dt_gravacao_inicio": dt_gravacao_inicio,
+                "unchanged": unchanged,
+                "linhas_consolidadas": len(form_rows),
+                "colunas_aproximadas": colunas_aproximadas,
+                "bytes_baixados": len(csv_bytes),
+                "tempo_download_ms": round(elapsed * 1000, 1),
+            }
+        )
+        all_rows.extend(form_rows)
 
-    persisted_supabase = False
-    persisted_by_form: dict[str, int] = {}
-    payload_rows = all_rows
-    if has_supabase_base_backend():
-        persisted_by_form = persist_base_rows_to_supabase(all_rows)
-        persisted_supabase = True
-        payload_rows = read_base_rows_from_supabase()
+    partial_forms = set(rows_by_form) if explicit_range else set(incremental_starts)
+    persisted_by_form = await repository.persist_base_rows(
+        all_rows,
+        {int(codigo_pesquisa) for codigo_pesquisa in partial_forms},
+        {int(codigo_pesquisa) for codigo_pesquisa in rows_by_form if codigo_pesquisa not in partial_forms},
+    )
+    changed_stores: dict[str, BaseRowStore] = {}
+    for codigo_pesquisa, form_rows in rows_by_form.items():
+        # Janela incremental sem linhas novas nao muda nada; carga completa vazia esvazia o questionario.
+        if not form_rows and codigo_pesquisa in partial_forms:
+            continue
+        if codigo_pesquisa in partial_forms:
+            form_rows = merge_form_rows(state.get_form_rows(codigo_pesquisa), form_rows)
+        store = changed_stores[codigo_pesquisa] = BaseRowStore(form_rows)
+        state.replace_form(codigo_pesquisa, store)
+        history.replace_form(codigo_pesquisa, store)
+    history.commit(sync_run_id, revision_at)
+    cache_base_state(state, history)
+    search_index: AtrativoSearchIndex | None = SYNC_CACHE.get("search_index")
+    if search_index is not None and changed_stores:
+        await asyncio.to_thread(update_search_index, search_index, changed_stores)
+
+    if not explicit_range:
+        sync_timestamp = exec_now.isoformat(timespec="seconds")
+        await repository.write_sync_state(
+            {
+                str(form.codigo_pesquisa): {
+                    "ultima_sincronizacao": sync_timestamp,
+                    "ultima_carga_completa": (
+                        sync_state.get(str(form.codigo_pesquisa), {}).get("ultima_carga_completa", "")
+                        if str(form.codigo_pesquisa) in incremental_starts
+                        else sync_timestamp
+                    ),
+                    "sync_run_id": sync_run_id,
+                    "hash_conteudo": content_hashes[str(form.codigo_pesquisa)],
+                }
+                for form in forms
+            }
+        )
 
-    payload = build_payload_from_rows(payload_rows)
-    SYNC_CACHE["payload"] = payload
-    SYNC_CACHE["generated_at"] = str(payload.get("generated_at", exec_timestamp))
+    resumos = add_deduplicated_totals(state.build_resumos(), await get_duplicate_report())
+    payload = build_dashboard_payload(state, exec_date, exec_timestamp, resumos)
+    cache_payload(payload, state, sync_run_id)
+    serialized = await asyncio.to_thread(serialize_payload, payload, sync_run_id)
+    if SYNC_CACHE.get("sync_run_id") == sync_run_id:
+        SYNC_CACHE["serialized_payload"] = serialized
 
     if request.persist_local:
-        persist_sync_outputs(payload, payload_rows)
+        await asyncio.to_thread(persist_sync_outputs, serialized.body, payload["base_rows"])
+    await get_base_index()
 
     return {
         "status": "ok",
@@ -825,8 +1249,14 @@ async def sync_ipesquisa(request: SyncRequest) -> dict[str, Any]:
         "sync_run_id": sync_run_id,
         "questionarios_processados": len(forms),
         "questionarios_ignorados": skipped_forms,
+        "questionarios_inalterados": sum(1 for item in download_summary if item["unchanged"]),
         "linhas_consolidadas": len(all_rows),
-        "persistido_supabase": persisted_supabase,
-        "linhas_persistidas_por_questionario": persisted_by_form,
+        "armazenamento": "supabase" if isinstance(repository, SupabaseRepository) else "sqlite",
+        "persistido_supabase": isinstance(repository, SupabaseRepository),
+        "linhas_persistidas_por_questionario": {
+            codigo_pesquisa: counts["linhas"] for codigo_pesquisa, counts in persisted_by_form.items()
+        },
+        "alteracoes_por_questionario": persisted_by_form,
+        "tempo_total_download_ms": round(download_elapsed * 1000, 1),
         "downloads": download_summary,
     }
@@ -0,0 +1,473 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, TypeVar
+
+from fastapi import HTTPException
+
+from backend.supabase_repository import (
+    SUPABASE_PAGE_SIZE,
+    normalize_base_row,
+    normalize_previsto_row,
+    validate_base_rows,
+)
+from empetur_core.consolidacao import (
+    BASE_FIELDNAMES,
+    TIMESTAMP_FIELDS,
+    base_row_fingerprint,
+    base_row_key,
+    normalize_questionario_name,
+)
+from empetur_core.datas import br_to_iso_timestamp
+
+
+T = TypeVar("T")
+LOGGER = logging.getLogger("empetur.backend")
+SQLITE_TIMEOUT = 30.0
+BASE_COLUMNS = ", ".join(BASE_FIELDNAMES)
+BASE_PLACEHOLDERS = ", ".join("?" for _ in BASE_FIELDNAMES)
+BASE_UPDATES = ", ".join(f"{field} = excluded.{field}" for field in BASE_FIELDNAMES)
+PREVISTO_FIELDS = ["municipio_slug", "regiao", "municipio", "categoria", "referencia", "atrativo"]
+SYNC_STATE_FIELDS = ["ultima_sincronizacao", "ultima_carga_completa", "sync_run_id", "hash_conteudo"]
+
+SCHEMA = f"""
+create table if not exists empetur_municipios_status (
+  municipio_slug text primary key,
+  concluido integer not null default 0,
+  updated_at text not null default current_timestamp
+);
+
+create table if not exists empetur_previstos_atrativos (
+  id integer primary key autoincrement,
+  municipio_slug text not null,
+  regiao text not null default '',
+  municipio text not null default '',
+  categoria text not null default '',
+  referencia text not null default '',
+  atrativo text not null default '',
+  created_at text not null default current_timestamp,
+  updated_at text not null default current_timestamp
+);
+
+create index if not exists idx_empetur_previstos_atrativos_municipio_slug
+on empetur_previstos_atrativos (municipio_slug);
+
+create table if not exists empetur_tabela_base (
+  id integer primary key autoincrement,
+  {", ".join(f"{field} text not null default ''" for field in BASE_FIELDNAMES)},
+  chave_registro text not null,
+  created_at text not null default current_timestamp,
+  updated_at text not null default current_timestamp,
+  constraint uq_empetur_tabela_base_origem unique (codigo_pesquisa, chave_registro)
+);
+
+create index if not exists idx_empetur_tabela_base_municipio
+on empetur_tabela_base (municipio);
+
+create index if not exists idx_empetur_tabela_base_questionario
+on empetur_tabela_base (questionario_preenchido);
+
+create table if not exists empetur_sync_estado (
+  codigo_pesquisa text primary key,
+  ultima_sincronizacao text not null,
+  ultima_carga_completa text,
+  sync_run_id text not null default '',
+  hash_conteudo text not null default '',
+  updated_at text not null default current_timestamp
+);
+
+create table if not exists empetur_migracoes (
+  nome text primary key,
+  aplicada_em text not null default current_timestamp
+);
+"""
+
+
+def read_json_file(path: Path | None, label: str) -> Any:
+    if path is None or not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=500, detail=f"Arquivo de {label} invalido: {exc}") from exc
+
+
+class SqliteRepository:
+    def __init__(
+        self,
+        path: Path,
+        page_size: int = SUPABASE_PAGE_SIZE,
+        status_json_path: Path | None = None,
+        previstos_json_path: Path | None = None,
+        sync_state_json_path: Path | None = None,
+        base_csv_path: Path | None = None,
+        form_map: dict[str, int] | None = None,
+    ) -> None:
+        self.path = path
+        self.page_size = max(page_size, 1)
+        self.status_json_path = status_json_path
+        self.previstos_json_path = previstos_json_path
+        self.sync_state_json_path = sync_state_json_path
+        self.base_csv_path = base_csv_path
+        self.form_map = form_map or {}
+        self.initialized = False
+        self.base_initialized = False
+        self.init_lock = threading.Lock()
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, isolation_level=None)
+        try:
+            connection.execute("pragma synchronous = normal")
+            connection.execute(f"pragma busy_timeout = {int(SQLITE_TIMEOUT * 1000)}")
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.connect() as connection:
+            connection.execute("begin immediate")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("rollback")
+                raise
+            connection.execute("commit")
+
+    def initialize(self) -> None:
+        with self.init_lock:
+            if self.initialized:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.connect() as connection:
+                connection.execute("pragma journal_mode = wal")
+                connection.executescript(SCHEMA)
+            self.apply_migration("tabela_base_datas_iso", self.add_timestamp_columns)
+            self.migrate_json_files()
+            self.initialized = True
+
+    def initialize_base(self) -> None:
+        # A base CSV so e importada quando a tabela-base e usada, fora do caminho de status e previstos.
+        self.initialize()
+        with self.init_lock:
+            if self.base_initialized:
+                return
+            if self.base_csv_path is not None and self.base_csv_path.exists():
+                self.apply_migration("tabela_base_csv", self.import_base_csv)
+            self.base_initialized = True
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if not self.initialized:
+            await asyncio.to_thread(self.initialize)
+        return await asyncio.to_thread(func, *args)
+
+    async def run_base(self, func: Callable[..., T], *args: Any) -> T:
+        if not self.base_initialized:
+            await asyncio.to_thread(self.initialize_base)
+        return await asyncio.to_thread(func, *args)
+
+    def apply_migration(self, name: str, migrate: Callable[[sqlite3.Connection], None]) -> None:
+        with self.transaction() as connection:
+            if connection.execute("select 1 from empetur_migracoes where nome = ?", (name,)).fetchone():
+                return
+            migrate(connection)
+            connection.execute("insert into empetur_migracoes (nome) values (?)", (name,))
+
+    def add_timestamp_columns(self, connection: sqlite3.Connection) -> None:
+        existing = {record[1] for record in connection.execute("pragma table_info(empetur_tabela_base)")}
+        for field in TIMESTAMP_FIELDS:
+            if field not in existing:
+                connection.execute(f"alter table empetur_tabela_base add column {field} text not null default ''")
+        records = connection.execute(
+            f"select id, {', '.join(TIMESTAMP_FIELDS.values())} from empetur_tabela_base"
+        ).fetchall()
+        connection.executemany(
+            f"update empetur_tabela_base set {', '.join(f'{field} = ?' for field in TIMESTAMP_FIELDS)} where id = ?",
+            [(*map(br_to_iso_timestamp, record[1:]), record[0]) for record in records],
+        )
+
+    def migrate_json_files(self) -> None:
+        status = read_json_file(self.status_json_path, "status")
+        if isinstance(status, dict):
+            self.apply_migration(
+                "municipios_status_json",
+                lambda connection: connection.executemany(
+                    "insert or ignore into empetur_municipios_status (municipio_slug, concluido) values (?, ?)",
+                    [(str(slug), int(bool(concluido))) for slug, concluido in status.items()],
+                ),
+            )
+
+        previstos = read_json_file(self.previstos_json_path, "previstos")
+        if isinstance(previstos, dict):
+            self.apply_migration(
+                "previstos_json",
+                lambda connection: connection.executemany(
+                    f"insert into empetur_previstos_atrativos ({', '.join(PREVISTO_FIELDS)}) values (?, ?, ?, ?, ?, ?)",
+                    [
+                        tuple(normalize_previsto_row(str(slug), item or {})[field] for field in PREVISTO_FIELDS)
+                        for slug, rows in previstos.items()
+                        if isinstance(rows, list)
+                        for item in rows
+                    ],
+                ),
+            )
+
+        sync_state = read_json_file(self.sync_state_json_path, "estado de sincronizacao")
+        if isinstance(sync_state, dict):
+            self.apply_migration(
+                "sync_estado_json",
+                lambda connection: self.upsert_sync_state(
+                    connection,
+                    {str(codigo): entry for codigo, entry in sync_state.items() if isinstance(entry, dict)},
+                ),
+            )
+
+    def import_base_csv(self, connection: sqlite3.Connection) -> None:
+        with self.base_csv_path.open("r", encoding="utf-8-sig", newline="") as f:
+            rows = [normalize_base_row(row) for row in csv.DictReader(f)]
+        # A base gerada pela CLI nao traz codigo_pesquisa; ele vem do mapa de formularios do iPesquisa.
+        for row in rows:
+            if not row["codigo_pesquisa"]:
+                codigo_pesquisa = self.form_map.get(normalize_questionario_name(row["questionario_preenchido"]))
+                row["codigo_pesquisa"] = "" if codigo_pesquisa is None else str(codigo_pesquisa)
+        skipped = [row for row in rows if not row["codigo_pesquisa"]]
+        if skipped:
+            LOGGER.warning(
+                "%s de %s linhas de %s ficaram fora da importacao por falta de codigo_pesquisa (questionarios: %s). "
+                "Configure IPESQUISA_FORM_MAP com esses questionarios e sincronize para carrega-las.",
+                len(skipped),
+                len(rows),
+                self.base_csv_path,
+                ", ".join(sorted({row["questionario_preenchido"] for row in skipped})),
+            )
+        self.upsert_base_rows(connection, [row for row in rows if row["codigo_pesquisa"]])
+
+    def read_municipios_status_sync(self) -> dict[str, bool]:
+        with self.connect() as connection:
+            return {
+                slug: bool(concluido)
+                for slug, concluido in connection.execute(
+                    "select municipio_slug, concluido from empetur_municipios_status order by municipio_slug"
+                )
+            }
+
+    def write_municipio_status_sync(self, municipio_slug: str, concluido: bool) -> dict[str, bool]:
+        with self.transaction() as connection:
+            connection.execute(
+                """
+                insert into empetur_municipios_status (municipio_slug, concluido) values (?, ?)
+                on conflict (municipio_slug) do update
+                set concluido = excluded.concluido, updated_at = current_timestamp
+                """,
+                (municipio_slug, int(concluido)),
+            )
+        return self.read_municipios_status_sync()
+
+    async def read_municipios_status(self) -> dict[str, bool]:
+        return await self.run(self.read_municipios_status_sync)
+
+    async def write_municipio_status(self, municipio_slug: str, concluido: bool) -> dict[str, bool]:
+        return await self.run(self.write_municipio_status_sync, municipio_slug, concluido)
+
+    def read_base_rows_page_sync(self, after_id: int) -> tuple[list[dict[str, str]], int]:
+        with self.connect() as connection:
+            records = connection.execute(
+                f"select id, {BASE_COLUMNS} from empetur_tabela_base where id > ? order by id limit ?",
+                (after_id, self.page_size),
+            ).fetchall()
+        if not records:
+            return [], after_id
+        return [dict(zip(BASE_FIELDNAMES, record[1:])) for record in records], records[-1][0]
+
+    async def iter_base_row_pages(self) -> AsyncIterator[list[dict[str, str]]]:
+        after_id = 0
+        while True:
+            page, after_id = await self.run_base(self.read_base_rows_page_sync, after_id)
+            if not page:
+                return
+            yield page
+            if len(page) < self.page_size:
+                return
+
+    async def read_base_rows(self) -> list[dict[str, str]]:
+        rows: list[dict[str, str]] = []
+        async for page in self.iter_base_row_pages():
+            rows.extend(page)
+        return rows
+
+    def upsert_base_rows(self, connection: sqlite3.Connection, rows: list[dict[str, str]]) -> None:
+        connection.executemany(
+            f"""
+            insert into empetur_tabela_base ({BASE_COLUMNS}, chave_registro) values ({BASE_PLACEHOLDERS}, ?)
+            on conflict (codigo_pesquisa, chave_registro) do update
+            set {BASE_UPDATES}, updated_at = current_timestamp
+            """,
+            [(*(row[field] for field in BASE_FIELDNAMES), base_row_key(row)[1]) for row in rows],
+        )
+
+    def persist_form_sync(self, codigo_pesquisa: str, rows: list[dict[str, Any]], partial: bool) -> dict[str, int]:
+        incoming: dict[str, dict[str, str]] = {}
+        for row in rows:
+            normalized = normalize_base_row(row)
+            incoming[base_row_key(normalized)[1]] = normalized
+
+        with self.transaction() as connection:
+            stored = {
+                record[-1]: base_row_fingerprint(dict(zip(BASE_FIELDNAMES, record)))
+                for record in connection.execute(
+                    f"select {BASE_COLUMNS}, chave_registro from empetur_tabela_base where codigo_pesquisa = ?",
+                    (codigo_pesquisa,),
+                )
+            }
+            inserted = [row for key, row in incoming.items() if key not in stored]
+            updated = [
+                row for key, row in incoming.items() if key in stored and stored[key] != base_row_fingerprint(row)
+            ]
+            removed = [] if partial else [key for key in stored if key not in incoming]
+            self.upsert_base_rows(connection, inserted + updated)
+            connection.executemany(
+                "delete from empetur_tabela_base where codigo_pesquisa = ? and chave_registro = ?",
+                [(codigo_pesquisa, key) for key in removed],
+            )
+        return {
+            "linhas": len(incoming),
+            "inseridos": len(inserted),
+            "atualizados": len(updated),
+            "removidos": len(removed),
+            "inalterados": len(incoming) - len(inserted) - len(updated),
+        }
+
+    def persist_base_rows_sync(
+        self, rows: list[dict[str, Any]], partial_forms: set[int] | None = None, full_forms: set[int] | None = None
+    ) -> dict[str, dict[str, int]]:
+        rows_by_form: dict[str, list[dict[str, Any]]] = {str(codigo): [] for codigo in full_forms or ()}
+        for row in rows:
+            rows_by_form.setdefault(str(row.get("codigo_pesquisa", "")).strip(), []).append(row)
+        return {
+            codigo_pesquisa: self.persist_form_sync(
+                codigo_pesquisa,
+                form_rows,
+                bool(partial_forms) and int(codigo_pesquisa) in partial_forms,
+            )
+            for codigo_pesquisa, form_rows in rows_by_form.items()
+        }
+
+    async def persist_base_rows(
+        self, rows: list[dict[str, Any]], partial_forms: set[int] | None = None, full_forms: set[int] | None = None
+    ) -> dict[str, dict[str, int]]:
+        # Numa carga completa a linha de origem serve de chave para registros sem nro_identificacao; numa janela
+        # incremental ela nao corresponde as linhas ja gravadas, entao esses registros continuam recusados.
+        validate_base_rows(
+            [row for row in rows if int(str(row.get("codigo_pesquisa", "")).strip() or 0) in (partial_forms or ())],
+            "no SQLite local",
+        )
+        return await self.run_base(self.persist_base_rows_sync, rows, partial_forms, full_forms)
+
+    def read_previstos_by_municipio_sync(self, municipio_slug: str) -> list[dict[str, str]]:
+        with self.connect() as connection:
+            records = connection.execute(
+                f"""
+                select {", ".join(PREVISTO_FIELDS)} from empetur_previstos_atrativos
+                where municipio_slug = ?
+                order by categoria, referencia, atrativo
+                """,
+                (municipio_slug,),
+            ).fetchall()
+        return [dict(zip(PREVISTO_FIELDS, record)) for record in records]
+
+    def read_previstos_sync(self) -> list[dict[str, str]]:
+        with self.connect() as connection:
+            records = connection.execute(
+                f"""
+                select {", ".join(PREVISTO_FIELDS)} from empetur_previstos_atrativos
+                order by municipio_slug, categoria, referencia, atrativo, id
+                """
+            ).fetchall()
+        return [dict(zip(PREVISTO_FIELDS, record)) for record in records]
+
+    def read_previstos_summary_sync(self) -> dict[str, Any]:
+        with self.connect() as connection:
+            by_municipio = dict(
+                connection.execute(
+                    """
+                    select municipio_slug, count(*) from empetur_previstos_atrativos
+                    where municipio_slug <> ''
+                    group by municipio_slug
+                    order by municipio_slug
+                    """
+                ).fetchall()
+            )
+        return {
+            "total_previstos": sum(by_municipio.values()),
+            "municipios": by_municipio,
+        }
+
+    def replace_previstos_by_municipio_sync(
+        self, municipio_slug: str, rows: list[dict[str, Any]]
+    ) -> list[dict[str, str]]:
+        normalized_rows = [normalize_previsto_row(municipio_slug, row) for row in rows]
+        with self.transaction() as connection:
+            connection.execute("delete from empetur_previstos_atrativos where municipio_slug = ?", (municipio_slug,))
+            connection.executemany(
+                f"insert into empetur_previstos_atrativos ({', '.join(PREVISTO_FIELDS)}) values (?, ?, ?, ?, ?, ?)",
+                [tuple(row[field] for field in PREVISTO_FIELDS) for row in normalized_rows],
+            )
+        return self.read_previstos_by_municipio_sync(municipio_slug)
+
+    async def read_previstos_by_municipio(self, municipio_slug: str) -> list[dict[str, str]]:
+        return await self.run(self.read_previstos_by_municipio_sync, municipio_slug)
+
+    async def read_previstos(self) -> list[dict[str, str]]:
+        return await self.run(self.read_previstos_sync)
+
+    async def read_previstos_summary(self) -> dict[str, Any]:
+        return await self.run(self.read_previstos_summary_sync)
+
+    async def replace_previstos_by_municipio(
+        self, municipio_slug: str, rows: list[dict[str, Any]]
+    ) -> list[dict[str, str]]:
+        return await self.run(self.replace_previstos_by_municipio_sync, municipio_slug, rows)
+
+    def upsert_sync_state(self, connection: sqlite3.Connection, entries: dict[str, dict[str, str]]) -> None:
+        connection.executemany(
+            f"""
+            insert into empetur_sync_estado (codigo_pesquisa, {", ".join(SYNC_STATE_FIELDS)}) values (?, ?, ?, ?, ?)
+            on conflict (codigo_pesquisa) do update
+            set {", ".join(f"{field} = excluded.{field}" for field in SYNC_STATE_FIELDS)},
+                updated_at = current_timestamp
+            """,
+            [
+                (codigo_pesquisa, *(str(entry.get(field, "") or "") for field in SYNC_STATE_FIELDS))
+                for codigo_pesquisa, entry in entries.items()
+            ],
+        )
+
+    def read_sync_state_sync(self) -> dict[str, dict[str, str]]:
+        with self.connect() as connection:
+            records = connection.execute(
+                f"select codigo_pesquisa, {', '.join(SYNC_STATE_FIELDS)} from empetur_sync_estado"
+            ).fetchall()
+        return {
+            record[0]: {field: str(value or "") for field, value in zip(SYNC_STATE_FIELDS, record[1:])}
+            for record in records
+        }
+
+    def write_sync_state_sync(self, entries: dict[str, dict[str, str]]) -> None:
+        with self.transaction() as connection:
+            self.upsert_sync_state(connection, entries)
+
+    async def read_sync_state(self) -> dict[str, dict[str, str]]:
+        return await self.run(self.read_sync_state_sync)
+
+    async def write_sync_state(self, entries: dict[str, dict[str, str]]) -> None:
+        if entries:
+            await self.run(self.write_sync_state_sync, entries)
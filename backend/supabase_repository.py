@@ -0,0 +1,518 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import re
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import httpx
+from fastapi import HTTPException
+
+from empetur_core.consolidacao import (
+    BASE_FIELDNAMES,
+    TIMESTAMP_FIELDS,
+    base_row_fingerprint,
+    base_row_key,
+    fill_typed_timestamps,
+)
+
+
+SUPABASE_READ_TIMEOUT = 30.0
+SUPABASE_BASE_TIMEOUT = 60.0
+SUPABASE_PAGE_SIZE = 1000
+SUPABASE_MAX_CONCURRENCY = 4
+SUPABASE_UPSERT_BATCH_SIZE = 500
+SUPABASE_DELETE_BATCH_SIZE = 200
+BASE_PERSIST_MODES = {"diff", "replace"}
+BASE_ROWS_CONFLICT_COLUMNS = "codigo_pesquisa,nro_identificacao"
+BASE_ROWS_ORDER = (
+    "data_inicio_coleta_ts.asc.nullslast,questionario_preenchido.asc,nro_identificacao.asc,codigo_pesquisa.asc"
+)
+CONTENT_RANGE_PATTERN = re.compile(r"^(?:\d+-\d+|\*)/(\d+|\*)$")
+
+
+def normalize_base_row(row: dict[str, Any]) -> dict[str, str]:
+    normalized: dict[str, str] = {}
+    for field in BASE_FIELDNAMES:
+        normalized[field] = str(row.get(field, "") or "").strip()
+    return fill_typed_timestamps(normalized)
+
+
+def to_supabase_base_row(row: dict[str, str]) -> dict[str, str | None]:
+    # Colunas timestamptz nao aceitam texto vazio.
+    return {**row, **{field: row[field] or None for field in TIMESTAMP_FIELDS}}
+
+
+def validate_base_rows(rows: list[dict[str, Any]], destino: str = "no Supabase") -> None:
+    missing_identifiers = [
+        row
+        for row in rows
+        if not str(row.get("codigo_pesquisa", "") or "").strip()
+        or not str(row.get("nro_identificacao", "") or "").strip()
+    ]
+    if missing_identifiers:
+        sample = missing_identifiers[0]
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Nao foi possivel persistir a base consolidada {destino} porque ha registros sem "
+                "'codigo_pesquisa' ou 'nro_identificacao'. "
+                f"Exemplo: questionario='{sample.get('questionario_preenchido', '')}', "
+                f"municipio='{sample.get('municipio', '')}', atrativo='{sample.get('nome_atrativo', '')}'."
+            ),
+        )
+
+
+def normalize_previsto_row(municipio_slug: str, row: dict[str, Any]) -> dict[str, str]:
+    return {
+        "municipio_slug": municipio_slug,
+        "regiao": str(row.get("regiao", "") or "").strip(),
+        "municipio": str(row.get("municipio", "") or "").strip(),
+        "categoria": str(row.get("categoria", "") or "").strip(),
+        "referencia": str(row.get("referencia", "") or "").strip(),
+        "atrativo": str(row.get("atrativo", "") or "").strip(),
+    }
+
+
+def quote_filter_value(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def iter_batches(items: list[Any], size: int) -> Iterator[list[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def parse_content_range_total(value: str | None) -> int | None:
+    match = CONTENT_RANGE_PATTERN.match(str(value or "").strip())
+    if match is None or match.group(1) == "*":
+        return None
+    return int(match.group(1))
+
+
+def build_supabase_client(http2: bool = False, max_connections: int = 20) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=SUPABASE_BASE_TIMEOUT,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        http2=http2 and importlib.util.find_spec("h2") is not None,
+    )
+
+
+class SupabaseRepository:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        base_url: str,
+        service_role_key: str,
+        schema: str,
+        table_status: str,
+        table_base: str,
+        table_previstos: str,
+        table_sync_state: str = "empetur_sync_estado",
+        page_size: int = SUPABASE_PAGE_SIZE,
+        max_concurrency: int = SUPABASE_MAX_CONCURRENCY,
+        persist_mode: str = "diff",
+        upsert_batch_size: int = SUPABASE_UPSERT_BATCH_SIZE,
+    ) -> None:
+        self.client = client
+        self.base_url = base_url
+        self.service_role_key = service_role_key
+        self.schema = schema
+        self.table_status = table_status
+        self.table_base = table_base
+        self.table_previstos = table_previstos
+        self.table_sync_state = table_sync_state
+        self.page_size = max(page_size, 1)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.persist_mode = persist_mode if persist_mode in BASE_PERSIST_MODES else "diff"
+        self.upsert_batch_size = max(upsert_batch_size, 1)
+
+    def build_headers(self, write: bool = False) -> dict[str, str]:
+        headers = {
+            "apikey": self.service_role_key,
+            "Authorization": f"Bearer {self.service_role_key}",
+            "Accept": "application/json",
+            "Accept-Profile": self.schema,
+        }
+        if write:
+            headers["Content-Type"] = "application/json"
+            headers["Prefer"] = "resolution=merge-duplicates,return=representation"
+            headers["Content-Profile"] = self.schema
+        return headers
+
+    def table_url(self, table: str) -> str:
+        return f"{self.base_url}/rest/v1/{table}"
+
+    async def request(
+        self,
+        method: str,
+        table: str,
+        error_detail: str,
+        write: bool = False,
+        timeout: float = SUPABASE_READ_TIMEOUT,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        response = await self.client.request(
+            method,
+            self.table_url(table),
+            headers={**self.build_headers(write=write), **(headers or {})},
+            timeout=timeout,
+            **kwargs,
+        )
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            raise HTTPException(
+                status_code=502,
+                detail=f"{error_detail}: {exc.response.status_code}",
+            ) from exc
+        return response
+
+    async def read_municipios_status(self) -> dict[str, bool]:
+        response = await self.request(
+            "GET",
+            self.table_status,
+            "Falha ao ler status de municipios no Supabase",
+            params={"select": "municipio_slug,concluido"},
+        )
+        data = response.json()
+        if not isinstance(data, list):
+            return {}
+
+        return {
+            str(item.get("municipio_slug", "")): bool(item.get("concluido"))
+            for item in data
+            if item.get("municipio_slug")
+        }
+
+    async def write_municipio_status(self, municipio_slug: str, concluido: bool) -> dict[str, bool]:
+        await self.request(
+            "POST",
+            self.table_status,
+            "Falha ao gravar status de municipios no Supabase",
+            write=True,
+            params={"on_conflict": "municipio_slug"},
+            json=[{"municipio_slug": municipio_slug, "concluido": concluido}],
+        )
+        return await self.read_municipios_status()
+
+    async def read_base_rows_page(
+        self, start: int, count: bool = False, filters: dict[str, str] | None = None
+    ) -> tuple[list[dict[str, str]], int | None]:
+        headers = {"Range-Unit": "items", "Range": f"{start}-{start + self.page_size - 1}"}
+        if count:
+            headers["Prefer"] = "count=exact"
+        response = await self.request(
+            "GET",
+            self.table_base,
+            "Falha ao ler base consolidada no Supabase",
+            timeout=SUPABASE_BASE_TIMEOUT,
+            headers=headers,
+            params={"select": ",".join(BASE_FIELDNAMES), "order": BASE_ROWS_ORDER, **(filters or {})},
+        )
+        data = response.json()
+        rows = [normalize_base_row(item or {}) for item in data] if isinstance(data, list) else []
+        return rows, parse_content_range_total(response.headers.get("Content-Range"))
+
+    async def iter_base_row_pages(
+        self, filters: dict[str, str] | None = None
+    ) -> AsyncIterator[list[dict[str, str]]]:
+        first_page, total = await self.read_base_rows_page(0, count=True, filters=filters)
+        if first_page:
+            yield first_page
+        if total is None:
+            start = len(first_page)
+            page = first_page
+            while len(page) >= self.page_size:
+                page, _ = await self.read_base_rows_page(start, filters=filters)
+                start += len(page)
+                if page:
+                    yield page
+            return
+        if not first_page or len(first_page) >= total:
+            return
+
+        step = min(len(first_page), self.page_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def read_page(start: int) -> list[dict[str, str]]:
+            async with semaphore:
+                rows, _ = await self.read_base_rows_page(start, filters=filters)
+                return rows
+
+        tasks = [asyncio.create_task(read_page(start)) for start in range(step, total, step)]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def read_base_rows(self, filters: dict[str, str] | None = None) -> list[dict[str, str]]:
+        rows: list[dict[str, str]] = []
+        async for page in self.iter_base_row_pages(filters):
+            rows.extend(page)
+        return rows
+
+    async def replace_base_rows_for_form(self, codigo_pesquisa: int, rows: list[dict[str, Any]]) -> dict[str, int]:
+        response = await self.request(
+            "DELETE",
+            self.table_base,
+            (
+                f"Falha ao limpar registros anteriores do questionario {codigo_pesquisa} "
+                "na base consolidada do Supabase"
+            ),
+            timeout=SUPABASE_BASE_TIMEOUT,
+            headers={"Prefer": "count=exact,return=minimal"},
+            params={"codigo_pesquisa": f"eq.{codigo_pesquisa}"},
+        )
+        removed = parse_content_range_total(response.headers.get("Content-Range")) or 0
+
+        normalized_rows = [normalize_base_row(row) for row in rows]
+        if normalized_rows:
+            await self.request(
+                "POST",
+                self.table_base,
+                f"Falha ao gravar registros do questionario {codigo_pesquisa} na base consolidada do Supabase",
+                write=True,
+                timeout=SUPABASE_BASE_TIMEOUT,
+                json=[to_supabase_base_row(row) for row in normalized_rows],
+            )
+        return {
+            "linhas": len(normalized_rows),
+            "inseridos": len(normalized_rows),
+            "atualizados": 0,
+            "removidos": removed,
+            "inalterados": 0,
+        }
+
+    async def upsert_base_rows(self, codigo_pesquisa: int, rows: list[dict[str, str]]) -> None:
+        for batch in iter_batches(rows, self.upsert_batch_size):
+            await self.request(
+                "POST",
+                self.table_base,
+                f"Falha ao gravar registros do questionario {codigo_pesquisa} na base consolidada do Supabase",
+                write=True,
+                timeout=SUPABASE_BASE_TIMEOUT,
+                headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+                params={"on_conflict": BASE_ROWS_CONFLICT_COLUMNS},
+                json=[to_supabase_base_row(row) for row in batch],
+            )
+
+    async def delete_base_rows(self, codigo_pesquisa: int, nro_identificacoes: list[str]) -> None:
+        for batch in iter_batches(nro_identificacoes, SUPABASE_DELETE_BATCH_SIZE):
+            await self.request(
+                "DELETE",
+                self.table_base,
+                (
+                    f"Falha ao remover registros do questionario {codigo_pesquisa} "
+                    "que sairam da base consolidada do Supabase"
+                ),
+                timeout=SUPABASE_BASE_TIMEOUT,
+                params={
+                    "codigo_pesquisa": f"eq.{codigo_pesquisa}",
+                    "nro_identificacao": f"in.({','.join(quote_filter_value(nro) for nro in batch)})",
+                },
+            )
+
+    async def read_base_row_fingerprints(
+        self, codigo_pesquisa: int, nro_identificacoes: list[str] | None = None
+    ) -> dict[tuple[str, str], str]:
+        filters = {"codigo_pesquisa": f"eq.{codigo_pesquisa}"}
+        if nro_identificacoes is None:
+            return {base_row_key(row): base_row_fingerprint(row) for row in await self.read_base_rows(filters)}
+
+        fingerprints: dict[tuple[str, str], str] = {}
+        for batch in iter_batches(nro_identificacoes, SUPABASE_DELETE_BATCH_SIZE):
+            batch_filters = {
+                **filters,
+                "nro_identificacao": f"in.({','.join(quote_filter_value(nro) for nro in batch)})",
+            }
+            for row in await self.read_base_rows(batch_filters):
+                fingerprints[base_row_key(row)] = base_row_fingerprint(row)
+        return fingerprints
+
+    async def sync_base_rows_for_form(
+        self, codigo_pesquisa: int, rows: list[dict[str, Any]], partial: bool = False
+    ) -> dict[str, int]:
+        incoming: dict[tuple[str, str], dict[str, str]] = {}
+        for row in rows:
+            normalized = normalize_base_row(row)
+            incoming[base_row_key(normalized)] = normalized
+
+        stored = await self.read_base_row_fingerprints(
+            codigo_pesquisa, [key[1] for key in incoming] if partial else None
+        )
+
+        inserted: list[dict[str, str]] = []
+        updated: list[dict[str, str]] = []
+        for key, row in incoming.items():
+            fingerprint = stored.get(key)
+            if fingerprint is None:
+                inserted.append(row)
+            elif fingerprint != base_row_fingerprint(row):
+                updated.append(row)
+        removed = [] if partial else [key[1] for key in stored if key not in incoming]
+
+        await self.upsert_base_rows(codigo_pesquisa, inserted + updated)
+        await self.delete_base_rows(codigo_pesquisa, removed)
+        return {
+            "linhas": len(incoming),
+            "inseridos": len(inserted),
+            "atualizados": len(updated),
+            "removidos": len(removed),
+            "inalterados": len(incoming) - len(inserted) - len(updated),
+        }
+
+    async def persist_base_rows(
+        self, rows: list[dict[str, Any]], partial_forms: set[int] | None = None, full_forms: set[int] | None = None
+    ) -> dict[str, dict[str, int]]:
+        validate_base_rows(rows)
+        # Questionarios de carga completa sem nenhuma linha tambem sao substituidos, ficando vazios na base.
+        rows_by_form: dict[int, list[dict[str, Any]]] = {codigo: [] for codigo in full_forms or ()}
+        for row in rows:
+            codigo = int(str(row.get("codigo_pesquisa", "")).strip())
+            rows_by_form.setdefault(codigo, []).append(row)
+
+        persist_form = self.sync_base_rows_for_form if self.persist_mode == "diff" else self.replace_base_rows_for_form
+        persisted_by_form: dict[str, dict[str, int]] = {}
+        for codigo_pesquisa, form_rows in rows_by_form.items():
+            if partial_forms and codigo_pesquisa in partial_forms:
+                persisted_by_form[str(codigo_pesquisa)] = await self.sync_base_rows_for_form(
+                    codigo_pesquisa, form_rows, partial=True
+                )
+            else:
+                persisted_by_form[str(codigo_pesquisa)] = await persist_form(codigo_pesquisa, form_rows)
+        return persisted_by_form
+
+    async def read_sync_state(self) -> dict[str, dict[str, str]]:
+        response = await self.request(
+            "GET",
+            self.table_sync_state,
+            "Falha ao ler estado de sincronizacao no Supabase",
+            params={
+                "select": "codigo_pesquisa,ultima_sincronizacao,ultima_carga_completa,sync_run_id,hash_conteudo"
+            },
+        )
+        data = response.json()
+        if not isinstance(data, list):
+            return {}
+        return {
+            str(item.get("codigo_pesquisa", "")): {
+                "ultima_sincronizacao": str(item.get("ultima_sincronizacao") or ""),
+                "ultima_carga_completa": str(item.get("ultima_carga_completa") or ""),
+                "sync_run_id": str(item.get("sync_run_id") or ""),
+                "hash_conteudo": str(item.get("hash_conteudo") or ""),
+            }
+            for item in data
+            if item.get("codigo_pesquisa")
+        }
+
+    async def write_sync_state(self, entries: dict[str, dict[str, str]]) -> None:
+        if not entries:
+            return
+        await self.request(
+            "POST",
+            self.table_sync_state,
+            "Falha ao gravar estado de sincronizacao no Supabase",
+            write=True,
+            headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+            params={"on_conflict": "codigo_pesquisa"},
+            json=[
+                {
+                    "codigo_pesquisa": codigo_pesquisa,
+                    "ultima_sincronizacao": entry["ultima_sincronizacao"],
+                    "ultima_carga_completa": entry.get("ultima_carga_completa") or None,
+                    "sync_run_id": entry.get("sync_run_id", ""),
+                    "hash_conteudo": entry.get("hash_conteudo", ""),
+                }
+                for codigo_pesquisa, entry in entries.items()
+            ],
+        )
+
+    async def read_previstos_by_municipio(self, municipio_slug: str) -> list[dict[str, str]]:
+        response = await self.request(
+            "GET",
+            self.table_previstos,
+            "Falha ao ler previstos no Supabase",
+            params={
+                "select": "municipio_slug,regiao,municipio,categoria,referencia,atrativo",
+                "municipio_slug": f"eq.{municipio_slug}",
+                "order": "categoria.asc,referencia.asc,atrativo.asc",
+            },
+        )
+        data = response.json()
+        if not isinstance(data, list):
+            return []
+        return [normalize_previsto_row(municipio_slug, item or {}) for item in data]
+
+    async def read_previstos(self) -> list[dict[str, str]]:
+        rows: list[dict[str, str]] = []
+        while True:
+            response = await self.request(
+                "GET",
+                self.table_previstos,
+                "Falha ao ler previstos no Supabase",
+                headers={"Range-Unit": "items", "Range": f"{len(rows)}-{len(rows) + self.page_size - 1}"},
+                params={
+                    "select": "municipio_slug,regiao,municipio,categoria,referencia,atrativo",
+                    "order": "municipio_slug.asc,categoria.asc,referencia.asc,atrativo.asc,id.asc",
+                },
+            )
+            data = response.json()
+            page = data if isinstance(data, list) else []
+            rows.extend(
+                normalize_previsto_row(str((item or {}).get("municipio_slug", "")).strip(), item or {})
+                for item in page
+            )
+            if len(page) < self.page_size:
+                return rows
+
+    async def read_previstos_summary(self) -> dict[str, Any]:
+        response = await self.request(
+            "GET",
+            self.table_previstos,
+            "Falha ao ler resumo de previstos no Supabase",
+            params={"select": "municipio_slug"},
+        )
+        data = response.json()
+        if not isinstance(data, list):
+            return {"total_previstos": 0, "municipios": {}}
+
+        by_municipio: dict[str, int] = {}
+        for item in data:
+            municipio_slug = str((item or {}).get("municipio_slug", "")).strip()
+            if not municipio_slug:
+                continue
+            by_municipio[municipio_slug] = by_municipio.get(municipio_slug, 0) + 1
+
+        return {
+            "total_previstos": sum(by_municipio.values()),
+            "municipios": by_municipio,
+        }
+
+    async def replace_previstos_by_municipio(
+        self, municipio_slug: str, rows: list[dict[str, Any]]
+    ) -> list[dict[str, str]]:
+        await self.request(
+            "DELETE",
+            self.table_previstos,
+            "Falha ao limpar previstos no Supabase",
+            params={"municipio_slug": f"eq.{municipio_slug}"},
+        )
+
+        normalized_rows = [normalize_previsto_row(municipio_slug, row) for row in rows]
+        if normalized_rows:
+            await self.request(
+                "POST",
+                self.table_previstos,
+                "Falha ao gravar previstos no Supabase",
+                write=True,
+                json=normalized_rows,
+            )
+
+        return await self.read_previstos_by_municipio(municipio_slug)
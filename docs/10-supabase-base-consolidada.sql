@@ -16,11 +16,41 @@ create table if not exists public.empetur_tabela_base (
   data_execucao_carga text not null default '',
   data_hora_execucao_carga text not null default '',
   sync_run_id text not null default '',
+  data_inicio_coleta_ts timestamptz,
+  data_fim_coleta_ts timestamptz,
+  data_hora_execucao_carga_ts timestamptz,
   created_at timestamptz not null default now(),
   updated_at timestamptz not null default now(),
   constraint uq_empetur_tabela_base_origem unique (codigo_pesquisa, nro_identificacao)
 );
 
+alter table public.empetur_tabela_base add column if not exists data_inicio_coleta_ts timestamptz;
+alter table public.empetur_tabela_base add column if not exists data_fim_coleta_ts timestamptz;
+alter table public.empetur_tabela_base add column if not exists data_hora_execucao_carga_ts timestamptz;
+
+create or replace function public.parse_empetur_data_br(value text)
+returns timestamptz
+language sql
+stable
+as $$
+  select case
+    when value ~ '^\d{2}/\d{2}/\d{4}( \d{2}:\d{2}(:\d{2})?)?$'
+    then to_timestamp(
+      case length(value) when 10 then value || ' 00:00:00' when 16 then value || ':00' else value end,
+      'DD/MM/YYYY HH24:MI:SS'
+    )::timestamp at time zone 'America/Recife'
+  end;
+$$;
+
+update public.empetur_tabela_base
+set
+  data_inicio_coleta_ts = public.parse_empetur_data_br(data_inicio_coleta),
+  data_fim_coleta_ts = public.parse_empetur_data_br(data_fim_coleta),
+  data_hora_execucao_carga_ts = public.parse_empetur_data_br(data_hora_execucao_carga)
+where data_inicio_coleta_ts is null
+  and data_fim_coleta_ts is null
+  and data_hora_execucao_carga_ts is null;
+
 create or replace function public.set_empetur_tabela_base_updated_at()
 returns trigger
 language plpgsql
@@ -46,3 +76,14 @@ on public.empetur_tabela_base (municipio);
 
 create index if not exists idx_empetur_tabela_base_questionario
 on public.empetur_tabela_base (questionario_preenchido);
+
+drop index if exists public.idx_empetur_tabela_base_leitura_paginada;
+
+create index if not exists idx_empetur_tabela_base_leitura_paginada_ts
+on public.empetur_tabela_base (data_inicio_coleta_ts, questionario_preenchido, nro_identificacao, codigo_pesquisa);
+
+create index if not exists idx_empetur_tabela_base_municipio_data_inicio
+on public.empetur_tabela_base (municipio, data_inicio_coleta_ts);
+
+create index if not exists idx_empetur_tabela_base_data_fim
+on public.empetur_tabela_base (data_fim_coleta_ts);
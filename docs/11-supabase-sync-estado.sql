@@ -0,0 +1,28 @@
+create table if not exists public.empetur_sync_estado (
+  codigo_pesquisa text primary key,
+  ultima_sincronizacao timestamptz not null,
+  ultima_carga_completa timestamptz,
+  sync_run_id text not null default '',
+  hash_conteudo text not null default '',
+  updated_at timestamptz not null default now()
+);
+
+alter table public.empetur_sync_estado
+add column if not exists hash_conteudo text not null default '';
+
+create or replace function public.set_empetur_sync_estado_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at = now();
+  return new;
+end;
+$$;
+
+drop trigger if exists trg_empetur_sync_estado_updated_at on public.empetur_sync_estado;
+
+create trigger trg_empetur_sync_estado_updated_at
+before update on public.empetur_sync_estado
+for each row
+execute function public.set_empetur_sync_estado_updated_at();
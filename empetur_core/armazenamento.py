@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+
+from empetur_core.consolidacao import BASE_FIELDNAMES
+
+
+DICTIONARY_FIELDS = (
+    "arquivo_origem",
+    "codigo_pesquisa",
+    "questionario_preenchido",
+    "municipio",
+    "categoria",
+    "pesquisador_informado",
+    "pesquisador_sistema",
+    "pesquisador",
+    "data_execucao_carga",
+    "data_hora_execucao_carga",
+    "sync_run_id",
+    "data_hora_execucao_carga_ts",
+)
+NUMERIC_TEXT_FIELDS = ("nro_identificacao", "linha_origem")
+
+
+class DictionaryColumn:
+    __slots__ = ("values", "lookup", "codes")
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.lookup: dict[str, int] = {}
+        self.codes = array("B")
+
+    def append(self, value: str) -> None:
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            if code >= 1 << (8 * self.codes.itemsize):
+                self.codes = array("H" if self.codes.typecode == "B" else "I", self.codes)
+            value = sys.intern(value)
+            self.values.append(value)
+            self.lookup[value] = code
+        self.codes.append(code)
+
+    def __getitem__(self, idx: int) -> str:
+        return self.values[self.codes[idx]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (values[code] for code in self.codes)
+
+
+class NumericTextColumn:
+    __slots__ = ("numbers", "texts")
+
+    def __init__(self) -> None:
+        self.numbers: array | None = array("q")
+        self.texts: list[str] | None = None
+
+    def append(self, value: str) -> None:
+        if self.numbers is not None:
+            if value.isascii() and value.isdigit() and (value == "0" or not value.startswith("0")) and len(value) < 19:
+                self.numbers.append(int(value))
+                return
+            self.texts = [str(number) for number in self.numbers]
+            self.numbers = None
+        self.texts.append(value)
+
+    def __getitem__(self, idx: int) -> str:
+        if self.numbers is not None:
+            return str(self.numbers[idx])
+        return self.texts[idx]
+
+    def __len__(self) -> int:
+        return len(self.numbers) if self.numbers is not None else len(self.texts)
+
+    def __iter__(self) -> Iterator[str]:
+        if self.numbers is not None:
+            return (str(number) for number in self.numbers)
+        return iter(self.texts)
+
+
+def build_column(field: str) -> DictionaryColumn | NumericTextColumn | list[str]:
+    if field in DICTIONARY_FIELDS:
+        return DictionaryColumn()
+    if field in NUMERIC_TEXT_FIELDS:
+        return NumericTextColumn()
+    return []
+
+
+class RowView(Mapping):
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: BaseRowStore, index: int) -> None:
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str) -> str:
+        return self._store.columns[key][self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.fieldnames)
+
+    def __len__(self) -> int:
+        return len(self._store.fieldnames)
+
+    def __repr__(self) -> str:
+        return f"RowView({dict(self)!r})"
+
+
+class BaseRowStore:
+    __slots__ = ("fieldnames", "columns", "size")
+
+    def __init__(self, rows: Iterable[Mapping[str, str]] = (), fieldnames: list[str] | None = None) -> None:
+        self.fieldnames = list(fieldnames or BASE_FIELDNAMES)
+        self.columns = {field: build_column(field) for field in self.fieldnames}
+        self.size = 0
+        self.extend(rows)
+
+    def append(self, row: Mapping[str, str]) -> None:
+        for field, column in self.columns.items():
+            column.append(str(row.get(field, "") or ""))
+        self.size += 1
+
+    def extend(self, rows: Iterable[Mapping[str, str]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> RowView:
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("Indice fora da base consolidada")
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        return (RowView(self, index) for index in range(self.size))
+
+    def column(self, field: str) -> Iterable[str]:
+        return self.columns[field]
+
+    def to_dicts(self) -> list[dict[str, str]]:
+        fields = self.fieldnames
+        columns = [self.columns[field] for field in fields]
+        return [dict(zip(fields, values)) for values in zip(*columns)] if fields else []
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from empetur_core.consolidacao import base_row_key
+from empetur_core.indices import count_bitsets, count_equals, ids_to_bitset, iter_bitset
+from empetur_core.normalizacao import NORMALIZATION_CACHE_SIZE, normalize_for_match_cached
+
+
+SEARCH_FIELD = "nome_atrativo"
+SEARCH_MIN_SIMILARITY = 0.4
+SEARCH_MAX_KEYS = 20
+WORD_PATTERN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def word_trigrams(word: str) -> frozenset[str]:
+    padded = f"  {word} "
+    return frozenset(padded[idx : idx + 3] for idx in range(len(padded) - 2))
+
+
+def build_trigrams(value: str) -> set[str]:
+    return set().union(*map(word_trigrams, WORD_PATTERN.findall(normalize_for_match_cached(value))))
+
+
+def group_bitsets(values: list[str]) -> dict[str, int]:
+    ids_by_value: dict[str, list[int]] = {}
+    for entry_id, value in enumerate(values):
+        ids_by_value.setdefault(value, []).append(entry_id)
+    return {value: ids_to_bitset(ids, len(values)) for value, ids in ids_by_value.items()}
+
+
+@dataclass
+class SearchEntry:
+    nome_atrativo: str
+    municipio: str
+    categoria: str
+    questionario_preenchido: str
+    gram_count: int = 0
+    keys: list[tuple[str, str]] = field(default_factory=list)
+
+
+class FormSearchIndex:
+    __slots__ = ("entries", "all_entries", "gram_bitsets", "municipio_bitsets", "categoria_bitsets")
+
+    def __init__(self, rows: Iterable[Mapping[str, str]]) -> None:
+        grouped: dict[tuple[str, str, str], tuple[SearchEntry, set[str]]] = {}
+        for row in rows:
+            name = row[SEARCH_FIELD]
+            entry_key = (normalize_for_match_cached(name), row["municipio"], row["categoria"])
+            item = grouped.get(entry_key)
+            if item is None:
+                grams = build_trigrams(name)
+                if not grams:
+                    continue
+                entry = SearchEntry(name, row["municipio"], row["categoria"], row["questionario_preenchido"], len(grams))
+                item = grouped[entry_key] = (entry, grams)
+            item[0].keys.append(base_row_key(row))
+
+        ordered = sorted(grouped.items(), key=lambda item: (item[1][0].gram_count, item[0]))
+        self.entries = [entry for _, (entry, _) in ordered]
+        ids_by_gram: dict[str, list[int]] = {}
+        for entry_id, (_, (_, grams)) in enumerate(ordered):
+            for gram in grams:
+                ids_by_gram.setdefault(gram, []).append(entry_id)
+        size = len(self.entries)
+        self.all_entries = (1 << size) - 1
+        self.gram_bitsets = {gram: ids_to_bitset(ids, size) for gram, ids in ids_by_gram.items()}
+        self.municipio_bitsets = group_bitsets([entry.municipio for entry in self.entries])
+        self.categoria_bitsets = group_bitsets([entry.categoria for entry in self.entries])
+
+    def search(
+        self,
+        grams: set[str],
+        min_similarity: float,
+        municipios: set[str],
+        categorias: set[str],
+        limit: int,
+    ) -> tuple[int, list[tuple[float, float, SearchEntry]]]:
+        candidates = self.all_entries
+        for selected_values, bitsets in ((municipios, self.municipio_bitsets), (categorias, self.categoria_bitsets)):
+            if selected_values:
+                selected = 0
+                for value in selected_values:
+                    selected |= bitsets.get(value, 0)
+                candidates &= selected
+        if not candidates:
+            return 0, []
+
+        counters = count_bitsets(self.gram_bitsets.get(gram, 0) & candidates for gram in grams)
+        total = 0
+        matches: list[tuple[float, float, SearchEntry]] = []
+        query_size = len(grams)
+        required = max(math.ceil(min_similarity * query_size), 1)
+        for shared in range(query_size, required - 1, -1):
+            mask = count_equals(counters, shared, candidates)
+            if not mask:
+                continue
+            total += mask.bit_count()
+            if len(matches) >= limit:
+                continue
+            # O nivel e coletado inteiro: o desempate (jaccard, registros, nome) fica so na ordenacao global.
+            for entry_id in iter_bitset(mask):
+                entry = self.entries[entry_id]
+                matches.append(
+                    (shared / query_size, shared / (query_size + entry.gram_count - shared), entry)
+                )
+        return total, matches
+
+
+class AtrativoSearchIndex:
+    def __init__(self) -> None:
+        self.forms: dict[str, FormSearchIndex] = {}
+
+    @classmethod
+    def from_forms(cls, rows_by_form: Mapping[str, Iterable[Mapping[str, str]]]) -> AtrativoSearchIndex:
+        index = cls()
+        for codigo_pesquisa, rows in rows_by_form.items():
+            index.replace_form(codigo_pesquisa, rows)
+        return index
+
+    def replace_form(self, codigo_pesquisa: str, rows: Iterable[Mapping[str, str]]) -> None:
+        self.forms[codigo_pesquisa] = FormSearchIndex(rows)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        min_similarity: float = SEARCH_MIN_SIMILARITY,
+        municipios: Iterable[str] = (),
+        categorias: Iterable[str] = (),
+    ) -> tuple[int, list[dict[str, object]]]:
+        grams = build_trigrams(query)
+        if not grams:
+            return 0, []
+        municipio_set = set(municipios)
+        categoria_set = set(categorias)
+        total = 0
+        matches: list[tuple[float, float, SearchEntry]] = []
+        for form_index in list(self.forms.values()):
+            form_total, form_matches = form_index.search(grams, min_similarity, municipio_set, categoria_set, limit)
+            total += form_total
+            matches.extend(form_matches)
+        matches.sort(key=lambda item: (-item[0], -item[1], -len(item[2].keys), item[2].nome_atrativo))
+        return total, [
+            {
+                "nome_atrativo": entry.nome_atrativo,
+                "municipio": entry.municipio,
+                "categoria": entry.categoria,
+                "questionario_preenchido": entry.questionario_preenchido,
+                "similaridade": round(similarity, 4),
+                "similaridade_jaccard": round(jaccard, 4),
+                "total": len(entry.keys),
+                "registros": [list(key) for key in entry.keys[:SEARCH_MAX_KEYS]],
+            }
+            for similarity, jaccard, entry in matches[:limit]
+        ]
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import array
+import base64
+import gzip
+import hashlib
+import json
+import os
+import sys
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path
+
+from empetur_core import consolidacao, datas, normalizacao
+from empetur_core.consolidacao import BASE_FIELDNAMES, RULES_BY_QUESTIONARIO
+from empetur_core.datas import br_to_iso_timestamp
+
+
+CACHE_FORMAT_VERSION = 1
+CODE_TYPECODE = "I"
+CACHE_SUFFIX = ".json.gz"
+CACHE_GZIP_LEVEL = 6
+EXEC_FIELDS = ("data_execucao_carga", "data_hora_execucao_carga", "data_hora_execucao_carga_ts")
+CACHED_FIELDS = [field for field in BASE_FIELDNAMES if field not in EXEC_FIELDS]
+
+
+@lru_cache(maxsize=1)
+def consolidation_version() -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(CACHE_FORMAT_VERSION).encode("ascii"))
+    for questionario, rule in sorted(RULES_BY_QUESTIONARIO.items()):
+        digest.update(repr((questionario, rule)).encode("utf-8"))
+    for module in (consolidacao, normalizacao, datas):
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def build_cache_key(file_name: str, content_hash: str) -> str:
+    content = "\x1f".join((file_name, content_hash, consolidation_version()))
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cache_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / f"{key}{CACHE_SUFFIX}"
+
+
+def read_cached_rows(
+    cache_dir: Path, key: str, exec_date: str, exec_timestamp: str
+) -> list[dict[str, str]] | None:
+    path = cache_path(cache_dir, key)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, EOFError, ValueError):
+        return None
+    if (
+        not isinstance(raw, dict)
+        or raw.get("campos") != CACHED_FIELDS
+        or raw.get("tamanho_codigo") != array.array(CODE_TYPECODE).itemsize
+    ):
+        return None
+
+    values: list[str] = raw.get("valores") or []
+    encoded_columns = raw.get("colunas")
+    if not isinstance(encoded_columns, list) or len(encoded_columns) != len(CACHED_FIELDS):
+        return None
+    exec_values = {
+        "data_execucao_carga": exec_date,
+        "data_hora_execucao_carga": exec_timestamp,
+        "data_hora_execucao_carga_ts": br_to_iso_timestamp(exec_timestamp),
+    }
+    decoded: dict[str, list[str]] = {}
+    try:
+        for field, encoded in zip(CACHED_FIELDS, encoded_columns):
+            codes = array.array(CODE_TYPECODE, base64.b64decode(encoded))
+            if raw.get("ordem_bytes") != sys.byteorder:
+                codes.byteswap()
+            decoded[field] = list(map(values.__getitem__, codes))
+    except (IndexError, TypeError, ValueError):
+        return None
+    sizes = {len(column) for column in decoded.values()}
+    if len(sizes) != 1:
+        return None
+    size = sizes.pop()
+    columns = [decoded[field] if field in decoded else repeat(exec_values[field], size) for field in BASE_FIELDNAMES]
+    return [dict(zip(BASE_FIELDNAMES, row)) for row in zip(*columns)]
+
+
+def write_cached_rows(cache_dir: Path, key: str, rows: Iterable[Mapping[str, str]]) -> None:
+    codes_by_value: dict[str, int] = {}
+    columns = [array.array(CODE_TYPECODE) for _ in CACHED_FIELDS]
+    for row in rows:
+        for column, field in zip(columns, CACHED_FIELDS):
+            value = row.get(field, "") or ""
+            code = codes_by_value.get(value)
+            if code is None:
+                code = codes_by_value[value] = len(codes_by_value)
+            column.append(code)
+
+    content = json.dumps(
+        {
+            "campos": CACHED_FIELDS,
+            "tamanho_codigo": array.array(CODE_TYPECODE).itemsize,
+            "ordem_bytes": sys.byteorder,
+            "valores": list(codes_by_value),
+            "colunas": [base64.b64encode(column.tobytes()).decode("ascii") for column in columns],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_path(cache_dir, key)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(gzip.compress(content, compresslevel=CACHE_GZIP_LEVEL, mtime=0))
+    os.replace(temp_path, path)
+
+
+def prune_cache(cache_dir: Path, keep_keys: Iterable[str]) -> int:
+    if not cache_dir.exists():
+        return 0
+    keep_names = {cache_path(cache_dir, key).name for key in keep_keys}
+    removed = 0
+    for path in cache_dir.glob(f"*{CACHE_SUFFIX}"):
+        if path.name not in keep_names:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
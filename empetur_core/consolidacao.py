@@ -1,20 +1,103 @@
 from __future__ import annotations
 
+import codecs
 import csv
 import difflib
-import json
+import hashlib
+import io
 import re
-import unicodedata
-from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from dataclasses import dataclass
-from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import TextIO
+
+from empetur_core.datas import br_to_iso_timestamp, normalize_iso_timestamp, parse_br_datetime
+from empetur_core.normalizacao import (
+    TEST_NAME_PATTERNS,
+    fix_mojibake,
+    is_test_record_name,
+    normalize_cell,
+    normalize_cell_cached,
+    normalize_for_match,
+    normalize_text,
+)
+from empetur_core.resumos import BASE_DIR, REFERENCE_DIR, build_resumos, load_cadastro_municipios, load_total_previsto
+from empetur_core.serializacao import write_csv_atomic, write_json_files
+
+
+# Alem das funcoes deste modulo, continuam disponiveis aqui os nomes que foram para datas, normalizacao e resumos.
+__all__ = [
+    "BASE_DIR",
+    "BASE_FIELDNAMES",
+    "CSV_ENCODINGS",
+    "DECODE_CHUNK_SIZE",
+    "FILE_PREFIX",
+    "FINGERPRINT_EXCLUDED_FIELDS",
+    "FINGERPRINT_FIELDS",
+    "FIXED_CATEGORIA_QUESTIONARIOS",
+    "REFERENCE_DIR",
+    "RULES_BY_QUESTIONARIO",
+    "SCHEMA_PLAN_CACHE_SIZE",
+    "TEST_NAME_PATTERNS",
+    "TIMESTAMP_FIELDS",
+    "FileRule",
+    "SchemaPlan",
+    "base_row_fingerprint",
+    "base_row_key",
+    "build_dashboard_payload",
+    "build_resumos",
+    "compile_schema_plan",
+    "consolidate_csv_content",
+    "consolidate_csv_file",
+    "consolidate_csv_rows",
+    "decode_csv_bytes",
+    "detect_csv_encoding",
+    "extract_questionario",
+    "fill_typed_timestamps",
+    "find_header_column",
+    "find_index",
+    "find_optional_index",
+    "fix_mojibake",
+    "get_cached_value",
+    "get_rule_for_questionario",
+    "get_rules_index",
+    "get_schema_plan",
+    "get_value",
+    "hash_csv_bytes",
+    "hash_csv_content",
+    "hash_csv_file",
+    "header_match_kind",
+    "header_matches",
+    "is_test_record_name",
+    "iter_byte_chunks",
+    "iter_consolidated_csv_content",
+    "iter_consolidated_csv_file",
+    "iter_consolidated_rows",
+    "iter_file_chunks",
+    "load_cadastro_municipios",
+    "load_total_previsto",
+    "materialize_rows",
+    "normalize_for_match",
+    "normalize_questionario_name",
+    "normalize_text",
+    "normalized_contains",
+    "normalized_fuzzy_prefix_match",
+    "normalized_startswith",
+    "open_csv_bytes",
+    "open_csv_file",
+    "parse_br_datetime",
+    "parse_csv_text",
+    "write_csv",
+    "write_json",
+]
 
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-REFERENCE_DIR = BASE_DIR / "data" / "referencias"
-
 FILE_PREFIX = "#1265803711 _ EMPETUR - "
+SCHEMA_PLAN_CACHE_SIZE = 256
+FIXED_CATEGORIA_QUESTIONARIOS = {"Sistema Rodoviário", "Sistema Aéreo", "Sistema Marítimo e Fluvial"}
+CSV_ENCODINGS = ("utf-8-sig", "utf-8", "cp1252", "latin-1")
+DECODE_CHUNK_SIZE = 64 * 1024
 BASE_FIELDNAMES = [
     "arquivo_origem",
     "codigo_pesquisa",
@@ -32,13 +115,24 @@ BASE_FIELDNAMES = [
     "data_execucao_carga",
     "data_hora_execucao_carga",
     "sync_run_id",
+    "data_inicio_coleta_ts",
+    "data_fim_coleta_ts",
+    "data_hora_execucao_carga_ts",
 ]
-TEST_NAME_PATTERNS = [
-    re.compile(r"^\s*9{2,}\s*$"),
-    re.compile(r"^\s*x{2,}\s*$", re.IGNORECASE),
-    re.compile(r"\bteste(?:s|ndo|ando)?\b", re.IGNORECASE),
-    re.compile(r"\btestar\b", re.IGNORECASE),
-]
+# Colunas tipadas (ISO 8601 com fuso) derivadas das datas em texto dd/mm/aaaa.
+TIMESTAMP_FIELDS = {
+    "data_inicio_coleta_ts": "data_inicio_coleta",
+    "data_fim_coleta_ts": "data_fim_coleta",
+    "data_hora_execucao_carga_ts": "data_hora_execucao_carga",
+}
+FINGERPRINT_EXCLUDED_FIELDS = {
+    "linha_origem",
+    "data_execucao_carga",
+    "data_hora_execucao_carga",
+    "sync_run_id",
+    *TIMESTAMP_FIELDS,
+}
+FINGERPRINT_FIELDS = [field for field in BASE_FIELDNAMES if field not in FINGERPRINT_EXCLUDED_FIELDS]
 
 
 @dataclass(frozen=True)
@@ -105,39 +199,23 @@ RULES_BY_QUESTIONARIO: dict[str, FileRule] = {
 }
 
 
-def normalize_text(value: str | None) -> str:
-    if value is None:
-        return ""
-    return value.strip()
-
-
-def normalize_for_match(value: str) -> str:
-    normalized = unicodedata.normalize("NFD", value)
-    without_accents = "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
-    return without_accents.strip().lower()
-
-
-def fix_mojibake(value: str) -> str:
-    if not value:
-        return value
-    if "Ã" not in value and "Â" not in value:
-        return value
-    try:
-        return value.encode("latin-1").decode("utf-8")
-    except UnicodeError:
-        return value
-
-
 def normalize_questionario_name(value: str) -> str:
     return fix_mojibake(normalize_text(value))
 
 
-def get_rule_for_questionario(questionario: str) -> FileRule:
-    normalized = normalize_for_match(questionario)
+@lru_cache(maxsize=1)
+def get_rules_index() -> dict[str, FileRule]:
+    index: dict[str, FileRule] = {}
     for candidate, rule in RULES_BY_QUESTIONARIO.items():
-        if normalize_for_match(candidate) == normalized:
-            return rule
-    raise KeyError(f"Questionario sem regra de normalizacao: {questionario}")
+        index.setdefault(normalize_for_match(candidate), rule)
+    return index
+
+
+def get_rule_for_questionario(questionario: str) -> FileRule:
+    rule = get_rules_index().get(normalize_for_match(questionario))
+    if rule is None:
+        raise KeyError(f"Questionario sem regra de normalizacao: {questionario}")
+    return rule
 
 
 def extract_questionario(file_name: str) -> str:
@@ -154,13 +232,6 @@ def extract_questionario(file_name: str) -> str:
     return questionario
 
 
-def is_test_record_name(value: str) -> bool:
-    normalized = normalize_for_match(fix_mojibake(value))
-    if not normalized:
-        return False
-    return any(pattern.search(normalized) for pattern in TEST_NAME_PATTERNS)
-
-
 def find_index(header: list[str], predicate) -> int:
     for idx, column in enumerate(header):
         if predicate(column):
@@ -178,7 +249,13 @@ def find_optional_index(header: list[str], predicate) -> int | None:
 def get_value(row: list[str], idx: int | None) -> str:
     if idx is None or idx >= len(row):
         return ""
-    return fix_mojibake(normalize_text(row[idx]))
+    return normalize_cell(row[idx])
+
+
+def get_cached_value(row: list[str], idx: int | None) -> str:
+    if idx is None or idx >= len(row):
+        return ""
+    return normalize_cell_cached(row[idx])
 
 
 def normalized_startswith(value: str, expected_prefix: str) -> bool:
@@ -197,28 +274,109 @@ def normalized_fuzzy_prefix_match(value: str, expected_prefix: str) -> bool:
     return difflib.SequenceMatcher(None, left, right).ratio() >= 0.9
 
 
+def header_match_kind(column: str, expected: str) -> str | None:
+    if normalized_startswith(column, expected):
+        return "prefixo"
+    if normalized_contains(column, expected):
+        return "contem"
+    if normalized_fuzzy_prefix_match(column, expected):
+        return "fuzzy"
+    return None
+
+
 def header_matches(column: str, expected: str) -> bool:
-    return (
-        normalized_startswith(column, expected)
-        or normalized_contains(column, expected)
-        or normalized_fuzzy_prefix_match(column, expected)
-    )
+    return header_match_kind(column, expected) is not None
 
 
-def parse_br_datetime(value: str) -> datetime | None:
-    value = normalize_text(value)
-    if not value:
-        return None
-    for fmt in ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
-        try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
-            continue
+def find_header_column(header: tuple[str, ...], expected: str) -> tuple[int, str] | None:
+    for idx, column in enumerate(header):
+        kind = header_match_kind(column, expected)
+        if kind is not None:
+            return idx, kind
     return None
 
 
+@dataclass(frozen=True)
+class SchemaPlan:
+    questionario: str
+    rule: FileRule
+    municipio_idx: int
+    nome_idx: int
+    categoria_idx: int | None
+    pesquisador_informado_idx: int | None
+    pesquisador_sistema_idx: int | None
+    nro_identificacao_idx: int | None
+    data_inicio_idx: int | None
+    data_fim_idx: int | None
+    fuzzy_columns: tuple[tuple[str, str], ...]
+
+
+@lru_cache(maxsize=SCHEMA_PLAN_CACHE_SIZE)
+def compile_schema_plan(questionario: str, header: tuple[str, ...]) -> SchemaPlan:
+    rule = get_rule_for_questionario(questionario)
+    fuzzy_columns: list[tuple[str, str]] = []
+
+    def resolve(field: str, expected: str | None) -> int | None:
+        if expected is None:
+            return None
+        found = find_header_column(header, expected)
+        if found is None:
+            return None
+        idx, kind = found
+        if kind == "fuzzy":
+            fuzzy_columns.append((field, header[idx]))
+        return idx
+
+    municipio_idx = resolve("municipio", "P0. Munic")
+    nome_idx = resolve("nome_atrativo", rule.nome_header_startswith)
+    if municipio_idx is None or nome_idx is None:
+        raise KeyError(
+            f"Coluna esperada nao encontrada no questionario '{questionario}'. Cabecalho recebido: {list(header)}"
+        )
+    normalized_header = [normalize_for_match(column) for column in header]
+    pesquisador_informado_idx = next(
+        (
+            idx
+            for idx, column in enumerate(normalized_header)
+            if "pesquisador:" in column and column != "pesquisador"
+        ),
+        None,
+    )
+    pesquisador_sistema_idx = next(
+        (idx for idx, column in enumerate(normalized_header) if column == "pesquisador"),
+        None,
+    )
+    nro_identificacao_idx = resolve("nro_identificacao", "Nro. Identifica")
+    data_inicio_idx = resolve("data_inicio_coleta", "Data In")
+    data_fim_idx = resolve("data_fim_coleta", "Data Fim")
+    categoria_idx = resolve("categoria", rule.categoria_header_startswith)
+    if rule.categoria_header_startswith is not None and categoria_idx is None:
+        raise KeyError(
+            f"Coluna de categoria nao encontrada no questionario '{questionario}'. Cabecalho recebido: {list(header)}"
+        )
+
+    return SchemaPlan(
+        questionario=questionario,
+        rule=rule,
+        municipio_idx=municipio_idx,
+        nome_idx=nome_idx,
+        categoria_idx=categoria_idx,
+        pesquisador_informado_idx=pesquisador_informado_idx,
+        pesquisador_sistema_idx=pesquisador_sistema_idx,
+        nro_identificacao_idx=nro_identificacao_idx,
+        data_inicio_idx=data_inicio_idx,
+        data_fim_idx=data_fim_idx,
+        fuzzy_columns=tuple(fuzzy_columns),
+    )
+
+
+def get_schema_plan(file_name: str, header_row: list[str]) -> SchemaPlan:
+    questionario = extract_questionario(file_name)
+    return compile_schema_plan(questionario, tuple(fix_mojibake(item) for item in header_row))
+
+
 def decode_csv_bytes(content: bytes) -> str:
-    for encoding in ("utf-8-sig", "utf-8", "cp1252", "latin-1"):
+    for encoding in CSV_ENCODINGS:
         try:
             return content.decode(encoding)
         except UnicodeDecodeError:
@@ -226,202 +384,208 @@ def decode_csv_bytes(content: bytes) -> str:
     return content.decode("utf-8", errors="replace")
 
 
-def parse_csv_text(content: str) -> list[list[str]]:
-    return list(csv.reader(content.splitlines()))
+def iter_byte_chunks(content: bytes) -> Iterator[bytes]:
+    view = memoryview(content)
+    for start in range(0, len(view), DECODE_CHUNK_SIZE):
+        yield view[start : start + DECODE_CHUNK_SIZE]
 
 
-def consolidate_csv_rows(file_name: str, rows: list[list[str]], exec_date: str, exec_timestamp: str) -> list[dict[str, str]]:
-    questionario = extract_questionario(file_name)
-    rule = get_rule_for_questionario(questionario)
+def iter_file_chunks(path: Path) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        while chunk := f.read(DECODE_CHUNK_SIZE):
+            yield chunk
 
-    header = [fix_mojibake(item) for item in rows[0]]
-    data_rows = rows[1:]
 
-    try:
-        municipio_idx = find_index(header, lambda c: header_matches(c, "P0. Munic"))
-        nome_idx = find_index(header, lambda c: header_matches(c, rule.nome_header_startswith))
-    except KeyError as exc:
-        raise KeyError(
-            f"Coluna esperada nao encontrada no questionario '{questionario}'. Cabecalho recebido: {header}"
-        ) from exc
-    pesquisador_informado_idx = find_optional_index(
-        header,
-        lambda c: "pesquisador:" in normalize_for_match(c) and normalize_for_match(c) != "pesquisador",
-    )
-    pesquisador_sistema_idx = find_optional_index(header, lambda c: normalize_for_match(c) == "pesquisador")
-    nro_identificacao_idx = find_optional_index(header, lambda c: header_matches(c, "Nro. Identifica"))
-    data_inicio_idx = find_optional_index(header, lambda c: header_matches(c, "Data In"))
-    data_fim_idx = find_optional_index(header, lambda c: header_matches(c, "Data Fim"))
+def hash_csv_content(chunks: Iterable[bytes]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
 
-    categoria_idx = None
-    if rule.categoria_header_startswith is not None:
+
+def hash_csv_bytes(content: bytes) -> str:
+    return hash_csv_content((content,))
+
+
+def hash_csv_file(path: Path) -> str:
+    return hash_csv_content(iter_file_chunks(path))
+
+
+def detect_csv_encoding(chunks: Callable[[], Iterable[bytes]]) -> str | None:
+    for encoding in CSV_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
         try:
-            categoria_idx = find_index(header, lambda c: header_matches(c, rule.categoria_header_startswith))
-        except KeyError as exc:
-            raise KeyError(
-                f"Coluna de categoria nao encontrada no questionario '{questionario}'. Cabecalho recebido: {header}"
-            ) from exc
-
-    consolidated_rows: list[dict[str, str]] = []
-    for row_number, row in enumerate(data_rows, start=2):
-        nome_atrativo = get_value(row, nome_idx)
-        if is_test_record_name(nome_atrativo):
+            for chunk in chunks():
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
             continue
+        return encoding
+    return None
 
-        pesquisador_informado = get_value(row, pesquisador_informado_idx)
-        pesquisador_sistema = get_value(row, pesquisador_sistema_idx)
-        categoria = (
-            questionario
-            if questionario in {"Sistema Rodoviário", "Sistema Aéreo", "Sistema Marítimo e Fluvial"}
-            else get_value(row, categoria_idx)
-        )
 
-        consolidated_rows.append(
-            {
-                "arquivo_origem": file_name,
-                "codigo_pesquisa": "",
-                "questionario_preenchido": questionario,
-                "nro_identificacao": get_value(row, nro_identificacao_idx),
-                "municipio": get_value(row, municipio_idx),
-                "categoria": categoria,
-                "nome_atrativo": nome_atrativo,
-                "pesquisador_informado": pesquisador_informado,
-                "pesquisador_sistema": pesquisador_sistema,
-                "pesquisador": pesquisador_informado or pesquisador_sistema,
-                "data_inicio_coleta": get_value(row, data_inicio_idx),
-                "data_fim_coleta": get_value(row, data_fim_idx),
-                "linha_origem": str(row_number),
-                "data_execucao_carga": exec_date,
-                "data_hora_execucao_carga": exec_timestamp,
-                "sync_run_id": "",
-            }
-        )
+def open_csv_bytes(content: bytes) -> TextIO:
+    encoding = detect_csv_encoding(lambda: iter_byte_chunks(content))
+    return io.TextIOWrapper(
+        io.BytesIO(content),
+        encoding=encoding or "utf-8",
+        errors="strict" if encoding else "replace",
+        newline="",
+    )
+
 
-    return consolidated_rows
+def open_csv_file(path: Path) -> TextIO:
+    encoding = detect_csv_encoding(lambda: iter_file_chunks(path))
+    return path.open(
+        "r",
+        encoding=encoding or "utf-8",
+        errors="strict" if encoding else "replace",
+        newline="",
+    )
+
+
+def parse_csv_text(content: str) -> list[list[str]]:
+    return list(csv.reader(io.StringIO(content, newline="")))
+
+
+def iter_consolidated_rows(
+    file_name: str,
+    rows: Iterable[list[str]],
+    exec_date: str,
+    exec_timestamp: str,
+    on_plan: Callable[[SchemaPlan], None] | None = None,
+) -> Iterator[dict[str, str]]:
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return
+    plan = get_schema_plan(file_name, first_row)
+    if on_plan is not None:
+        on_plan(plan)
+    questionario = plan.questionario
+    municipio_idx = plan.municipio_idx
+    nome_idx = plan.nome_idx
+    categoria_idx = plan.categoria_idx
+    pesquisador_informado_idx = plan.pesquisador_informado_idx
+    pesquisador_sistema_idx = plan.pesquisador_sistema_idx
+    nro_identificacao_idx = plan.nro_identificacao_idx
+    data_inicio_idx = plan.data_inicio_idx
+    data_fim_idx = plan.data_fim_idx
+    categoria_fixa = questionario in FIXED_CATEGORIA_QUESTIONARIOS
+    exec_timestamp_ts = br_to_iso_timestamp(exec_timestamp)
+
+    for row_number, row in enumerate(rows, start=2):
+        nome_atrativo = get_value(row, nome_idx)
+        if is_test_record_name(nome_atrativo):
+            continue
+
+        pesquisador_informado = get_cached_value(row, pesquisador_informado_idx)
+        pesquisador_sistema = get_cached_value(row, pesquisador_sistema_idx)
+        categoria = questionario if categoria_fixa else get_cached_value(row, categoria_idx)
+        data_inicio = get_value(row, data_inicio_idx)
+        data_fim = get_value(row, data_fim_idx)
+
+        yield {
+            "arquivo_origem": file_name,
+            "codigo_pesquisa": "",
+            "questionario_preenchido": questionario,
+            "nro_identificacao": get_value(row, nro_identificacao_idx),
+            "municipio": get_cached_value(row, municipio_idx),
+            "categoria": categoria,
+            "nome_atrativo": nome_atrativo,
+            "pesquisador_informado": pesquisador_informado,
+            "pesquisador_sistema": pesquisador_sistema,
+            "pesquisador": pesquisador_informado or pesquisador_sistema,
+            "data_inicio_coleta": data_inicio,
+            "data_fim_coleta": data_fim,
+            "linha_origem": str(row_number),
+            "data_execucao_carga": exec_date,
+            "data_hora_execucao_carga": exec_timestamp,
+            "sync_run_id": "",
+            "data_inicio_coleta_ts": br_to_iso_timestamp(data_inicio),
+            "data_fim_coleta_ts": br_to_iso_timestamp(data_fim),
+            "data_hora_execucao_carga_ts": exec_timestamp_ts,
+        }
+
+
+def consolidate_csv_rows(
+    file_name: str, rows: Iterable[list[str]], exec_date: str, exec_timestamp: str
+) -> list[dict[str, str]]:
+    return list(iter_consolidated_rows(file_name, rows, exec_date, exec_timestamp))
+
+
+def iter_consolidated_csv_content(
+    file_name: str,
+    content: bytes | str,
+    exec_date: str,
+    exec_timestamp: str,
+    on_plan: Callable[[SchemaPlan], None] | None = None,
+) -> Iterator[dict[str, str]]:
+    stream = io.StringIO(content, newline="") if isinstance(content, str) else open_csv_bytes(content)
+    with stream:
+        yield from iter_consolidated_rows(file_name, csv.reader(stream), exec_date, exec_timestamp, on_plan)
+
+
+def iter_consolidated_csv_file(
+    path: Path, exec_date: str, exec_timestamp: str, on_plan: Callable[[SchemaPlan], None] | None = None
+) -> Iterator[dict[str, str]]:
+    with open_csv_file(path) as stream:
+        yield from iter_consolidated_rows(path.name, csv.reader(stream), exec_date, exec_timestamp, on_plan)
 
 
 def consolidate_csv_content(file_name: str, content: bytes | str, exec_date: str, exec_timestamp: str) -> list[dict[str, str]]:
-    text = content if isinstance(content, str) else decode_csv_bytes(content)
-    rows = parse_csv_text(text)
-    if not rows:
-        return []
-    return consolidate_csv_rows(file_name, rows, exec_date, exec_timestamp)
+    return list(iter_consolidated_csv_content(file_name, content, exec_date, exec_timestamp))
 
 
 def consolidate_csv_file(path: Path, exec_date: str, exec_timestamp: str) -> list[dict[str, str]]:
-    return consolidate_csv_content(path.name, path.read_bytes(), exec_date, exec_timestamp)
-
-
-def load_cadastro_municipios() -> list[dict[str, str]]:
-    path = REFERENCE_DIR / "cadastro_municipios.csv"
-    with path.open("r", encoding="utf-8-sig", newline="") as f:
-        return list(csv.DictReader(f))
-
-
-def load_total_previsto() -> dict[str, int]:
-    path = REFERENCE_DIR / "total_previsto_municipios.csv"
-    if not path.exists():
-        return {}
-    with path.open("r", encoding="utf-8-sig", newline="") as f:
-        rows = list(csv.DictReader(f))
-    out: dict[str, int] = {}
-    for row in rows:
-        raw = normalize_text(row.get("total_previsto", ""))
-        if raw == "":
-            out[row["municipio"]] = 0
-            continue
-        try:
-            out[row["municipio"]] = int(float(raw.replace(",", ".")))
-        except ValueError:
-            out[row["municipio"]] = 0
-    return out
-
-
-def build_resumos(all_rows: list[dict[str, str]]) -> dict[str, list[dict[str, str]]]:
-    cadastro = load_cadastro_municipios()
-    previstos = load_total_previsto()
-
-    rows_by_municipio: dict[str, list[dict[str, str]]] = defaultdict(list)
-    for row in all_rows:
-        rows_by_municipio[row["municipio"]].append(row)
-
-    resumo_municipios: list[dict[str, str]] = []
-    for item in cadastro:
-        municipio = item["municipio"]
-        municipio_rows = rows_by_municipio.get(municipio, [])
-        total_realizado = len(municipio_rows)
-        total_previsto = previstos.get(municipio, 0)
-        faltante = max(total_previsto - total_realizado, 0)
-        percentual = round((total_realizado / total_previsto) * 100, 2) if total_previsto > 0 else 0
-
-        datas_inicio = [parse_br_datetime(r["data_inicio_coleta"]) for r in municipio_rows]
-        datas_inicio = [d for d in datas_inicio if d is not None]
-
-        primeira = min(datas_inicio).strftime("%d/%m/%Y %H:%M:%S") if datas_inicio else ""
-        ultima = max(datas_inicio).strftime("%d/%m/%Y %H:%M:%S") if datas_inicio else ""
-
-        resumo_municipios.append(
-            {
-                "regiao": item["regiao"],
-                "ordem_regiao": item["ordem_regiao"],
-                "municipio": municipio,
-                "ordem_municipio": item["ordem_municipio"],
-                "total_realizado": str(total_realizado),
-                "total_previsto": str(total_previsto),
-                "faltante": str(faltante),
-                "percentual_cobertura": f"{percentual:.2f}",
-                "primeira_coleta": primeira,
-                "ultima_coleta": ultima,
-            }
-        )
+    return list(iter_consolidated_csv_file(path, exec_date, exec_timestamp))
 
-    resumo_questionarios_counter = Counter(row["questionario_preenchido"] for row in all_rows)
-    resumo_questionarios = [
-        {"questionario_preenchido": nome, "total": str(total)}
-        for nome, total in sorted(resumo_questionarios_counter.items(), key=lambda item: (-item[1], item[0]))
-    ]
-
-    resumo_pesquisadores_counter = Counter(row["pesquisador"] for row in all_rows if normalize_text(row["pesquisador"]))
-    resumo_pesquisadores = [
-        {"pesquisador": nome, "total": str(total)}
-        for nome, total in sorted(resumo_pesquisadores_counter.items(), key=lambda item: (-item[1], item[0]))
-    ]
-
-    resumo_municipio_categoria_counter = Counter((row["municipio"], row["categoria"]) for row in all_rows)
-    resumo_municipio_categoria = [
-        {"municipio": municipio, "categoria": categoria, "total": str(total)}
-        for (municipio, categoria), total in sorted(
-            resumo_municipio_categoria_counter.items(), key=lambda item: (item[0][0], item[0][1])
-        )
-    ]
 
-    return {
-        "cadastro_municipios": cadastro,
-        "resumo_municipios": resumo_municipios,
-        "resumo_questionarios": resumo_questionarios,
-        "resumo_pesquisadores": resumo_pesquisadores,
-        "resumo_municipio_categoria": resumo_municipio_categoria,
-    }
+def base_row_key(row: Mapping[str, str]) -> tuple[str, str]:
+    nro_identificacao = str(row.get("nro_identificacao", "") or "").strip()
+    if not nro_identificacao:
+        nro_identificacao = f"#{str(row.get('linha_origem', '') or '').strip()}"
+    return str(row.get("codigo_pesquisa", "") or "").strip(), nro_identificacao
+
+
+def fill_typed_timestamps(row: dict[str, str]) -> dict[str, str]:
+    for field, source in TIMESTAMP_FIELDS.items():
+        row[field] = normalize_iso_timestamp(row.get(field) or "") or br_to_iso_timestamp(row.get(source) or "")
+    return row
+
+
+def base_row_fingerprint(row: Mapping[str, str]) -> str:
+    content = "\x1f".join(str(row.get(field, "") or "") for field in FINGERPRINT_FIELDS)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def materialize_rows(rows: Iterable[Mapping[str, str]]) -> list[dict[str, str]]:
+    if isinstance(rows, list):
+        return rows
+    to_dicts = getattr(rows, "to_dicts", None)
+    if to_dicts is not None:
+        return to_dicts()
+    return [dict(row) for row in rows]
 
 
-def build_dashboard_payload(all_rows: list[dict[str, str]], exec_date: str, exec_timestamp: str) -> dict:
+def build_dashboard_payload(
+    all_rows: Iterable[Mapping[str, str]],
+    exec_date: str,
+    exec_timestamp: str,
+    resumos: dict[str, list[dict[str, str]]] | None = None,
+) -> dict:
+    rows = materialize_rows(all_rows)
     return {
         "generated_at": exec_timestamp,
         "generated_date": exec_date,
-        "base_rows": all_rows,
-        **build_resumos(all_rows),
+        "base_rows": rows,
+        **(resumos if resumos is not None else build_resumos(rows)),
     }
 
 
 def write_csv(path: Path, fieldnames: list[str], rows: list[dict[str, str]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8-sig", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    write_csv_atomic(path, fieldnames, rows)
 
 
-def write_json(path: Path, payload: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+def write_json(path: Path, payload: dict, compact: bool = False) -> None:
+    write_json_files((path,), payload, compact=compact)
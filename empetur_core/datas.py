@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from empetur_core.normalizacao import NORMALIZATION_CACHE_SIZE, normalize_text
+
+
+# Pernambuco nao tem horario de verao: as coletas sao gravadas sempre em UTC-3.
+BR_TIMEZONE = timezone(timedelta(hours=-3))
+BR_DATETIME_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+BR_DATETIME_PATTERN = re.compile(r"(\d{2})/(\d{2})/(\d{4})(?: (\d{2}):(\d{2})(?::(\d{2}))?)?")
+
+
+def parse_br_datetime(value: str) -> datetime | None:
+    value = normalize_text(value)
+    if not value:
+        return None
+    match = BR_DATETIME_PATTERN.fullmatch(value)
+    if match is not None:
+        day, month, year, hour, minute, second = match.groups()
+        try:
+            return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+        except ValueError:
+            return None
+    for fmt in BR_DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def format_br_datetime(value: datetime | None) -> str:
+    return value.strftime("%d/%m/%Y %H:%M:%S") if value is not None else ""
+
+
+def to_iso_timestamp(value: datetime | None) -> str:
+    if value is None:
+        return ""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=BR_TIMEZONE)
+    return value.astimezone(BR_TIMEZONE).isoformat()
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def br_to_iso_timestamp(value: str) -> str:
+    return to_iso_timestamp(parse_br_datetime(value))
+
+
+def parse_iso_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(BR_TIMEZONE).replace(tzinfo=None)
+    return parsed
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def normalize_iso_timestamp(value: str) -> str:
+    return to_iso_timestamp(parse_iso_timestamp(value))
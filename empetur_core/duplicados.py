@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import random
+import zlib
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from functools import lru_cache, reduce
+from typing import Any
+
+from empetur_core.busca import WORD_PATTERN, word_trigrams
+from empetur_core.consolidacao import base_row_key
+from empetur_core.normalizacao import NORMALIZATION_CACHE_SIZE, normalize_for_match_cached
+from empetur_core.reconciliacao import STOPWORDS
+
+
+DUPLICATE_MIN_SIMILARITY = 0.75
+MINHASH_PERMUTATIONS = 80
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_SEED = 9055
+MINHASH_COEFFICIENTS = tuple(
+    (generator.randrange(1, MINHASH_PRIME), generator.randrange(MINHASH_PRIME))
+    for generator in [random.Random(MINHASH_SEED)]
+    for _ in range(MINHASH_PERMUTATIONS)
+)
+# Assinaturas empacotadas num inteiro: cada permutacao ocupa uma faixa de 32 bits, 31 de valor e um bit de guarda.
+LANE_BITS = 32
+VALUE_BITS = LANE_BITS - 1
+LANE_VALUE_MASK = (1 << VALUE_BITS) - 1
+LANE_GUARDS = sum(1 << (lane * LANE_BITS + VALUE_BITS) for lane in range(MINHASH_PERMUTATIONS))
+BAND_BITS = LSH_ROWS * LANE_BITS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def pack_lanes(values: Iterable[int]) -> int:
+    packed = 0
+    for lane, value in enumerate(values):
+        packed |= value << (lane * LANE_BITS)
+    return packed
+
+
+def lanewise_min(left: int, right: int) -> int:
+    # Subtrai todas as faixas de uma vez; o bit de guarda que sobrevive marca as faixas em que left >= right.
+    greater_equal = (((left | LANE_GUARDS) - right) & LANE_GUARDS) >> VALUE_BITS
+    return left ^ ((left ^ right) & greater_equal * LANE_VALUE_MASK)
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def gram_signature(gram: str) -> int:
+    value = zlib.crc32(gram.encode("utf-8"))
+    return pack_lanes((a * value + b) % MINHASH_PRIME >> (61 - VALUE_BITS) for a, b in MINHASH_COEFFICIENTS)
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def token_signature(token: str) -> int:
+    return reduce(lanewise_min, map(gram_signature, word_trigrams(token)))
+
+
+def name_tokens(nome_normalizado: str) -> list[str]:
+    words = WORD_PATTERN.findall(nome_normalizado)
+    return [word for word in words if word not in STOPWORDS] or words
+
+
+def minhash_signature(tokens: tuple[str, ...]) -> int:
+    # O MinHash da uniao dos trigramas e o minimo faixa a faixa das assinaturas de cada palavra.
+    return reduce(lanewise_min, map(token_signature, tokens))
+
+
+class DuplicateName:
+    __slots__ = ("nome_normalizado", "tokens", "rows", "grams", "numeros")
+
+    def __init__(self, nome_normalizado: str, tokens: tuple[str, ...]) -> None:
+        self.nome_normalizado = nome_normalizado
+        self.tokens = tokens
+        self.rows: list[Mapping[str, str]] = []
+        self.grams: frozenset[str] | None = None
+        self.numeros = frozenset(token for token in tokens if token.isdigit())
+
+    def features(self) -> frozenset[str]:
+        # Os trigramas so sao montados para nomes que caem em algum balde com outro nome.
+        if self.grams is None:
+            self.grams = frozenset().union(*map(word_trigrams, self.tokens))
+        return self.grams
+
+
+def name_similarity(left: DuplicateName, right: DuplicateName) -> float:
+    if left.numeros != right.numeros:
+        return 0.0
+    left_grams = left.features()
+    right_grams = right.features()
+    shared = len(left_grams & right_grams)
+    return shared / (len(left_grams) + len(right_grams) - shared)
+
+
+def find_root(parents: list[int], item: int) -> int:
+    while parents[item] != item:
+        parents[item] = parents[parents[item]]
+        item = parents[item]
+    return item
+
+
+def iter_lsh_buckets(signatures: list[int], partitions: list[int]) -> Iterator[list[int]]:
+    for band in range(LSH_BANDS):
+        shift = band * BAND_BITS
+        keys = [signature >> shift & BAND_MASK | partition for partition, signature in zip(partitions, signatures)]
+        counts = Counter(keys)
+        if len(counts) == len(keys):
+            continue
+        buckets: dict[int, list[int]] = {}
+        for name_id in [name_id for name_id, key in enumerate(keys) if counts[key] > 1]:
+            buckets.setdefault(keys[name_id], []).append(name_id)
+        yield from buckets.values()
+
+
+def cluster_names(names: list[DuplicateName]) -> list[tuple[list[DuplicateName], float]]:
+    parents = list(range(len(names)))
+    min_similarity: dict[int, float] = {}
+    checked: set[tuple[int, int]] = set()
+    # Nomes com numeros diferentes nunca sao duplicados (similaridade zero), entao nem dividem balde: isso
+    # corta os baldes grandes de "Igreja Matriz 1", "Igreja Matriz 2"... sem perder nenhum par comparavel.
+    partition_ids: dict[frozenset[str], int] = {}
+    partitions = [partition_ids.setdefault(name.numeros, len(partition_ids)) << BAND_BITS for name in names]
+    signatures = [minhash_signature(name.tokens) for name in names]
+    for members in iter_lsh_buckets(signatures, partitions):
+        for position, left in enumerate(members):
+            for right in members[position + 1 :]:
+                left_root = find_root(parents, left)
+                right_root = find_root(parents, right)
+                if left_root == right_root or (left, right) in checked:
+                    continue
+                checked.add((left, right))
+                similarity = name_similarity(names[left], names[right])
+                if similarity < DUPLICATE_MIN_SIMILARITY:
+                    continue
+                parents[right_root] = left_root
+                min_similarity[left_root] = min(
+                    similarity,
+                    min_similarity.pop(right_root, 1.0),
+                    min_similarity.get(left_root, 1.0),
+                )
+
+    clusters: dict[int, list[DuplicateName]] = {}
+    for name_id, name in enumerate(names):
+        clusters.setdefault(find_root(parents, name_id), []).append(name)
+    return [(members, min_similarity.get(root, 1.0)) for root, members in clusters.items()]
+
+
+DUPLICATE_TOTAL_FIELDS = ("realizados", "grupos_duplicados", "registros_excedentes", "deduplicados")
+DIGEST_MASK = (1 << 64) - 1
+
+
+@dataclass
+class DuplicateReport:
+    clusters: list[dict[str, Any]]
+    totais_por_municipio: dict[str, dict[str, int]]
+    tempo_processamento_ms: float = 0.0
+    clusters_por_municipio: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    assinaturas: dict[str, tuple[int, int]] = field(default_factory=dict)
+    municipios_recalculados: int = 0
+
+    def totais(self) -> dict[str, int]:
+        return {
+            key: sum(item[key] for item in self.totais_por_municipio.values()) for key in DUPLICATE_TOTAL_FIELDS
+        }
+
+    def deduplicated_totals(self) -> dict[str, int]:
+        return {municipio: item["deduplicados"] for municipio, item in self.totais_por_municipio.items()}
+
+
+def build_duplicate_cluster(municipio: str, members: list[DuplicateName], similarity: float) -> dict[str, Any]:
+    rows = [row for member in members for row in member.rows]
+    nomes = Counter(row["nome_atrativo"] for row in rows)
+    keys = sorted(base_row_key(row) for row in rows)
+    return {
+        "municipio": municipio,
+        "nome_atrativo": max(nomes.items(), key=lambda item: (item[1], item[0]))[0],
+        "nomes": [
+            {"nome_atrativo": nome, "total": total}
+            for nome, total in sorted(nomes.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        "total_registros": len(keys),
+        "registros_excedentes": len(keys) - 1,
+        "similaridade_minima": round(similarity, 4),
+        "questionarios": sorted({row["questionario_preenchido"] for row in rows}),
+        "pesquisadores": sorted({row["pesquisador"] for row in rows} - {""}),
+        "registros": [list(key) for key in keys],
+    }
+
+
+def row_digest(row: Mapping[str, str]) -> int:
+    # So entram os campos que aparecem nos grupos; a soma dos hashes nao depende da ordem das linhas.
+    return hash(
+        (*base_row_key(row), row["nome_atrativo"], row["questionario_preenchido"], row["pesquisador"])
+    ) & DIGEST_MASK
+
+
+def detect_municipio_duplicates(
+    municipio: str, rows: list[Mapping[str, str]]
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    names_by_key: dict[str, DuplicateName] = {}
+    for row in rows:
+        nome_normalizado = normalize_for_match_cached(row["nome_atrativo"])
+        if not nome_normalizado:
+            continue
+        name = names_by_key.get(nome_normalizado)
+        if name is None:
+            tokens = name_tokens(nome_normalizado)
+            if not tokens:
+                continue
+            name = names_by_key[nome_normalizado] = DuplicateName(nome_normalizado, tuple(dict.fromkeys(tokens)))
+        name.rows.append(row)
+
+    names = sorted(names_by_key.values(), key=lambda item: item.nome_normalizado)
+    clusters: list[dict[str, Any]] = []
+    excedentes = 0
+    for members, similarity in cluster_names(names):
+        if len(members) == 1 and len(members[0].rows) == 1:
+            continue
+        cluster = build_duplicate_cluster(municipio, members, similarity)
+        clusters.append(cluster)
+        excedentes += cluster["registros_excedentes"]
+    return clusters, {
+        "realizados": len(rows),
+        "grupos_duplicados": len(clusters),
+        "registros_excedentes": excedentes,
+        "deduplicados": len(rows) - excedentes,
+    }
+
+
+def detect_duplicates(rows: Iterable[Mapping[str, str]], previous: DuplicateReport | None = None) -> DuplicateReport:
+    rows_by_municipio: dict[str, list[Mapping[str, str]]] = {}
+    digests: dict[str, int] = {}
+    for row in rows:
+        municipio = row["municipio"]
+        rows_by_municipio.setdefault(municipio, []).append(row)
+        digests[municipio] = (digests.get(municipio, 0) + row_digest(row)) & DIGEST_MASK
+
+    # Os grupos nunca cruzam municipios: municipio com as mesmas linhas do relatorio anterior reaproveita o resultado.
+    report = DuplicateReport([], {})
+    for municipio, municipio_rows in rows_by_municipio.items():
+        assinatura = (len(municipio_rows), digests[municipio])
+        if previous is not None and previous.assinaturas.get(municipio) == assinatura:
+            clusters = previous.clusters_por_municipio[municipio]
+            totais = previous.totais_por_municipio[municipio]
+        else:
+            clusters, totais = detect_municipio_duplicates(municipio, municipio_rows)
+            report.municipios_recalculados += 1
+        report.assinaturas[municipio] = assinatura
+        report.clusters_por_municipio[municipio] = clusters
+        report.totais_por_municipio[municipio] = totais
+        report.clusters.extend(clusters)
+    report.clusters.sort(key=lambda item: (-item["total_registros"], item["municipio"], item["nome_atrativo"]))
+    return report
+
+
+def add_deduplicated_totals(
+    resumos: dict[str, list[dict[str, str]]], report: DuplicateReport
+) -> dict[str, list[dict[str, str]]]:
+    totals = report.deduplicated_totals()
+    resumo_municipios: list[dict[str, str]] = []
+    for item in resumos["resumo_municipios"]:
+        updated: dict[str, str] = {}
+        for key, value in item.items():
+            updated[key] = value
+            if key == "total_realizado":
+                updated["total_realizado_deduplicado"] = str(totals.get(item["municipio"], int(value)))
+        resumo_municipios.append(updated)
+    return {**resumos, "resumo_municipios": resumo_municipios}
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from empetur_core.consolidacao import base_row_fingerprint, base_row_key
+from empetur_core.datas import parse_br_datetime
+
+
+RowKey = tuple[str, str]
+HISTORY_MAX_REVISIONS = 50
+# As revisoes sao gravadas sem fuso, no horario de Brasilia (APP_TIMEZONE do backend).
+HISTORY_TIMEZONE = ZoneInfo("America/Sao_Paulo")
+
+
+@dataclass
+class SyncRevision:
+    sync_run_id: str
+    generated_at: datetime
+    changed: set[RowKey] = field(default_factory=set)
+    deleted: set[RowKey] = field(default_factory=set)
+
+
+def apply_changes(changed: set[RowKey], deleted: set[RowKey], new_changed: Iterable[RowKey], new_deleted: Iterable[RowKey]) -> None:
+    for key in new_changed:
+        changed.add(key)
+        deleted.discard(key)
+    for key in new_deleted:
+        deleted.add(key)
+        changed.discard(key)
+
+
+def parse_since(value: str) -> datetime | None:
+    parsed = parse_br_datetime(value)
+    if parsed is not None:
+        return parsed
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(HISTORY_TIMEZONE)
+    return parsed.replace(tzinfo=None)
+
+
+def is_sync_run_id(value: str) -> bool:
+    try:
+        UUID(value.strip())
+    except ValueError:
+        return False
+    return True
+
+
+class BaseRowsHistory:
+    def __init__(self, started_at: datetime, max_revisions: int = HISTORY_MAX_REVISIONS) -> None:
+        self.forms: dict[str, dict[RowKey, tuple[str, int]]] = {}
+        self.revisions: deque[SyncRevision] = deque(maxlen=max_revisions)
+        self.started_at = started_at
+        self.pending = SyncRevision("", started_at)
+        self._sorted_keys: list[RowKey] | None = None
+
+    @classmethod
+    def from_forms(cls, rows_by_form: Mapping[str, Iterable[Mapping[str, str]]], started_at: datetime) -> BaseRowsHistory:
+        history = cls(started_at)
+        for codigo_pesquisa, rows in rows_by_form.items():
+            history.replace_form(codigo_pesquisa, rows)
+        history.pending = SyncRevision("", started_at)
+        return history
+
+    def replace_form(self, codigo_pesquisa: str, rows: Iterable[Mapping[str, str]]) -> None:
+        previous = self.forms.get(codigo_pesquisa, {})
+        current: dict[RowKey, tuple[str, int]] = {}
+        for position, row in enumerate(rows):
+            current[base_row_key(row)] = (base_row_fingerprint(row), position)
+        changed = [
+            key
+            for key, (fingerprint, _) in current.items()
+            if key not in previous or previous[key][0] != fingerprint
+        ]
+        deleted = [key for key in previous if key not in current]
+        apply_changes(self.pending.changed, self.pending.deleted, changed, deleted)
+        self.forms[codigo_pesquisa] = current
+        if len(current) != len(previous) or deleted:
+            self._sorted_keys = None
+
+    def remove_form(self, codigo_pesquisa: str) -> None:
+        previous = self.forms.pop(codigo_pesquisa, None)
+        if previous:
+            apply_changes(self.pending.changed, self.pending.deleted, (), previous)
+            self._sorted_keys = None
+
+    def commit(self, sync_run_id: str, generated_at: datetime) -> SyncRevision:
+        revision = self.pending
+        revision.sync_run_id = sync_run_id
+        revision.generated_at = generated_at
+        if len(self.revisions) == self.revisions.maxlen:
+            self.started_at = self.revisions[0].generated_at
+        self.revisions.append(revision)
+        self.pending = SyncRevision("", generated_at)
+        return revision
+
+    def changes_since(self, since: str) -> tuple[set[RowKey], set[RowKey]] | None:
+        revisions = list(self.revisions)
+        start = next((idx + 1 for idx, revision in enumerate(revisions) if revision.sync_run_id == since), None)
+        if start is None:
+            since_dt = parse_since(since)
+            # Um sync_run_id que ja saiu do historico retido cai na carga completa; texto que nao e data nem id e erro.
+            if since_dt is None and not is_sync_run_id(since):
+                raise ValueError(f"since deve ser um sync_run_id ou uma data: {since!r}")
+            if since_dt is None or since_dt < self.started_at:
+                return None
+            start = next((idx for idx, revision in enumerate(revisions) if revision.generated_at > since_dt), len(revisions))
+        changed: set[RowKey] = set()
+        deleted: set[RowKey] = set()
+        for revision in revisions[start:]:
+            apply_changes(changed, deleted, revision.changed, revision.deleted)
+        return changed, deleted
+
+    def sorted_keys(self) -> list[RowKey]:
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(key for keys in self.forms.values() for key in keys)
+        return self._sorted_keys
+
+    def locate(self, key: RowKey) -> int | None:
+        entry = self.forms.get(key[0], {}).get(key)
+        return entry[1] if entry is not None else None
+
+    @property
+    def latest_sync_run_id(self) -> str:
+        return self.revisions[-1].sync_run_id if self.revisions else ""
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import bisect
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import datetime, timedelta
+
+from empetur_core.datas import parse_br_datetime, parse_iso_timestamp, to_iso_timestamp
+from empetur_core.resumos import load_cadastro_municipios
+
+
+INDEX_FIELDS = (
+    "regiao",
+    "municipio",
+    "categoria",
+    "questionario_preenchido",
+    "pesquisador",
+    "codigo_pesquisa",
+)
+DATE_FIELD = "data_inicio_coleta_ts"
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def ids_to_bitset(ids: Iterable[int], size: int) -> int:
+    buffer = bytearray((size + 7) // 8)
+    for row_id in ids:
+        buffer[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def iter_bitset(bitset: int) -> Iterator[int]:
+    if not bitset:
+        return
+    for position, byte in enumerate(bitset.to_bytes((bitset.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = position << 3
+            for bit in BYTE_BITS[byte]:
+                yield base + bit
+
+
+def count_bitsets(bitsets: Iterable[int]) -> list[int]:
+    # Contador paralelo em fatias de bits: counters[n] guarda o bit n da contagem de cada posicao.
+    counters: list[int] = []
+    for carry in bitsets:
+        for level, counter in enumerate(counters):
+            if not carry:
+                break
+            counters[level], carry = counter ^ carry, counter & carry
+        if carry:
+            counters.append(carry)
+    return counters
+
+
+def count_equals(counters: list[int], count: int, universe: int) -> int:
+    if count >> len(counters):
+        return 0
+    mask = universe
+    for level, counter in enumerate(counters):
+        mask &= counter if count >> level & 1 else universe ^ counter
+        if not mask:
+            break
+    return mask
+
+
+def parse_filter_datetime(value: str | None, end: bool = False) -> datetime | None:
+    value = str(value or "").strip()
+    if not value:
+        return None
+    parsed = parse_br_datetime(value) or parse_iso_timestamp(value)
+    if parsed is None:
+        return None
+    if end and len(value) <= 10:
+        parsed += timedelta(days=1) - timedelta(seconds=1)
+    return parsed
+
+
+class BaseRowIndex:
+    __slots__ = ("rows", "regioes", "size", "all_rows", "bitsets", "date_keys", "date_ids")
+
+    def __init__(self, forms: Iterable[Iterable[Mapping[str, str]]]) -> None:
+        regiao_by_municipio = {item["municipio"]: item["regiao"] for item in load_cadastro_municipios()}
+        self.rows: list[Mapping[str, str]] = []
+        self.regioes: list[str] = []
+        ids_by_value: dict[str, dict[str, list[int]]] = {field: {} for field in INDEX_FIELDS}
+        dated: list[tuple[str, int]] = []
+        for rows in forms:
+            for row in rows:
+                row_id = len(self.rows)
+                regiao = regiao_by_municipio.get(row["municipio"], "")
+                self.rows.append(row)
+                self.regioes.append(regiao)
+                for field in INDEX_FIELDS:
+                    value = regiao if field == "regiao" else row[field]
+                    ids_by_value[field].setdefault(value, []).append(row_id)
+                if row[DATE_FIELD]:
+                    dated.append((row[DATE_FIELD], row_id))
+
+        self.size = len(self.rows)
+        self.all_rows = (1 << self.size) - 1
+        self.bitsets = {
+            field: {value: ids_to_bitset(ids, self.size) for value, ids in values.items()}
+            for field, values in ids_by_value.items()
+        }
+        # As datas ISO da base usam o mesmo fuso, entao a busca binaria pode comparar o texto.
+        dated.sort()
+        self.date_keys = [key for key, _ in dated]
+        self.date_ids = [row_id for _, row_id in dated]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def values(self, field: str) -> list[str]:
+        return sorted(value for value in self.bitsets[field] if value)
+
+    def date_range(self, start: datetime | None, end: datetime | None) -> int:
+        lower = 0 if start is None else bisect.bisect_left(self.date_keys, to_iso_timestamp(start))
+        upper = len(self.date_keys) if end is None else bisect.bisect_right(self.date_keys, to_iso_timestamp(end))
+        return ids_to_bitset(self.date_ids[lower:upper], self.size)
+
+    def match(
+        self,
+        filters: Mapping[str, Iterable[str]],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> int:
+        result = self.all_rows
+        for field, values in filters.items():
+            bitsets = self.bitsets[field]
+            selected = 0
+            for value in values:
+                selected |= bitsets.get(value, 0)
+            result &= selected
+            if not result:
+                return 0
+        if start is not None or end is not None:
+            result &= self.date_range(start, end)
+        return result
+
+    def select(self, bitset: int, offset: int = 0, limit: int | None = None) -> list[dict[str, str]]:
+        out: list[dict[str, str]] = []
+        for position, row_id in enumerate(iter_bitset(bitset)):
+            if position < offset:
+                continue
+            if limit is not None and len(out) >= limit:
+                break
+            row = dict(self.rows[row_id])
+            row["regiao"] = self.regioes[row_id]
+            out.append(row)
+        return out
+
+    def aggregate(self, bitset: int, group_by: list[str]) -> list[dict[str, str | int]]:
+        groups: list[dict[str, str | int]] = []
+
+        def walk(current: int, depth: int, key: dict[str, str]) -> None:
+            if depth == len(group_by):
+                groups.append({**key, "total": current.bit_count()})
+                return
+            field = group_by[depth]
+            for value, value_bitset in self.bitsets[field].items():
+                selected = current & value_bitset
+                if selected:
+                    walk(selected, depth + 1, {**key, field: value})
+
+        if bitset:
+            walk(bitset, 0, {})
+        groups.sort(key=lambda item: (-int(item["total"]), *(str(item[field]) for field in group_by)))
+        return groups
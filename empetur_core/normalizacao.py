@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+
+
+NORMALIZATION_CACHE_SIZE = 8192
+TEST_NAME_PATTERNS = [
+    re.compile(r"^\s*9{2,}\s*$"),
+    re.compile(r"^\s*x{2,}\s*$", re.IGNORECASE),
+    re.compile(r"\bteste(?:s|ndo|ando)?\b", re.IGNORECASE),
+    re.compile(r"\btestar\b", re.IGNORECASE),
+]
+SLUG_SEPARATOR_PATTERN = re.compile(r"[^a-z0-9]+")
+TEST_NAME_PATTERN = re.compile(
+    "|".join(f"(?:{pattern.pattern})" for pattern in TEST_NAME_PATTERNS),
+    re.IGNORECASE,
+)
+
+
+class AccentStripTable(dict):
+    def __init__(self) -> None:
+        super().__init__()
+        # Marcas combinantes fora de Mn sao reordenadas pelo NFD; textos com elas usam o caminho completo.
+        self.unsafe: set[str] = set()
+
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        decomposed = unicodedata.normalize("NFD", char)
+        if any(unicodedata.combining(ch) and unicodedata.category(ch) != "Mn" for ch in decomposed):
+            self.unsafe.add(char)
+        stripped = "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+        self[codepoint] = stripped
+        return stripped
+
+
+ACCENT_STRIP_TABLE = AccentStripTable()
+
+
+def normalize_text(value: str | None) -> str:
+    if value is None:
+        return ""
+    return value.strip()
+
+
+def strip_accents_reference(value: str) -> str:
+    normalized = unicodedata.normalize("NFD", value)
+    return "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
+
+
+def normalize_for_match(value: str) -> str:
+    if value.isascii():
+        return value.strip().lower()
+    without_accents = value.translate(ACCENT_STRIP_TABLE)
+    if ACCENT_STRIP_TABLE.unsafe and not ACCENT_STRIP_TABLE.unsafe.isdisjoint(value):
+        without_accents = strip_accents_reference(value)
+    return without_accents.strip().lower()
+
+
+normalize_for_match_cached = lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)(normalize_for_match)
+
+
+def slugify(value: str) -> str:
+    return SLUG_SEPARATOR_PATTERN.sub("-", normalize_for_match(value)).strip("-")
+
+
+def fix_mojibake(value: str) -> str:
+    if not value or value.isascii():
+        return value
+    if "Ã" not in value and "Â" not in value:
+        return value
+    try:
+        return value.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return value
+
+
+def normalize_cell(value: str) -> str:
+    return fix_mojibake(value.strip())
+
+
+normalize_cell_cached = lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)(normalize_cell)
+
+
+def is_test_record_name(value: str) -> bool:
+    normalized = normalize_for_match(fix_mojibake(value))
+    if not normalized:
+        return False
+    return TEST_NAME_PATTERN.search(normalized) is not None
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from empetur_core.busca import WORD_PATTERN, word_trigrams
+from empetur_core.consolidacao import base_row_key
+from empetur_core.indices import count_bitsets, count_equals, ids_to_bitset, iter_bitset
+from empetur_core.normalizacao import normalize_for_match_cached, slugify
+
+
+MATCH_MIN_SCORE = 0.6
+SUGGESTION_MIN_SCORE = 0.35
+AMBIGUITY_MARGIN = 0.08
+MAX_CORRESPONDENCIAS = 3
+MAX_CANDIDATOS = MAX_CORRESPONDENCIAS + 2
+MAX_REGISTROS = 20
+STOPWORDS = frozenset({"a", "as", "o", "os", "e", "de", "da", "das", "do", "dos", "na", "no"})
+STATUS_ENCONTRADO = "encontrado"
+STATUS_AUSENTE = "ausente"
+STATUS_AMBIGUO = "ambiguo"
+
+
+def build_name_grams(value: str) -> frozenset[str]:
+    words = WORD_PATTERN.findall(normalize_for_match_cached(value))
+    tokens = [word for word in words if word not in STOPWORDS] or words
+    return frozenset().union(*map(word_trigrams, tokens))
+
+
+@dataclass
+class CollectedName:
+    nome_normalizado: str
+    nome_atrativo: str
+    categoria: str
+    questionario_preenchido: str
+    grams: frozenset[str]
+    keys: list[tuple[str, str]] = field(default_factory=list)
+
+
+class CandidateBlock:
+    __slots__ = ("names", "all_names", "gram_bitsets", "categoria_bitsets")
+
+    def __init__(self, names: Iterable[CollectedName]) -> None:
+        # Nomes em ordem crescente de trigramas: no mesmo total de trigramas em comum, o Dice cai ao longo do bloco.
+        self.names = sorted(names, key=lambda item: (len(item.grams), item.nome_normalizado))
+        ids_by_gram: dict[str, list[int]] = {}
+        ids_by_categoria: dict[str, list[int]] = {}
+        for name_id, name in enumerate(self.names):
+            for gram in name.grams:
+                ids_by_gram.setdefault(gram, []).append(name_id)
+            for value in {normalize_for_match_cached(name.categoria), normalize_for_match_cached(name.questionario_preenchido)}:
+                ids_by_categoria.setdefault(value, []).append(name_id)
+        size = len(self.names)
+        self.all_names = (1 << size) - 1
+        self.gram_bitsets = {gram: ids_to_bitset(ids, size) for gram, ids in ids_by_gram.items()}
+        self.categoria_bitsets = {value: ids_to_bitset(ids, size) for value, ids in ids_by_categoria.items() if value}
+
+    def score(
+        self, grams: frozenset[str], categoria: str, min_score: float, limit: int
+    ) -> list[tuple[float, CollectedName]]:
+        candidates = self.categoria_bitsets.get(categoria, self.all_names)
+        counters = count_bitsets(
+            self.gram_bitsets[gram] & candidates for gram in grams if gram in self.gram_bitsets
+        )
+        size = len(grams)
+        required = max(math.ceil(min_score * size / (2 - min_score)), 1)
+        scored: list[tuple[float, CollectedName]] = []
+        for shared in range(size, required - 1, -1):
+            floor = max(min_score, scored[limit - 1][0] if len(scored) >= limit else 0.0)
+            if 2 * shared / (size + shared) < floor:
+                break
+            for name_id in iter_bitset(count_equals(counters, shared, candidates)):
+                name = self.names[name_id]
+                score = 2 * shared / (size + len(name.grams))
+                if score < floor:
+                    break
+                scored.append((score, name))
+            scored.sort(key=lambda item: (-item[0], -len(item[1].keys), item[1].nome_atrativo))
+            del scored[limit:]
+        return scored
+
+
+def build_collected_blocks(rows: Iterable[Mapping[str, str]]) -> dict[str, CandidateBlock]:
+    names_by_municipio: dict[str, dict[tuple[str, str, str], CollectedName]] = {}
+    for row in rows:
+        nome = row["nome_atrativo"]
+        nome_normalizado = normalize_for_match_cached(nome)
+        if not nome_normalizado:
+            continue
+        names = names_by_municipio.setdefault(slugify(row["municipio"]), {})
+        name_key = (nome_normalizado, row["categoria"], row["questionario_preenchido"])
+        name = names.get(name_key)
+        if name is None:
+            name = names[name_key] = CollectedName(
+                nome_normalizado,
+                nome,
+                row["categoria"],
+                row["questionario_preenchido"],
+                build_name_grams(nome),
+            )
+        name.keys.append(base_row_key(row))
+
+    return {municipio_slug: CandidateBlock(names.values()) for municipio_slug, names in names_by_municipio.items()}
+
+
+def reconcile_previsto(
+    previsto: Mapping[str, str], block: CandidateBlock | None
+) -> tuple[dict[str, Any], CollectedName | None]:
+    grams = build_name_grams(previsto.get("atrativo", ""))
+    categoria = normalize_for_match_cached(previsto.get("categoria", ""))
+    scored = block.score(grams, categoria, SUGGESTION_MIN_SCORE, MAX_CANDIDATOS) if block is not None and grams else []
+
+    status = STATUS_AUSENTE
+    best: CollectedName | None = None
+    if scored and scored[0][0] >= MATCH_MIN_SCORE:
+        best_score, best = scored[0]
+        rival = next((score for score, name in scored[1:] if name.nome_normalizado != best.nome_normalizado), 0.0)
+        exact = best.nome_normalizado == normalize_for_match_cached(previsto.get("atrativo", ""))
+        ambiguous = not exact and rival >= MATCH_MIN_SCORE and best_score - rival < AMBIGUITY_MARGIN
+        status = STATUS_AMBIGUO if ambiguous else STATUS_ENCONTRADO
+
+    result = {
+        **previsto,
+        "status": status,
+        "similaridade": round(scored[0][0], 4) if scored else 0.0,
+        "correspondencias": [
+            {
+                "nome_atrativo": name.nome_atrativo,
+                "categoria": name.categoria,
+                "questionario_preenchido": name.questionario_preenchido,
+                "similaridade": round(score, 4),
+                "total": len(name.keys),
+                "registros": [list(key) for key in name.keys[:MAX_REGISTROS]],
+            }
+            for score, name in scored[:MAX_CORRESPONDENCIAS]
+        ],
+    }
+    return result, best
+
+
+def reconcile_previstos(
+    previstos: Iterable[Mapping[str, str]], blocks: Mapping[str, CandidateBlock]
+) -> dict[str, Any]:
+    resultados: dict[str, list[dict[str, Any]]] = {}
+    matched_names: dict[str, set[str]] = {}
+    for previsto in previstos:
+        municipio_slug = previsto["municipio_slug"]
+        result, best = reconcile_previsto(previsto, blocks.get(municipio_slug))
+        resultados.setdefault(municipio_slug, []).append(result)
+        if best is not None:
+            matched_names.setdefault(municipio_slug, set()).add(best.nome_normalizado)
+
+    municipios: dict[str, dict[str, int]] = {}
+    for municipio_slug, rows in resultados.items():
+        block = blocks.get(municipio_slug)
+        collected = {name.nome_normalizado for name in block.names} if block is not None else set()
+        municipios[municipio_slug] = {
+            "previstos": len(rows),
+            "encontrados": sum(1 for row in rows if row["status"] == STATUS_ENCONTRADO),
+            "ambiguos": sum(1 for row in rows if row["status"] == STATUS_AMBIGUO),
+            "ausentes": sum(1 for row in rows if row["status"] == STATUS_AUSENTE),
+            "realizados_sem_previsto": len(collected - matched_names.get(municipio_slug, set())),
+        }
+    totais = {
+        key: sum(item[key] for item in municipios.values())
+        for key in ("previstos", "encontrados", "ambiguos", "ausentes", "realizados_sem_previsto")
+    }
+    return {"totais": totais, "municipios": municipios, "resultados": resultados}
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import csv
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+from empetur_core.datas import br_to_iso_timestamp, format_br_datetime, parse_iso_timestamp
+from empetur_core.normalizacao import normalize_text
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REFERENCE_DIR = BASE_DIR / "data" / "referencias"
+SUMMARY_FIELDS = ("municipio", "questionario_preenchido", "pesquisador", "categoria", "data_inicio_coleta_ts")
+
+REFERENCE_CACHE: dict[Path, tuple[tuple[int, int], Any]] = {}
+
+
+def load_reference(path: Path, loader: Callable[[Path], Any]) -> Any:
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = REFERENCE_CACHE.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    data = loader(path)
+    REFERENCE_CACHE[path] = (signature, data)
+    return data
+
+
+def read_cadastro_municipios(path: Path) -> list[dict[str, str]]:
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def read_total_previsto(path: Path) -> dict[str, int]:
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    out: dict[str, int] = {}
+    for row in rows:
+        raw = normalize_text(row.get("total_previsto", ""))
+        if raw == "":
+            out[row["municipio"]] = 0
+            continue
+        try:
+            out[row["municipio"]] = int(float(raw.replace(",", ".")))
+        except ValueError:
+            out[row["municipio"]] = 0
+    return out
+
+
+def load_cadastro_municipios() -> list[dict[str, str]]:
+    cadastro = load_reference(REFERENCE_DIR / "cadastro_municipios.csv", read_cadastro_municipios)
+    return [dict(item) for item in cadastro]
+
+
+def load_total_previsto() -> dict[str, int]:
+    path = REFERENCE_DIR / "total_previsto_municipios.csv"
+    if not path.exists():
+        return {}
+    return dict(load_reference(path, read_total_previsto))
+
+
+def summary_timestamp(row: Mapping[str, str]) -> str:
+    # Linhas anteriores a data_inicio_coleta_ts derivam o carimbo ISO da data no formato brasileiro.
+    if "data_inicio_coleta_ts" in row:
+        return row["data_inicio_coleta_ts"]
+    return br_to_iso_timestamp(row["data_inicio_coleta"])
+
+
+def iter_summary_values(rows: Iterable[Mapping[str, str]]) -> Iterator[tuple[str, ...]]:
+    fields = SUMMARY_FIELDS[:-1]
+    column = getattr(rows, "column", None)
+    if column is not None:
+        if "data_inicio_coleta_ts" in rows.fieldnames:
+            timestamps = column("data_inicio_coleta_ts")
+        else:
+            timestamps = map(br_to_iso_timestamp, column("data_inicio_coleta"))
+        return zip(*(column(field) for field in fields), timestamps)
+    return ((*(row[field] for field in fields), summary_timestamp(row)) for row in rows)
+
+
+class ResumoAccumulator:
+    __slots__ = (
+        "municipios",
+        "primeira_por_municipio",
+        "ultima_por_municipio",
+        "questionarios",
+        "pesquisadores",
+        "municipio_categoria",
+    )
+
+    def __init__(self) -> None:
+        self.municipios: Counter[str] = Counter()
+        # Datas ISO com o mesmo fuso: a ordem do texto e a ordem cronologica.
+        self.primeira_por_municipio: dict[str, str] = {}
+        self.ultima_por_municipio: dict[str, str] = {}
+        self.questionarios: Counter[str] = Counter()
+        self.pesquisadores: Counter[str] = Counter()
+        self.municipio_categoria: Counter[tuple[str, str]] = Counter()
+
+    def add_rows(self, rows: Iterable[Mapping[str, str]]) -> ResumoAccumulator:
+        municipios = self.municipios
+        primeira = self.primeira_por_municipio
+        ultima = self.ultima_por_municipio
+        questionarios = self.questionarios
+        pesquisadores = self.pesquisadores
+        municipio_categoria = self.municipio_categoria
+        for municipio, questionario, pesquisador, categoria, data_inicio in iter_summary_values(rows):
+            municipios[municipio] += 1
+            questionarios[questionario] += 1
+            if normalize_text(pesquisador):
+                pesquisadores[pesquisador] += 1
+            municipio_categoria[(municipio, categoria)] += 1
+            if not data_inicio:
+                continue
+            current = primeira.get(municipio)
+            if current is None or data_inicio < current:
+                primeira[municipio] = data_inicio
+            current = ultima.get(municipio)
+            if current is None or data_inicio > current:
+                ultima[municipio] = data_inicio
+        return self
+
+    def merge_counts(self, other: ResumoAccumulator) -> None:
+        self.municipios += other.municipios
+        self.questionarios += other.questionarios
+        self.pesquisadores += other.pesquisadores
+        self.municipio_categoria += other.municipio_categoria
+
+    def subtract_counts(self, other: ResumoAccumulator) -> None:
+        self.municipios -= other.municipios
+        self.questionarios -= other.questionarios
+        self.pesquisadores -= other.pesquisadores
+        self.municipio_categoria -= other.municipio_categoria
+
+    def merge_dates(self, other: ResumoAccumulator) -> None:
+        for municipio, value in other.primeira_por_municipio.items():
+            current = self.primeira_por_municipio.get(municipio)
+            if current is None or value < current:
+                self.primeira_por_municipio[municipio] = value
+        for municipio, value in other.ultima_por_municipio.items():
+            current = self.ultima_por_municipio.get(municipio)
+            if current is None or value > current:
+                self.ultima_por_municipio[municipio] = value
+
+    def build(self, cadastro: list[dict[str, str]], previstos: dict[str, int]) -> dict[str, list[dict[str, str]]]:
+        resumo_municipios: list[dict[str, str]] = []
+        for item in cadastro:
+            municipio = item["municipio"]
+            total_realizado = self.municipios.get(municipio, 0)
+            total_previsto = previstos.get(municipio, 0)
+            faltante = max(total_previsto - total_realizado, 0)
+            percentual = round((total_realizado / total_previsto) * 100, 2) if total_previsto > 0 else 0
+            resumo_municipios.append(
+                {
+                    "regiao": item["regiao"],
+                    "ordem_regiao": item["ordem_regiao"],
+                    "municipio": municipio,
+                    "ordem_municipio": item["ordem_municipio"],
+                    "total_realizado": str(total_realizado),
+                    "total_previsto": str(total_previsto),
+                    "faltante": str(faltante),
+                    "percentual_cobertura": f"{percentual:.2f}",
+                    "primeira_coleta": format_br_datetime(
+                        parse_iso_timestamp(self.primeira_por_municipio.get(municipio))
+                    ),
+                    "ultima_coleta": format_br_datetime(parse_iso_timestamp(self.ultima_por_municipio.get(municipio))),
+                }
+            )
+
+        resumo_questionarios = [
+            {"questionario_preenchido": nome, "total": str(total)}
+            for nome, total in sorted(self.questionarios.items(), key=lambda item: (-item[1], item[0]))
+        ]
+        resumo_pesquisadores = [
+            {"pesquisador": nome, "total": str(total)}
+            for nome, total in sorted(self.pesquisadores.items(), key=lambda item: (-item[1], item[0]))
+        ]
+        resumo_municipio_categoria = [
+            {"municipio": municipio, "categoria": categoria, "total": str(total)}
+            for (municipio, categoria), total in sorted(self.municipio_categoria.items(), key=lambda item: item[0])
+        ]
+
+        return {
+            "cadastro_municipios": cadastro,
+            "resumo_municipios": resumo_municipios,
+            "resumo_questionarios": resumo_questionarios,
+            "resumo_pesquisadores": resumo_pesquisadores,
+            "resumo_municipio_categoria": resumo_municipio_categoria,
+        }
+
+
+def build_resumos(all_rows: Iterable[Mapping[str, str]]) -> dict[str, list[dict[str, str]]]:
+    return ResumoAccumulator().add_rows(all_rows).build(load_cadastro_municipios(), load_total_previsto())
+
+
+class ResumoState:
+    __slots__ = ("forms", "rows_by_form", "totals")
+
+    def __init__(self) -> None:
+        self.forms: dict[str, ResumoAccumulator] = {}
+        self.rows_by_form: dict[str, Iterable[Mapping[str, str]]] = {}
+        self.totals = ResumoAccumulator()
+
+    def replace_form(self, codigo_pesquisa: str, rows: Iterable[Mapping[str, str]]) -> None:
+        previous = self.forms.get(codigo_pesquisa)
+        if previous is not None:
+            self.totals.subtract_counts(previous)
+        accumulator = ResumoAccumulator().add_rows(rows)
+        self.forms[codigo_pesquisa] = accumulator
+        self.rows_by_form[codigo_pesquisa] = rows
+        self.totals.merge_counts(accumulator)
+
+    def remove_form(self, codigo_pesquisa: str) -> bool:
+        previous = self.forms.pop(codigo_pesquisa, None)
+        if previous is None:
+            return False
+        del self.rows_by_form[codigo_pesquisa]
+        self.totals.subtract_counts(previous)
+        return True
+
+    def has_form(self, codigo_pesquisa: str) -> bool:
+        return codigo_pesquisa in self.forms
+
+    def get_form_rows(self, codigo_pesquisa: str) -> Iterable[Mapping[str, str]]:
+        return self.rows_by_form.get(codigo_pesquisa, [])
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows_by_form.values())
+
+    def __iter__(self) -> Iterator[Mapping[str, str]]:
+        for rows in self.rows_by_form.values():
+            yield from rows
+
+    def to_dicts(self) -> list[dict[str, str]]:
+        out: list[dict[str, str]] = []
+        for rows in self.rows_by_form.values():
+            to_dicts = getattr(rows, "to_dicts", None)
+            out.extend(to_dicts() if to_dicts is not None else (dict(row) for row in rows))
+        return out
+
+    def build(self, cadastro: list[dict[str, str]], previstos: dict[str, int]) -> dict[str, list[dict[str, str]]]:
+        self.totals.primeira_por_municipio = {}
+        self.totals.ultima_por_municipio = {}
+        for accumulator in self.forms.values():
+            self.totals.merge_dates(accumulator)
+        return self.totals.build(cadastro, previstos)
+
+    def build_resumos(self) -> dict[str, list[dict[str, str]]]:
+        return self.build(load_cadastro_municipios(), load_total_previsto())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import tempfile
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+DEFAULT_FILE_MODE = 0o644
+
+
+def dumps_json(payload: Any, compact: bool = True) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=0 if compact else orjson.OPT_INDENT_2)
+        except TypeError:
+            pass
+    if compact:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+@contextmanager
+def atomic_open(path: Path, mode: str = "wb", **kwargs: Any) -> Iterator[IO[Any]]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_name, path.stat().st_mode & 0o777 if path.exists() else DEFAULT_FILE_MODE)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_bytes_atomic(path: Path, content: bytes) -> None:
+    with atomic_open(path) as f:
+        f.write(content)
+
+
+def write_json_files(paths: Iterable[Path], payload: Any, compact: bool = False) -> bytes:
+    content = dumps_json(payload, compact=compact)
+    for path in paths:
+        write_bytes_atomic(path, content)
+    return content
+
+
+def write_csv_atomic(path: Path, fieldnames: list[str], rows: Iterable[Mapping[str, str]]) -> None:
+    with atomic_open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import csv
+import io
+import random
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from empetur_core.consolidacao import (
+    FILE_PREFIX,
+    RULES_BY_QUESTIONARIO,
+    FileRule,
+    fill_typed_timestamps,
+    get_rule_for_questionario,
+)
+from empetur_core.datas import format_br_datetime
+from empetur_core.resumos import load_cadastro_municipios
+
+
+SYNTHETIC_SEED = 42
+SYNTHETIC_YEAR = 2026
+SYNTHETIC_EXEC_DATE = "18/10/2026"
+SYNTHETIC_EXEC_TIMESTAMP = "18/10/2026 09:00:00"
+SYNTHETIC_SYNC_RUN_ID = "3f7c2d2e-0000-4000-8000-000000000001"
+MOJIBAKE_RATE = 0.03
+TEST_ROW_RATE = 0.01
+FUZZY_HEADER_RATE = 0.25
+MOJIBAKE_HEADER_RATE = 0.1
+CP1252_FILE_RATE = 0.15
+EMPTY_FIM_RATE = 0.05
+CATEGORIAS = [
+    "Museu",
+    "Igreja",
+    "Açude",
+    "Mercado Público",
+    "Artesão",
+    "Restaurante",
+    "Pousada",
+    "Praça",
+    "Cachoeira",
+    "Festa de São João",
+]
+NOME_PREFIXOS = [
+    "Igreja Matriz de",
+    "Capela de",
+    "Museu do",
+    "Açude do",
+    "Mercado Público de",
+    "Pousada",
+    "Restaurante",
+    "Praça",
+    "Serra do",
+    "Cachoeira do",
+    "Casa de Cultura",
+    "Feira Livre de",
+]
+NOME_SUFIXOS = [
+    "São José",
+    "Nossa Senhora da Conceição",
+    "Cangaço",
+    "Poço da Cruz",
+    "Sertão",
+    "Santa Luzia",
+    "Sol Nascente",
+    "Padre Cícero",
+    "Gonçalves",
+    "Vale do Pajeú",
+]
+NOMES_TESTE = ["Teste", "TESTE", "teste app", "Testes", "testar cadastro", "xxxx", "9999"]
+PESQUISADORES = [
+    "Ana Lúcia Ferreira",
+    "João Batista",
+    "Márcia Gonçalves",
+    "José Antônio Silva",
+    "Iraci Conceição",
+    "Sebastião Araújo",
+    "Luíza Melo",
+    "Cícero Nunes",
+]
+FILLER_COLUMNS = [
+    "P2. Endereço",
+    "P3. Telefone",
+    "P4. E-mail",
+    "P5. Horário de funcionamento",
+    "Latitude",
+    "Longitude",
+    "Observações",
+]
+
+
+@dataclass(frozen=True)
+class SyntheticExport:
+    file_name: str
+    questionario: str
+    content: bytes
+    encoding: str
+    linhas: int
+    linhas_teste: int
+
+
+def to_mojibake(value: str) -> str:
+    return value.encode("utf-8").decode("latin-1")
+
+
+def fuzzy_header(expected: str, rnd: random.Random) -> str:
+    # Sem uma letra o cabecalho deixa de casar por prefixo e so e achado pela comparacao aproximada.
+    position = rnd.randrange(min(3, len(expected) - 1), len(expected) - 1)
+    return expected[:position] + expected[position + 1 :]
+
+
+def header_variant(expected: str, rnd: random.Random, fuzzy_rate: float) -> str:
+    choice = rnd.random()
+    if len(expected) >= 8 and choice < fuzzy_rate:
+        return fuzzy_header(expected, rnd)
+    if choice < (1 + fuzzy_rate) / 2:
+        return f"{expected}{rnd.choice(['', ':', ' (obrigatório)', ' - resposta'])}"
+    return f"{rnd.choice(['Q', 'Pergunta', 'P1'])} - {expected}"
+
+
+def build_synthetic_header(rule: FileRule, rnd: random.Random, fuzzy_rate: float) -> list[str]:
+    header = [
+        "Nro. Identificação",
+        "Data Início",
+        "Data Fim",
+        header_variant("P0. Município", rnd, 0.0),
+    ]
+    if rule.categoria_header_startswith is not None:
+        header.append(header_variant(rule.categoria_header_startswith, rnd, 0.0))
+    header.append(header_variant(rule.nome_header_startswith, rnd, fuzzy_rate))
+    header.extend(rnd.sample(FILLER_COLUMNS, rnd.randint(2, len(FILLER_COLUMNS))))
+    header.extend(["Pesquisador: Nome do pesquisador", "Pesquisador"])
+    return header
+
+
+def synthetic_file_name(questionario: str) -> str:
+    return f"{FILE_PREFIX}{questionario} - {SYNTHETIC_YEAR}.csv"
+
+
+def split_total(total: int, parts: int, rnd: random.Random) -> list[int]:
+    weights = [rnd.uniform(0.2, 1.0) for _ in range(parts)]
+    scale = total / sum(weights)
+    sizes = [int(weight * scale) for weight in weights]
+    sizes[-1] += total - sum(sizes)
+    return sizes
+
+
+def synthetic_name(rnd: random.Random, municipio: str) -> str:
+    sufixo = municipio if rnd.random() < 0.3 else rnd.choice(NOME_SUFIXOS)
+    return f"{rnd.choice(NOME_PREFIXOS)} {sufixo} {rnd.randint(1, 400)}"
+
+
+class SyntheticForm:
+    def __init__(
+        self,
+        questionario: str,
+        rnd: random.Random,
+        municipios: list[str],
+        mojibake_rate: float = MOJIBAKE_RATE,
+        test_rate: float = TEST_ROW_RATE,
+        fuzzy_rate: float = FUZZY_HEADER_RATE,
+    ) -> None:
+        self.questionario = questionario
+        self.rule = get_rule_for_questionario(questionario)
+        self.rnd = rnd
+        self.municipios = municipios
+        self.test_rate = test_rate
+        self.header = build_synthetic_header(self.rule, rnd, fuzzy_rate)
+        self.fillers = len(self.header) - (8 if self.rule.categoria_header_startswith is not None else 7)
+        # Mojibake so aparece em arquivos UTF-8, como nas exportacoes que passaram duas vezes pela conversao.
+        self.encoding = "cp1252" if rnd.random() < CP1252_FILE_RATE else "utf-8-sig"
+        self.mojibake_rate = 0.0 if self.encoding == "cp1252" else mojibake_rate
+        if self.mojibake_rate and rnd.random() < MOJIBAKE_HEADER_RATE:
+            self.header = [to_mojibake(column) for column in self.header]
+        self.linhas = 0
+        self.linhas_teste = 0
+
+    def next_row(self, inicio: datetime | None = None) -> list[str]:
+        rnd = self.rnd
+        self.linhas += 1
+        municipio = rnd.choice(self.municipios)
+        if rnd.random() < self.test_rate:
+            nome = rnd.choice(NOMES_TESTE)
+            self.linhas_teste += 1
+        else:
+            nome = synthetic_name(rnd, municipio)
+        pesquisador = rnd.choice(PESQUISADORES)
+        if inicio is None:
+            inicio = datetime(SYNTHETIC_YEAR, 1, 1, 7) + timedelta(days=rnd.randrange(180), minutes=rnd.randrange(660))
+        fim = inicio + timedelta(minutes=rnd.randint(5, 90))
+        values = [municipio, rnd.choice(CATEGORIAS), nome, pesquisador]
+        if self.mojibake_rate:
+            values = [to_mojibake(value) if rnd.random() < self.mojibake_rate else value for value in values]
+        fim_texto = "" if rnd.random() < EMPTY_FIM_RATE else format_br_datetime(fim)
+        row = [str(self.linhas), format_br_datetime(inicio), fim_texto, values[0]]
+        if self.rule.categoria_header_startswith is not None:
+            row.append(values[1])
+        row.append(f" {values[2]} " if rnd.random() < 0.05 else values[2])
+        row.extend(str(rnd.randint(0, 99_999)) for _ in range(self.fillers))
+        row.extend([values[3] if rnd.random() < 0.8 else "", "Sistema iPesquisa"])
+        return row
+
+    def encode(self, rows: Iterable[list[str]]) -> bytes:
+        out = io.StringIO(newline="")
+        writer = csv.writer(out)
+        writer.writerow(self.header)
+        writer.writerows(rows)
+        return out.getvalue().encode(self.encoding)
+
+
+def build_synthetic_export(
+    questionario: str,
+    linhas: int,
+    rnd: random.Random,
+    municipios: list[str],
+    mojibake_rate: float = MOJIBAKE_RATE,
+    test_rate: float = TEST_ROW_RATE,
+    fuzzy_rate: float = FUZZY_HEADER_RATE,
+) -> SyntheticExport:
+    form = SyntheticForm(questionario, rnd, municipios, mojibake_rate, test_rate, fuzzy_rate)
+    content = form.encode(form.next_row() for _ in range(linhas))
+    return SyntheticExport(
+        file_name=synthetic_file_name(questionario),
+        questionario=questionario,
+        content=content,
+        encoding=form.encoding,
+        linhas=form.linhas,
+        linhas_teste=form.linhas_teste,
+    )
+
+
+def iter_synthetic_exports(
+    total: int,
+    seed: int = SYNTHETIC_SEED,
+    mojibake_rate: float = MOJIBAKE_RATE,
+    test_rate: float = TEST_ROW_RATE,
+    fuzzy_rate: float = FUZZY_HEADER_RATE,
+) -> Iterator[SyntheticExport]:
+    rnd = random.Random(seed)
+    municipios = [item["municipio"] for item in load_cadastro_municipios()]
+    questionarios = list(RULES_BY_QUESTIONARIO)
+    for questionario, linhas in zip(questionarios, split_total(total, len(questionarios), rnd)):
+        yield build_synthetic_export(questionario, linhas, rnd, municipios, mojibake_rate, test_rate, fuzzy_rate)
+
+
+def iter_synthetic_base_rows(total: int, seed: int = SYNTHETIC_SEED) -> Iterator[dict[str, str]]:
+    rnd = random.Random(seed)
+    municipios = [item["municipio"] for item in load_cadastro_municipios()]
+    questionarios = list(RULES_BY_QUESTIONARIO)
+    categorias = CATEGORIAS[:8]
+    pesquisadores = [f"Pesquisador {idx:02d}" for idx in range(40)]
+    for idx in range(total):
+        questionario = questionarios[idx % len(questionarios)]
+        pesquisador = rnd.choice(pesquisadores)
+        dia = rnd.randint(1, 28)
+        mes = rnd.randint(1, 6)
+        data = f"{dia:02d}/{mes:02d}/{SYNTHETIC_YEAR}"
+        row = {
+            "arquivo_origem": synthetic_file_name(questionario),
+            "codigo_pesquisa": str(8899 + idx % len(questionarios)),
+            "questionario_preenchido": questionario,
+            "nro_identificacao": str(idx + 1),
+            "municipio": rnd.choice(municipios),
+            "categoria": rnd.choice(categorias),
+            "nome_atrativo": f"Atrativo {rnd.randint(1, 50_000)}",
+            "pesquisador_informado": pesquisador,
+            "pesquisador_sistema": pesquisador,
+            "pesquisador": pesquisador,
+            "data_inicio_coleta": f"{data} {rnd.randint(7, 18):02d}:{rnd.randint(0, 59):02d}:00",
+            "data_fim_coleta": f"{data} {rnd.randint(7, 18):02d}:{rnd.randint(0, 59):02d}:00",
+            "linha_origem": str(idx // len(questionarios) + 2),
+            "data_execucao_carga": SYNTHETIC_EXEC_DATE,
+            "data_hora_execucao_carga": SYNTHETIC_EXEC_TIMESTAMP,
+            "sync_run_id": SYNTHETIC_SYNC_RUN_ID,
+        }
+        yield fill_typed_timestamps(row)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from empetur_core.armazenamento import BaseRowStore
+from empetur_core.consolidacao import build_resumos
+from empetur_core.sintetico import iter_synthetic_base_rows
+
+
+def measure_memory(label: str, build) -> object:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} retido {current / 1_048_576:8.1f} MiB  pico {peak / 1_048_576:8.1f} MiB  {elapsed:6.2f} s")
+    return result, current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara a memoria da base em dicts com o BaseRowStore.")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows, dict_bytes = measure_memory("lista de dicts", lambda: list(iter_synthetic_base_rows(args.linhas, args.seed)))
+    store, store_bytes = measure_memory("BaseRowStore", lambda: BaseRowStore(iter_synthetic_base_rows(args.linhas, args.seed)))
+    print(f"reducao        {(1 - store_bytes / dict_bytes) * 100:8.1f} %")
+
+    if store.to_dicts() != rows:
+        raise SystemExit("BaseRowStore divergiu da lista de dicts.")
+    if build_resumos(store) != build_resumos(rows):
+        raise SystemExit("build_resumos divergiu entre BaseRowStore e lista de dicts.")
+
+
+if __name__ == "__main__":
+    main()
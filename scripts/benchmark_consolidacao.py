@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from empetur_core.consolidacao import (
+    build_dashboard_payload,
+    build_resumos,
+    consolidate_csv_content,
+    decode_csv_bytes,
+    get_rule_for_questionario,
+    header_matches,
+    parse_csv_text,
+    write_json,
+)
+from empetur_core.normalizacao import fix_mojibake, normalize_for_match
+from empetur_core.sintetico import (
+    FUZZY_HEADER_RATE,
+    MOJIBAKE_RATE,
+    SYNTHETIC_EXEC_DATE,
+    SYNTHETIC_EXEC_TIMESTAMP,
+    SYNTHETIC_SEED,
+    TEST_ROW_RATE,
+    SyntheticExport,
+    iter_synthetic_exports,
+)
+
+FIXED_HEADER_PREFIXES = ("P0. Munic", "Nro. Identifica", "Data In", "Data Fim")
+HEADER_MIN_CALLS = 20_000
+MIB = 1_048_576
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Mede tempo e memoria dos pontos quentes da consolidacao sobre exportacoes sinteticas."
+    )
+    parser.add_argument("--linhas", type=int, default=100_000, help="total de linhas geradas (de 1000 a 1000000)")
+    parser.add_argument("--seed", type=int, default=SYNTHETIC_SEED)
+    parser.add_argument("--repeticoes", type=int, default=3, help="execucoes cronometradas de cada caso")
+    parser.add_argument("--mojibake", type=float, default=MOJIBAKE_RATE, help="fracao de celulas com mojibake")
+    parser.add_argument("--testes", type=float, default=TEST_ROW_RATE, help="fracao de linhas de teste")
+    parser.add_argument("--fuzzy", type=float, default=FUZZY_HEADER_RATE, help="fracao de cabecalhos aproximados")
+    parser.add_argument("--compact", action="store_true", help="mede o write_json sem indentacao")
+    parser.add_argument("--sem-memoria", action="store_true", help="pula a execucao extra com tracemalloc")
+    parser.add_argument("--saida", type=Path, help="arquivo JSON com o resultado (padrao: imprime na saida padrao)")
+    parser.add_argument("--comparar", type=Path, help="resultado JSON anterior para comparar as medianas")
+    args = parser.parse_args()
+    if not 1_000 <= args.linhas <= 1_000_000:
+        parser.error("--linhas deve ficar entre 1000 e 1000000")
+    if args.repeticoes < 1:
+        parser.error("--repeticoes deve ser pelo menos 1")
+    return args
+
+
+def measure_case(
+    nome: str, func: Callable[[], Any], itens: int, repeticoes: int, memoria: bool
+) -> dict[str, Any]:
+    tempos: list[float] = []
+    for _ in range(repeticoes):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - started)
+    mediana = statistics.median(tempos)
+    result: dict[str, Any] = {
+        "caso": nome,
+        "itens": itens,
+        "repeticoes": repeticoes,
+        "tempo_ms": {
+            "primeira": round(tempos[0] * 1000, 3),
+            "minimo": round(min(tempos) * 1000, 3),
+            "mediana": round(mediana * 1000, 3),
+            "maximo": round(max(tempos) * 1000, 3),
+        },
+        "us_por_item": round(mediana / itens * 1_000_000, 4) if itens else 0.0,
+        "itens_por_segundo": round(itens / mediana) if mediana else 0,
+    }
+    if memoria:
+        # Execucao separada, porque o tracemalloc distorce os tempos; o resultado fica vivo ate a leitura da memoria.
+        gc.collect()
+        tracemalloc.start()
+        _, (current, peak) = func(), tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["memoria_mib"] = {"retida": round(current / MIB, 3), "pico": round(peak / MIB, 3)}
+    return result
+
+
+def build_header_pairs(exports: list[SyntheticExport]) -> list[tuple[str, str]]:
+    pairs: list[tuple[str, str]] = []
+    for export in exports:
+        header = [fix_mojibake(column) for column in parse_csv_text(decode_csv_bytes(export.content))[0]]
+        rule = get_rule_for_questionario(export.questionario)
+        expected = [*FIXED_HEADER_PREFIXES, rule.nome_header_startswith]
+        if rule.categoria_header_startswith is not None:
+            expected.append(rule.categoria_header_startswith)
+        pairs.extend((column, prefix) for column in header for prefix in expected)
+    return pairs * max(1, HEADER_MIN_CALLS // max(len(pairs), 1))
+
+
+def build_match_values(exports: list[SyntheticExport]) -> list[str]:
+    return [
+        value
+        for export in exports
+        for row in parse_csv_text(decode_csv_bytes(export.content))[1:]
+        for value in row
+    ]
+
+
+def run_suite(args: argparse.Namespace) -> dict[str, Any]:
+    started = time.perf_counter()
+    exports = list(iter_synthetic_exports(args.linhas, args.seed, args.mojibake, args.testes, args.fuzzy))
+    tempo_geracao = time.perf_counter() - started
+    memoria = not args.sem_memoria
+
+    def consolidate_all() -> list[dict[str, str]]:
+        rows: list[dict[str, str]] = []
+        for export in exports:
+            rows.extend(
+                consolidate_csv_content(export.file_name, export.content, SYNTHETIC_EXEC_DATE, SYNTHETIC_EXEC_TIMESTAMP)
+            )
+        return rows
+
+    rows = consolidate_all()
+    esperadas = sum(export.linhas - export.linhas_teste for export in exports)
+    if len(rows) != esperadas:
+        raise SystemExit(f"Consolidacao devolveu {len(rows)} linhas; esperado {esperadas}.")
+
+    header_pairs = build_header_pairs(exports)
+    match_values = build_match_values(exports)
+    resumos = build_resumos(rows)
+    payload = build_dashboard_payload(rows, SYNTHETIC_EXEC_DATE, SYNTHETIC_EXEC_TIMESTAMP, resumos)
+
+    resultados: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="empetur-benchmark-") as temp_dir:
+        json_path = Path(temp_dir) / "dashboard_payload.json"
+        casos: list[tuple[str, Callable[[], Any], int]] = [
+            ("consolidate_csv_content", consolidate_all, args.linhas),
+            (
+                "header_matches",
+                lambda: [header_matches(column, prefix) for column, prefix in header_pairs],
+                len(header_pairs),
+            ),
+            (
+                "normalize_for_match",
+                lambda: [normalize_for_match(value) for value in match_values],
+                len(match_values),
+            ),
+            ("build_resumos", lambda: build_resumos(rows), len(rows)),
+            (
+                "build_dashboard_payload",
+                lambda: build_dashboard_payload(rows, SYNTHETIC_EXEC_DATE, SYNTHETIC_EXEC_TIMESTAMP),
+                len(rows),
+            ),
+            ("write_json", lambda: write_json(json_path, payload, compact=args.compact), len(rows)),
+        ]
+        for nome, func, itens in casos:
+            result = measure_case(nome, func, itens, args.repeticoes, memoria)
+            resultados.append(result)
+            print(
+                f"{nome:<24} {result['tempo_ms']['mediana']:10.1f} ms  {result['us_por_item']:9.3f} us/item",
+                file=sys.stderr,
+            )
+        tamanho_json = json_path.stat().st_size
+
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "implementacao": platform.python_implementation(),
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine(),
+        },
+        "parametros": {
+            "linhas": args.linhas,
+            "seed": args.seed,
+            "repeticoes": args.repeticoes,
+            "mojibake": args.mojibake,
+            "testes": args.testes,
+            "fuzzy": args.fuzzy,
+            "compact": args.compact,
+            "memoria": memoria,
+        },
+        "dados": {
+            "arquivos": len(exports),
+            "arquivos_cp1252": sum(1 for export in exports if export.encoding == "cp1252"),
+            "bytes_csv": sum(len(export.content) for export in exports),
+            "linhas_geradas": args.linhas,
+            "linhas_teste": sum(export.linhas_teste for export in exports),
+            "linhas_consolidadas": len(rows),
+            "bytes_json": tamanho_json,
+            "tempo_geracao_ms": round(tempo_geracao * 1000, 3),
+        },
+        "resultados": resultados,
+    }
+
+
+def compare_results(current: dict[str, Any], previous_path: Path) -> list[dict[str, Any]]:
+    previous = json.loads(previous_path.read_text(encoding="utf-8"))
+    previous_by_case = {item["caso"]: item for item in previous.get("resultados", [])}
+    comparacao: list[dict[str, Any]] = []
+    for item in current["resultados"]:
+        before = previous_by_case.get(item["caso"])
+        if before is None or not before["tempo_ms"]["mediana"]:
+            continue
+        razao = item["tempo_ms"]["mediana"] / before["tempo_ms"]["mediana"]
+        comparacao.append(
+            {
+                "caso": item["caso"],
+                "mediana_anterior_ms": before["tempo_ms"]["mediana"],
+                "mediana_atual_ms": item["tempo_ms"]["mediana"],
+                "razao": round(razao, 4),
+            }
+        )
+        print(f"{item['caso']:<24} {razao:8.2f}x em relacao a {previous_path.name}", file=sys.stderr)
+    if previous.get("parametros", {}).get("linhas") != current["parametros"]["linhas"]:
+        print("Aviso: as execucoes comparadas usaram totais de linhas diferentes.", file=sys.stderr)
+    return comparacao
+
+
+def main() -> None:
+    args = parse_args()
+    result = run_suite(args)
+    if args.comparar is not None:
+        result["comparacao"] = {"arquivo": str(args.comparar), "casos": compare_results(result, args.comparar)}
+    if args.saida is not None:
+        write_json(args.saida, result)
+        print(f"Resultado gravado em {args.saida}", file=sys.stderr)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
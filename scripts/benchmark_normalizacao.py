@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from empetur_core.normalizacao import (
+    TEST_NAME_PATTERNS,
+    fix_mojibake,
+    is_test_record_name,
+    normalize_cell,
+    normalize_cell_cached,
+    normalize_for_match,
+)
+
+MUNICIPIOS = ["Arcoverde", "Betânia", "Custódia", "Ibimirim", "Inajá", "Sertânia", "Tacaratu", "São José do Egito"]
+CATEGORIAS = ["Museu", "Igreja", "Açude", "Mercado Público", "Artesão", "Restaurante", "Pousada"]
+PESQUISADORES = ["Ana Lúcia", "João", "Márcia", "José Antônio", "Iraci", ""]
+NOMES = ["Igreja Matriz de São José", "Açude do Poço da Cruz", "Museu do Cangaço", "CafÃ© da Esquina", "Teste", "Pousada Sol"]
+
+
+def legacy_normalize_for_match(value: str) -> str:
+    normalized = unicodedata.normalize("NFD", value)
+    without_accents = "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
+    return without_accents.strip().lower()
+
+
+def legacy_fix_mojibake(value: str) -> str:
+    if not value:
+        return value
+    if "Ã" not in value and "Â" not in value:
+        return value
+    try:
+        return value.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return value
+
+
+def legacy_is_test_record_name(value: str) -> bool:
+    normalized = legacy_normalize_for_match(legacy_fix_mojibake(value))
+    if not normalized:
+        return False
+    return any(pattern.search(normalized) for pattern in TEST_NAME_PATTERNS)
+
+
+def build_rows(total: int, seed: int) -> list[list[str]]:
+    rnd = random.Random(seed)
+    return [
+        [
+            str(idx + 1),
+            rnd.choice(MUNICIPIOS),
+            rnd.choice(CATEGORIAS),
+            f"{rnd.choice(NOMES)} {idx % 997}",
+            rnd.choice(PESQUISADORES),
+        ]
+        for idx in range(total)
+    ]
+
+
+def legacy_row(row: list[str]) -> tuple:
+    nome = legacy_fix_mojibake(row[3].strip())
+    return (
+        legacy_fix_mojibake(row[0].strip()),
+        legacy_fix_mojibake(row[1].strip()),
+        legacy_fix_mojibake(row[2].strip()),
+        nome,
+        legacy_fix_mojibake(row[4].strip()),
+        legacy_is_test_record_name(nome),
+    )
+
+
+def current_row(row: list[str]) -> tuple:
+    nome = normalize_cell(row[3])
+    return (
+        normalize_cell(row[0]),
+        normalize_cell_cached(row[1]),
+        normalize_cell_cached(row[2]),
+        nome,
+        normalize_cell_cached(row[4]),
+        is_test_record_name(nome),
+    )
+
+
+def measure(label: str, func, rows: list[list[str]]) -> list[tuple]:
+    started = time.perf_counter()
+    result = [func(row) for row in rows]
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {elapsed * 1000:10.1f} ms  {elapsed / len(rows) * 1_000_000:8.2f} us/linha")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mede o custo por linha da normalizacao de texto.")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = build_rows(args.linhas, args.seed)
+    legacy = measure("legado", legacy_row, rows)
+    current = measure("atual", current_row, rows)
+    if legacy != current:
+        raise SystemExit("Resultado divergente entre a normalizacao legada e a atual.")
+
+    values = [cell for row in rows for cell in row]
+    for label, reference, candidate in (
+        ("normalize_for_match", legacy_normalize_for_match, normalize_for_match),
+        ("fix_mojibake", legacy_fix_mojibake, fix_mojibake),
+    ):
+        started = time.perf_counter()
+        expected = [reference(value) for value in values]
+        legacy_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        obtained = [candidate(value) for value in values]
+        current_elapsed = time.perf_counter() - started
+        if expected != obtained:
+            raise SystemExit(f"Resultado divergente em {label}.")
+        print(f"{label:<20} legado {legacy_elapsed * 1000:8.1f} ms  atual {current_elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,173 @@
 from __future__ import annotations
 
+import argparse
+import json
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
+from empetur_core.cache_consolidacao import build_cache_key, prune_cache, read_cached_rows, write_cached_rows
 from empetur_core.consolidacao import (
     BASE_FIELDNAMES,
+    SchemaPlan,
     build_dashboard_payload,
     build_resumos,
-    consolidate_csv_file,
+    hash_csv_file,
+    iter_consolidated_csv_file,
     write_csv,
     write_json,
 )
+from empetur_core.duplicados import add_deduplicated_totals, detect_duplicates
+from empetur_core.resumos import REFERENCE_DIR
+from empetur_core.serializacao import write_json_files
 
 INPUT_DIR = BASE_DIR / "data" / "raw" / "empetur_bancos"
 OUTPUT_DIR = BASE_DIR / "data" / "consolidado"
 WEB_DATA_DIR = BASE_DIR / "web" / "public" / "data"
+BASE_CSV_PATH = OUTPUT_DIR / "empetur_tabela_base.csv"
+MANIFEST_PATH = OUTPUT_DIR / "manifesto_consolidacao.json"
+DUPLICADOS_PATH = OUTPUT_DIR / "duplicados_atrativos.json"
+CACHE_DIR = OUTPUT_DIR / "cache"
+PAYLOAD_PATHS = (OUTPUT_DIR / "dashboard_payload.json", WEB_DATA_DIR / "dashboard_payload.json")
+OUTPUT_PATHS = (
+    BASE_CSV_PATH,
+    OUTPUT_DIR / "resumo_municipios.csv",
+    OUTPUT_DIR / "resumo_questionarios.csv",
+    OUTPUT_DIR / "resumo_pesquisadores.csv",
+    OUTPUT_DIR / "resumo_municipio_categoria.csv",
+    DUPLICADOS_PATH,
+    *PAYLOAD_PATHS,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Consolida os CSVs brutos do iPesquisa na base do dashboard.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="reconsolida todos os arquivos, mesmo os que nao mudaram desde a ultima execucao",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="grava o dashboard_payload.json sem indentacao (recomendado para producao)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="numero de processos usados na consolidacao dos arquivos (padrao: 1, sem paralelismo)",
+    )
+    return parser.parse_args()
+
+
+def read_manifest() -> dict[str, dict[str, Any]]:
+    if not MANIFEST_PATH.exists():
+        return {}
+    try:
+        raw = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def consolidate_file(
+    path: Path, exec_date: str, exec_timestamp: str
+) -> tuple[list[dict[str, str]], float, dict[str, str]]:
+    started = time.perf_counter()
+    plans: list[SchemaPlan] = []
+    rows = list(iter_consolidated_csv_file(path, exec_date, exec_timestamp, plans.append))
+    return rows, time.perf_counter() - started, dict(plans[0].fuzzy_columns) if plans else {}
+
+
+def consolidate_files(
+    paths: list[Path], exec_date: str, exec_timestamp: str, workers: int
+) -> list[tuple[list[dict[str, str]], float, dict[str, str]]]:
+    if workers <= 1 or len(paths) <= 1:
+        return [consolidate_file(path, exec_date, exec_timestamp) for path in paths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        return list(
+            executor.map(
+                consolidate_file,
+                paths,
+                [exec_date] * len(paths),
+                [exec_timestamp] * len(paths),
+            )
+        )
 
 
 def main() -> None:
+    args = parse_args()
     exec_now = datetime.now()
     exec_date = exec_now.strftime("%d/%m/%Y")
     exec_timestamp = exec_now.strftime("%d/%m/%Y %H:%M:%S")
 
-    all_rows: list[dict[str, str]] = []
     csv_files = sorted(INPUT_DIR.glob("*.csv"))
+    file_hashes = {path.name: hash_csv_file(path) for path in csv_files}
+    cache_keys = {name: build_cache_key(name, content_hash) for name, content_hash in file_hashes.items()}
+    # Os resumos tambem dependem do cadastro de municipios e do total previsto, entao eles entram na checagem.
+    reference_hashes = {path.name: hash_csv_file(path) for path in sorted(REFERENCE_DIR.glob("*.csv"))}
+    manifest = {} if args.force else read_manifest()
+    manifest_files = manifest.get("arquivos") or {}
+    unchanged_files = {
+        name
+        for name, cache_key in cache_keys.items()
+        if (manifest_files.get(name) or {}).get("chave_cache") == cache_key
+    }
+    if (
+        not args.force
+        and unchanged_files == set(manifest_files) == set(file_hashes)
+        and manifest.get("referencias") == reference_hashes
+        and manifest.get("compacto") == args.compact
+        and all(path.exists() for path in OUTPUT_PATHS)
+    ):
+        print(f"Arquivos lidos: {len(csv_files)}")
+        print("Nenhum arquivo alterado desde a ultima consolidacao. Use --force para regerar as saidas.")
+        return
+
+    started = time.perf_counter()
+    cached_rows: dict[str, list[dict[str, str]]] = {}
+    if not args.force:
+        for path in csv_files:
+            rows = read_cached_rows(CACHE_DIR, cache_keys[path.name], exec_date, exec_timestamp)
+            if rows is not None:
+                cached_rows[path.name] = rows
+    pending_files = [path for path in csv_files if path.name not in cached_rows]
+    cache_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    consolidated = dict(
+        zip(
+            (path.name for path in pending_files),
+            consolidate_files(pending_files, exec_date, exec_timestamp, args.workers),
+        )
+    )
+    consolidation_elapsed = time.perf_counter() - started
+
+    all_rows: list[dict[str, str]] = []
     for path in csv_files:
-        all_rows.extend(consolidate_csv_file(path, exec_date, exec_timestamp))
+        if path.name in cached_rows:
+            all_rows.extend(cached_rows[path.name])
+            continue
+        rows, elapsed, colunas_aproximadas = consolidated[path.name]
+        write_cached_rows(CACHE_DIR, cache_keys[path.name], rows)
+        all_rows.extend(rows)
+        print(f"{path.name}: {len(rows)} linhas em {elapsed * 1000:.1f} ms")
+        for field, column in colunas_aproximadas.items():
+            print(f"  aviso: coluna '{field}' resolvida por comparacao aproximada com '{column}'")
+    prune_cache(CACHE_DIR, cache_keys.values())
 
-    write_csv(OUTPUT_DIR / "empetur_tabela_base.csv", BASE_FIELDNAMES, all_rows)
+    write_csv(BASE_CSV_PATH, BASE_FIELDNAMES, all_rows)
 
-    resumos = build_resumos(all_rows)
+    duplicados = detect_duplicates(all_rows)
+    resumos = add_deduplicated_totals(build_resumos(all_rows), duplicados)
     write_csv(
         OUTPUT_DIR / "resumo_municipios.csv",
         [
@@ -43,6 +176,7 @@ def main() -> None:
             "municipio",
             "ordem_municipio",
             "total_realizado",
+            "total_realizado_deduplicado",
             "total_previsto",
             "faltante",
             "percentual_cobertura",
@@ -67,13 +201,39 @@ def main() -> None:
         resumos["resumo_municipio_categoria"],
     )
 
-    dashboard_payload = build_dashboard_payload(all_rows, exec_date, exec_timestamp)
-    write_json(OUTPUT_DIR / "dashboard_payload.json", dashboard_payload)
-    write_json(WEB_DATA_DIR / "dashboard_payload.json", dashboard_payload)
+    write_json(
+        DUPLICADOS_PATH,
+        {"totais": duplicados.totais(), "municipios": duplicados.totais_por_municipio, "grupos": duplicados.clusters},
+    )
+
+    dashboard_payload = build_dashboard_payload(all_rows, exec_date, exec_timestamp, resumos)
+    write_json_files(
+        PAYLOAD_PATHS,
+        dashboard_payload,
+        compact=args.compact,
+    )
+
+    rows_per_file: dict[str, int] = {}
+    for row in all_rows:
+        rows_per_file[row["arquivo_origem"]] = rows_per_file.get(row["arquivo_origem"], 0) + 1
+    write_json(
+        MANIFEST_PATH,
+        {
+            "arquivos": {
+                name: {"hash": content_hash, "chave_cache": cache_keys[name], "linhas": rows_per_file.get(name, 0)}
+                for name, content_hash in file_hashes.items()
+            },
+            "referencias": reference_hashes,
+            "compacto": args.compact,
+        },
+    )
 
     print(f"Arquivos lidos: {len(csv_files)}")
+    print(f"Arquivos carregados do cache: {len(cached_rows)} em {cache_elapsed * 1000:.1f} ms")
+    print(f"Tempo de consolidacao: {consolidation_elapsed * 1000:.1f} ms ({max(args.workers, 1)} processo(s))")
     print(f"Linhas consolidadas: {len(all_rows)}")
-    print(f"Saida base: {OUTPUT_DIR / 'empetur_tabela_base.csv'}")
+    print(f"Grupos de atrativos duplicados: {len(duplicados.clusters)}")
+    print(f"Saida base: {BASE_CSV_PATH}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from empetur_core.sintetico import (
+    FUZZY_HEADER_RATE,
+    MOJIBAKE_RATE,
+    SYNTHETIC_SEED,
+    TEST_ROW_RATE,
+    iter_synthetic_exports,
+)
+
+DEFAULT_OUTPUT_DIR = BASE_DIR / "data" / "raw" / "sinteticos"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Grava exportacoes CSV sinteticas do iPesquisa, uma por questionario de RULES_BY_QUESTIONARIO."
+    )
+    parser.add_argument("--linhas", type=int, default=100_000, help="total de linhas distribuidas entre os arquivos")
+    parser.add_argument("--seed", type=int, default=SYNTHETIC_SEED)
+    parser.add_argument("--mojibake", type=float, default=MOJIBAKE_RATE, help="fracao de celulas com mojibake")
+    parser.add_argument("--testes", type=float, default=TEST_ROW_RATE, help="fracao de linhas de teste")
+    parser.add_argument("--fuzzy", type=float, default=FUZZY_HEADER_RATE, help="fracao de cabecalhos aproximados")
+    parser.add_argument("--saida", type=Path, default=DEFAULT_OUTPUT_DIR, help="diretorio de destino dos CSVs")
+    args = parser.parse_args()
+    if args.linhas < 1:
+        parser.error("--linhas deve ser positivo")
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    total_bytes = 0
+    total_teste = 0
+    for export in iter_synthetic_exports(args.linhas, args.seed, args.mojibake, args.testes, args.fuzzy):
+        (args.saida / export.file_name).write_bytes(export.content)
+        total_bytes += len(export.content)
+        total_teste += export.linhas_teste
+        print(f"{export.file_name}: {export.linhas} linhas ({export.linhas_teste} de teste, {export.encoding})")
+    print(f"Total: {args.linhas} linhas, {total_teste} de teste, {total_bytes / 1_048_576:.1f} MiB em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
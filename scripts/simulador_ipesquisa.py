@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import bisect
+import json
+import random
+import sys
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from empetur_core.resumos import load_cadastro_municipios
+from empetur_core.sintetico import SYNTHETIC_SEED, SyntheticForm, split_total
+
+DEFAULT_FORM_MAP_PATH = BASE_DIR / "backend" / "ipesquisa_form_map.example.json"
+API_PATH = "/api/v1/pesquisa/{codigo_pesquisa}/get-csv-cases"
+IPESQUISA_TIMEZONE = ZoneInfo("America/Sao_Paulo")
+IPESQUISA_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+ERROR_STATUSES = (429, 500, 502, 503)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class SimulatedForm:
+    def __init__(self, form: SyntheticForm, linhas: int, now: datetime) -> None:
+        self.form = form
+        # Linhas iniciais gravadas ao longo dos ultimos 180 dias, em ordem de gravacao.
+        self.stamps = sorted(now - timedelta(minutes=form.rnd.randrange(180 * 24 * 60)) for _ in range(linhas))
+        self.rows = [form.next_row(stamp.replace(tzinfo=None)) for stamp in self.stamps]
+        self.full_content: bytes | None = None
+
+    def append_rows(self, total: int, now: datetime) -> None:
+        for _ in range(total):
+            self.stamps.append(now)
+            self.rows.append(self.form.next_row(now.replace(tzinfo=None)))
+            self.full_content = None
+
+    def content(self, inicio: datetime | None, fim: datetime | None) -> bytes:
+        if inicio is None and fim is None:
+            if self.full_content is None:
+                self.full_content = self.form.encode(self.rows)
+            return self.full_content
+        lower = 0 if inicio is None else bisect.bisect_left(self.stamps, inicio)
+        upper = len(self.stamps) if fim is None else bisect.bisect_right(self.stamps, fim)
+        return self.form.encode(self.rows[lower:upper])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Servidor local que imita o endpoint de CSV do iPesquisa.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8101)
+    parser.add_argument("--mapa", type=Path, default=DEFAULT_FORM_MAP_PATH, help="JSON questionario -> codigo")
+    parser.add_argument("--linhas", type=int, default=20_000, help="total de linhas iniciais entre os questionarios")
+    parser.add_argument(
+        "--novas-linhas", type=int, default=2, help="linhas gravadas em cada questionario a cada download"
+    )
+    parser.add_argument("--latencia-ms", type=float, default=200.0, help="latencia media antes da resposta")
+    parser.add_argument("--variacao-ms", type=float, default=100.0, help="variacao aleatoria da latencia")
+    parser.add_argument("--banda-kbps", type=float, default=0.0, help="limite de banda por download (0: sem limite)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fracao de downloads que devolvem erro HTTP")
+    parser.add_argument("--client-id", default="", help="exige autenticacao basica com este usuario")
+    parser.add_argument("--client-secret", default="")
+    parser.add_argument("--seed", type=int, default=SYNTHETIC_SEED)
+    return parser.parse_args()
+
+
+def parse_ipesquisa_datetime(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    return datetime.strptime(value, IPESQUISA_DATETIME_FORMAT).replace(tzinfo=IPESQUISA_TIMEZONE)
+
+
+def build_app(args: argparse.Namespace) -> FastAPI:
+    rnd = random.Random(args.seed)
+    form_map = json.loads(args.mapa.read_text(encoding="utf-8"))
+    municipios = [item["municipio"] for item in load_cadastro_municipios()]
+    now = datetime.now(IPESQUISA_TIMEZONE).replace(microsecond=0)
+    forms = {
+        int(codigo): SimulatedForm(SyntheticForm(questionario, rnd, municipios), linhas, now)
+        for (questionario, codigo), linhas in zip(form_map.items(), split_total(args.linhas, len(form_map), rnd))
+    }
+    expected_auth = ""
+    if args.client_id:
+        expected_auth = "Basic " + base64.b64encode(f"{args.client_id}:{args.client_secret}".encode()).decode()
+    counters = {"requisicoes": 0, "erros_injetados": 0, "bytes_enviados": 0}
+    app = FastAPI(title="Simulador iPesquisa")
+
+    @app.get("/healthz")
+    def healthcheck() -> dict[str, object]:
+        return {
+            "status": "ok",
+            **counters,
+            "linhas": {str(codigo): len(form.rows) for codigo, form in forms.items()},
+        }
+
+    @app.get(API_PATH)
+    async def get_csv_cases(
+        codigo_pesquisa: int,
+        request: Request,
+        dt_gravacao_inicio: str | None = None,
+        dt_gravacao_fim: str | None = None,
+    ) -> Response:
+        counters["requisicoes"] += 1
+        await asyncio.sleep(max(args.latencia_ms + rnd.uniform(-args.variacao_ms, args.variacao_ms), 0.0) / 1000)
+        if expected_auth and request.headers.get("authorization") != expected_auth:
+            return JSONResponse({"message": "Credenciais invalidas."}, status_code=401)
+        form = forms.get(codigo_pesquisa)
+        if form is None:
+            return JSONResponse({"message": f"Pesquisa {codigo_pesquisa} nao encontrada."}, status_code=404)
+        if rnd.random() < args.taxa_erro:
+            counters["erros_injetados"] += 1
+            return JSONResponse({"message": "Erro simulado."}, status_code=rnd.choice(ERROR_STATUSES))
+        try:
+            inicio = parse_ipesquisa_datetime(dt_gravacao_inicio)
+            fim = parse_ipesquisa_datetime(dt_gravacao_fim)
+        except ValueError:
+            return JSONResponse({"message": "Data de gravacao invalida."}, status_code=400)
+
+        form.append_rows(args.novas_linhas, datetime.now(IPESQUISA_TIMEZONE).replace(microsecond=0))
+        content = form.content(inicio, fim)
+        counters["bytes_enviados"] += len(content)
+        if args.banda_kbps <= 0:
+            return Response(content, media_type="text/plain")
+
+        async def stream() -> AsyncIterator[bytes]:
+            for start in range(0, len(content), STREAM_CHUNK_SIZE):
+                chunk = content[start : start + STREAM_CHUNK_SIZE]
+                await asyncio.sleep(len(chunk) * 8 / (args.banda_kbps * 1000))
+                yield chunk
+
+        return StreamingResponse(stream(), media_type="text/plain")
+
+    return app
+
+
+def main() -> None:
+    args = parse_args()
+    uvicorn.run(build_app(args), host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import product
+from pathlib import Path
+from typing import Any
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+from empetur_core.consolidacao import TIMESTAMP_FIELDS
+from empetur_core.serializacao import dumps_json
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+FILTER_OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "in", "is"}
+RANGE_PATTERN = re.compile(r"^(\d+)-(\d*)$")
+IN_VALUE_PATTERN = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|([^,]*))\s*(?:,|$)')
+SORT_CACHE_SIZE = 16
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    primary_key: tuple[str, ...]
+    identity: str | None = None
+    unique: tuple[tuple[str, ...], ...] = ()
+    timestamps: tuple[str, ...] = ()
+
+
+TABLE_SPECS = {
+    "empetur_municipios_status": TableSpec(("municipio_slug",)),
+    "empetur_previstos_atrativos": TableSpec(("id",), identity="id"),
+    "empetur_tabela_base": TableSpec(
+        ("id",),
+        identity="id",
+        unique=(("codigo_pesquisa", "nro_identificacao"),),
+        timestamps=tuple(TIMESTAMP_FIELDS),
+    ),
+    "empetur_sync_estado": TableSpec(
+        ("codigo_pesquisa",), timestamps=("ultima_sincronizacao", "ultima_carga_completa")
+    ),
+}
+
+
+class PostgrestError(Exception):
+    def __init__(self, status_code: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+
+def filter_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "null" if value is None else str(value)
+
+
+def parse_in_values(raw: str) -> list[str]:
+    if not (raw.startswith("(") and raw.endswith(")")):
+        raise PostgrestError(400, "PGRST100", f"Lista invalida no filtro in: {raw}")
+    inner = raw[1:-1]
+    values: list[str] = []
+    position = 0
+    while position < len(inner):
+        match = IN_VALUE_PATTERN.match(inner, position)
+        if match is None or match.end() == position:
+            break
+        quoted, plain = match.groups()
+        values.append(re.sub(r"\\(.)", r"\1", quoted) if quoted is not None else plain.strip())
+        position = match.end()
+    return values
+
+
+@dataclass(frozen=True)
+class Filter:
+    column: str
+    operator: str
+    negated: bool
+    values: tuple[str, ...]
+
+    def matches(self, row: dict[str, Any]) -> bool:
+        value = row.get(self.column)
+        if self.operator == "is":
+            result = filter_text(value) == self.values[0].lower()
+        elif self.operator == "in":
+            result = value is not None and filter_text(value) in self.values
+        elif value is None:
+            result = False
+        else:
+            text = filter_text(value)
+            expected = self.values[0]
+            result = {
+                "eq": text == expected,
+                "neq": text != expected,
+                "gt": text > expected,
+                "gte": text >= expected,
+                "lt": text < expected,
+                "lte": text <= expected,
+            }[self.operator]
+        return result != self.negated
+
+
+def parse_filters(params: Iterable[tuple[str, str]]) -> list[Filter]:
+    filters: list[Filter] = []
+    for column, raw in params:
+        if column in RESERVED_PARAMS:
+            continue
+        negated = raw.startswith("not.")
+        operator, _, value = raw.removeprefix("not.").partition(".")
+        if operator not in FILTER_OPERATORS:
+            raise PostgrestError(400, "PGRST100", f"Operador nao suportado: {column}={raw}")
+        values = tuple(parse_in_values(value)) if operator == "in" else (value,)
+        filters.append(Filter(column, operator, negated, values))
+    return filters
+
+
+def parse_order(raw: str | None) -> list[tuple[str, bool, bool]]:
+    order: list[tuple[str, bool, bool]] = []
+    for part in (raw or "").split(","):
+        if not part:
+            continue
+        column, *modifiers = part.split(".")
+        descending = "desc" in modifiers
+        # Como no Postgres: nulos no fim em ordem crescente e no inicio em ordem decrescente.
+        nulls_first = "nullsfirst" in modifiers or (descending and "nullslast" not in modifiers)
+        order.append((column, descending, nulls_first))
+    return order
+
+
+def normalize_timestamp(column: str, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError as exc:
+        raise PostgrestError(
+            400, "22007", f'invalid input syntax for type timestamp with time zone: "{value}" ({column})'
+        ) from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def parse_prefer(header: str | None) -> dict[str, str]:
+    prefer: dict[str, str] = {}
+    for item in (header or "").split(","):
+        key, _, value = item.strip().partition("=")
+        if key:
+            prefer[key] = value
+    return prefer
+
+
+@dataclass
+class Table:
+    spec: TableSpec
+    rows: dict[int, dict[str, Any]] = field(default_factory=dict)
+    indexes: dict[tuple[str, ...], dict[tuple[str, ...], int]] = field(default_factory=dict)
+    next_row_id: int = 1
+    next_identity: int = 1
+    version: int = 0
+    sort_cache: dict[tuple[Any, ...], list[int]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for columns in (self.spec.primary_key, *self.spec.unique):
+            self.indexes[columns] = {}
+
+    def index_key(self, columns: tuple[str, ...], row: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(filter_text(row.get(column)) for column in columns)
+
+    def candidates(self, filters: list[Filter]) -> Iterable[int]:
+        # Filtros eq/in sobre todas as colunas de uma chave viram consultas diretas no indice.
+        for columns, index in self.indexes.items():
+            choices: list[tuple[str, ...]] = []
+            for column in columns:
+                found = next(
+                    (
+                        item.values
+                        for item in filters
+                        if item.column == column and item.operator in {"eq", "in"} and not item.negated
+                    ),
+                    None,
+                )
+                if found is None:
+                    break
+                choices.append(found)
+            else:
+                return sorted({index[key] for key in product(*choices) if key in index})
+        return self.rows
+
+    def select(self, filters: list[Filter], order: list[tuple[str, bool, bool]]) -> list[int]:
+        cache_key = (self.version, tuple(filters), tuple(order))
+        cached = self.sort_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        row_ids = [
+            row_id
+            for row_id in self.candidates(filters)
+            if all(item.matches(self.rows[row_id]) for item in filters)
+        ]
+        for column, descending, nulls_first in reversed(order):
+            null_rank = 0 if nulls_first != descending else 1
+            row_ids.sort(
+                key=lambda row_id: (
+                    (null_rank, "")
+                    if self.rows[row_id].get(column) is None
+                    else (1 - null_rank, self.rows[row_id][column])
+                ),
+                reverse=descending,
+            )
+        if len(self.sort_cache) >= SORT_CACHE_SIZE:
+            self.sort_cache.clear()
+        self.sort_cache[cache_key] = row_ids
+        return row_ids
+
+    def prepare_row(self, row: dict[str, Any]) -> dict[str, Any]:
+        if not isinstance(row, dict):
+            raise PostgrestError(400, "PGRST102", "Corpo da requisicao invalido.")
+        if self.spec.identity is not None and row.get(self.spec.identity) is not None:
+            raise PostgrestError(400, "428C9", f'cannot insert a non-DEFAULT value into column "{self.spec.identity}"')
+        prepared = dict(row)
+        for column in self.spec.timestamps:
+            if column in prepared:
+                prepared[column] = normalize_timestamp(column, prepared[column])
+        return prepared
+
+    def upsert(self, payload: list[dict[str, Any]], conflict: tuple[str, ...] | None, merge: bool) -> list[int]:
+        rows = [self.prepare_row(row) for row in payload]
+        target = conflict or self.spec.primary_key
+        if target not in self.indexes:
+            raise PostgrestError(
+                400, "42P10", "there is no unique or exclusion constraint matching the ON CONFLICT specification"
+            )
+
+        # Valida tudo antes de gravar: como no Postgres, um conflito descarta a requisicao inteira.
+        keyed = conflict is not None or self.spec.identity is None
+        planned: list[tuple[int | None, dict[str, Any]]] = []
+        seen: set[tuple[str, ...]] = set()
+        for row in rows:
+            existing = None
+            if keyed:
+                key = self.index_key(target, row)
+                if key in seen:
+                    raise PostgrestError(500, "21000", "ON CONFLICT DO UPDATE command cannot affect row a second time")
+                seen.add(key)
+                existing = self.indexes[target].get(key)
+            if existing is not None and not merge:
+                raise PostgrestError(
+                    409, "23505", f"duplicate key value violates unique constraint ({', '.join(target)})"
+                )
+            planned.append((existing, row))
+        claimed: dict[tuple[str, ...], set[tuple[str, ...]]] = {columns: set() for columns in self.indexes}
+        for existing, row in planned:
+            merged = {**self.rows[existing], **row} if existing is not None else row
+            for columns, index in self.indexes.items():
+                if columns == (self.spec.identity,):
+                    continue
+                key = self.index_key(columns, merged)
+                owner = index.get(key)
+                if (owner is not None and owner != existing) or key in claimed[columns]:
+                    raise PostgrestError(
+                        409, "23505", f"duplicate key value violates unique constraint ({', '.join(columns)})"
+                    )
+                claimed[columns].add(key)
+
+        written: list[int] = []
+        for existing, row in planned:
+            if existing is None:
+                if self.spec.identity is not None:
+                    row[self.spec.identity] = self.next_identity
+                    self.next_identity += 1
+                row_id = self.next_row_id
+                self.next_row_id += 1
+                self.rows[row_id] = row
+            else:
+                row_id = existing
+                for columns, index in self.indexes.items():
+                    index.pop(self.index_key(columns, self.rows[row_id]), None)
+                self.rows[row_id] = {**self.rows[row_id], **row}
+            for columns, index in self.indexes.items():
+                index[self.index_key(columns, self.rows[row_id])] = row_id
+            written.append(row_id)
+        self.version += 1
+        return written
+
+    def delete(self, filters: list[Filter]) -> list[dict[str, Any]]:
+        if not filters:
+            raise PostgrestError(400, "21000", "DELETE requires a WHERE clause")
+        removed = [self.rows.pop(row_id) for row_id in self.select(filters, [])]
+        for row in removed:
+            for columns, index in self.indexes.items():
+                index.pop(self.index_key(columns, row), None)
+        self.version += 1
+        return removed
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Servidor local com o subconjunto do PostgREST (Supabase) usado pelo backend."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8102)
+    parser.add_argument("--chave", default="", help="exige esta chave nos cabecalhos apikey e Authorization")
+    parser.add_argument("--max-linhas", type=int, default=1000, help="limite de linhas por leitura (db-max-rows)")
+    parser.add_argument("--latencia-ms", type=float, default=5.0, help="latencia media de cada requisicao")
+    parser.add_argument("--variacao-ms", type=float, default=2.0, help="variacao aleatoria da latencia")
+    return parser.parse_args()
+
+
+def build_app(args: argparse.Namespace) -> FastAPI:
+    rnd = random.Random()
+    tables = {name: Table(spec) for name, spec in TABLE_SPECS.items()}
+    counters = {"requisicoes": 0, "erros": 0}
+    app = FastAPI(title="Simulador PostgREST")
+
+    def json_response(content: Any, status_code: int, headers: dict[str, str] | None = None) -> Response:
+        return Response(dumps_json(content), status_code=status_code, headers=headers, media_type="application/json")
+
+    def project(row: dict[str, Any], columns: list[str] | None) -> dict[str, Any]:
+        return dict(row) if columns is None else {column: row.get(column) for column in columns}
+
+    @app.get("/healthz")
+    def healthcheck() -> dict[str, object]:
+        return {"status": "ok", **counters, "linhas": {name: len(table.rows) for name, table in tables.items()}}
+
+    @app.api_route("/rest/v1/{table_name}", methods=["GET", "POST", "DELETE"])
+    async def handle_table(table_name: str, request: Request) -> Response:
+        counters["requisicoes"] += 1
+        await asyncio.sleep(max(args.latencia_ms + rnd.uniform(-args.variacao_ms, args.variacao_ms), 0.0) / 1000)
+        try:
+            if args.chave and (
+                request.headers.get("apikey") != args.chave
+                or request.headers.get("authorization") != f"Bearer {args.chave}"
+            ):
+                raise PostgrestError(401, "PGRST301", "JWT invalido.")
+            table = tables.get(table_name)
+            if table is None:
+                raise PostgrestError(404, "PGRST205", f"Could not find the table 'public.{table_name}'")
+            return await dispatch(table, request)
+        except PostgrestError as exc:
+            counters["erros"] += 1
+            return json_response(
+                {"code": exc.code, "message": exc.message, "details": None, "hint": None}, exc.status_code
+            )
+
+    async def dispatch(table: Table, request: Request) -> Response:
+        params = request.query_params
+        prefer = parse_prefer(request.headers.get("prefer"))
+        select = params.get("select", "*")
+        columns = None if select == "*" else [column.strip() for column in select.split(",") if column.strip()]
+        filters = parse_filters(params.multi_items())
+
+        if request.method == "GET":
+            row_ids = table.select(filters, parse_order(params.get("order")))
+            total = len(row_ids)
+            start = int(params.get("offset", 0))
+            end = total if "limit" not in params else start + int(params["limit"])
+            range_header = request.headers.get("range")
+            if range_header:
+                match = RANGE_PATTERN.match(range_header.strip())
+                if match is None:
+                    raise PostgrestError(416, "PGRST103", f"Range invalido: {range_header}")
+                start = int(match.group(1))
+                end = int(match.group(2)) + 1 if match.group(2) else total
+            counted = prefer.get("count") == "exact"
+            if counted and start > total and total > 0:
+                raise PostgrestError(416, "PGRST103", "Requested range not satisfiable")
+            end = min(end, start + max(args.max_linhas, 1))
+            page = [project(table.rows[row_id], columns) for row_id in row_ids[start:end]]
+            total_text = str(total) if counted else "*"
+            content_range = f"{start}-{start + len(page) - 1}/{total_text}" if page else f"*/{total_text}"
+            partial = counted and start + len(page) < total
+            return json_response(page, 206 if partial else 200, {"Content-Range": content_range})
+
+        if request.method == "POST":
+            try:
+                payload = await request.json()
+            except ValueError as exc:
+                raise PostgrestError(400, "PGRST102", "Corpo JSON invalido.") from exc
+            payload = payload if isinstance(payload, list) else [payload]
+            conflict_raw = params.get("on_conflict")
+            conflict = tuple(column.strip() for column in conflict_raw.split(",")) if conflict_raw else None
+            resolution = prefer.get("resolution")
+            written = table.upsert(payload, conflict, merge=resolution == "merge-duplicates")
+            if prefer.get("return") == "representation":
+                return json_response([project(table.rows[row_id], columns) for row_id in written], 201)
+            return Response(status_code=201)
+
+        removed = table.delete(filters)
+        headers = {"Content-Range": f"*/{len(removed)}"} if prefer.get("count") == "exact" else None
+        if prefer.get("return") == "representation":
+            return json_response([project(row, columns) for row in removed], 200, headers)
+        return Response(status_code=204, headers=headers)
+
+    return app
+
+
+def main() -> None:
+    args = parse_args()
+    uvicorn.run(build_app(args), host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import httpx
+
+from empetur_core.normalizacao import slugify
+from empetur_core.resumos import load_cadastro_municipios
+from empetur_core.serializacao import write_json_files
+from empetur_core.sintetico import SYNTHETIC_SEED
+
+SCRIPTS_DIR = BASE_DIR / "scripts"
+DEFAULT_FORM_MAP_PATH = BASE_DIR / "backend" / "ipesquisa_form_map.example.json"
+CENARIOS = ("sync", "payload", "status", "previstos")
+STARTUP_TIMEOUT_SECONDS = 60.0
+LOG_TAIL_CHARS = 4000
+IPESQUISA_CLIENT_ID = "carga"
+IPESQUISA_CLIENT_SECRET = "carga-local"
+SUPABASE_SERVICE_ROLE_KEY = "chave-local"
+
+Operation = Callable[[httpx.AsyncClient, random.Random], Awaitable[tuple[str, httpx.Response]]]
+
+
+@dataclass
+class PhaseResult:
+    latencias: dict[str, list[float]] = field(default_factory=dict)
+    erros: dict[str, dict[str, int]] = field(default_factory=dict)
+    duracao: float = 0.0
+
+    def record(self, rota: str, elapsed: float, status: str | None) -> None:
+        if status is None:
+            self.latencias.setdefault(rota, []).append(elapsed)
+            return
+        by_status = self.erros.setdefault(rota, {})
+        by_status[status] = by_status.get(status, 0) + 1
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Teste de carga local do backend: sobe simuladores do iPesquisa e do PostgREST e mede "
+            "latencia (p50/p95/p99) e vazao dos endpoints sob clientes concorrentes."
+        )
+    )
+    parser.add_argument("--cenarios", default=",".join(CENARIOS), help="lista separada por virgulas")
+    parser.add_argument("--usuarios", type=int, default=8, help="clientes concorrentes por cenario")
+    parser.add_argument("--usuarios-sync", type=int, default=2, help="clientes concorrentes no cenario sync")
+    parser.add_argument("--duracao", type=float, default=15.0, help="segundos de carga por cenario")
+    parser.add_argument("--escritas", type=float, default=0.2, help="fracao de escritas em status e previstos")
+    parser.add_argument("--linhas", type=int, default=20_000, help="linhas iniciais no simulador do iPesquisa")
+    parser.add_argument("--questionarios", type=int, default=0, help="usa so os N primeiros do mapa (0: todos)")
+    parser.add_argument("--novas-linhas", type=int, default=2, help="linhas novas por download no iPesquisa")
+    parser.add_argument("--latencia-ipesquisa-ms", type=float, default=200.0)
+    parser.add_argument("--variacao-ipesquisa-ms", type=float, default=100.0)
+    parser.add_argument("--banda-ipesquisa-kbps", type=float, default=0.0)
+    parser.add_argument("--erros-ipesquisa", type=float, default=0.0, help="fracao de downloads com erro HTTP")
+    parser.add_argument("--latencia-postgrest-ms", type=float, default=5.0)
+    parser.add_argument("--max-linhas-postgrest", type=int, default=1000)
+    parser.add_argument("--sqlite", action="store_true", help="usa o SQLite local em vez do simulador do PostgREST")
+    parser.add_argument("--backend-url", help="mede um backend ja em execucao em vez de subir os simuladores")
+    parser.add_argument("--seed", type=int, default=SYNTHETIC_SEED)
+    parser.add_argument("--saida", type=Path, help="arquivo JSON com o resultado (padrao: imprime na saida padrao)")
+    args = parser.parse_args()
+    args.cenarios = [item.strip() for item in args.cenarios.split(",") if item.strip()]
+    unknown = sorted(set(args.cenarios) - set(CENARIOS))
+    if unknown:
+        parser.error(f"cenarios desconhecidos: {', '.join(unknown)}")
+    if args.usuarios < 1 or args.usuarios_sync < 1:
+        parser.error("--usuarios e --usuarios-sync devem ser pelo menos 1")
+    return args
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def read_log_tail(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")[-LOG_TAIL_CHARS:]
+    except OSError:
+        return ""
+
+
+class ManagedProcess:
+    def __init__(self, name: str, command: list[str], log_path: Path, env: dict[str, str] | None = None) -> None:
+        self.name = name
+        self.log_path = log_path
+        self.log = log_path.open("wb")
+        self.process = subprocess.Popen(
+            command, cwd=BASE_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT
+        )
+
+    def wait_ready(self, url: str) -> None:
+        deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if httpx.get(url, timeout=2.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise SystemExit(f"{self.name} nao respondeu em {url}.\n{read_log_tail(self.log_path)}")
+
+    def stop(self) -> None:
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.log.close()
+
+
+def start_services(args: argparse.Namespace, stack: ExitStack, work_dir: Path) -> dict[str, str]:
+    form_map = json.loads(DEFAULT_FORM_MAP_PATH.read_text(encoding="utf-8"))
+    if args.questionarios > 0:
+        form_map = dict(list(form_map.items())[: args.questionarios])
+    form_map_path = work_dir / "ipesquisa_form_map.json"
+    form_map_path.write_text(json.dumps(form_map, ensure_ascii=False), encoding="utf-8")
+
+    urls: dict[str, str] = {}
+    port = free_port()
+    ipesquisa = ManagedProcess(
+        "Simulador do iPesquisa",
+        [
+            sys.executable,
+            str(SCRIPTS_DIR / "simulador_ipesquisa.py"),
+            "--porta", str(port),
+            "--mapa", str(form_map_path),
+            "--linhas", str(args.linhas),
+            "--novas-linhas", str(args.novas_linhas),
+            "--latencia-ms", str(args.latencia_ipesquisa_ms),
+            "--variacao-ms", str(args.variacao_ipesquisa_ms),
+            "--banda-kbps", str(args.banda_ipesquisa_kbps),
+            "--taxa-erro", str(args.erros_ipesquisa),
+            "--client-id", IPESQUISA_CLIENT_ID,
+            "--client-secret", IPESQUISA_CLIENT_SECRET,
+            "--seed", str(args.seed),
+        ],
+        work_dir / "ipesquisa.log",
+    )
+    stack.callback(ipesquisa.stop)
+    urls["ipesquisa"] = f"http://127.0.0.1:{port}"
+
+    if not args.sqlite:
+        port = free_port()
+        postgrest = ManagedProcess(
+            "Simulador do PostgREST",
+            [
+                sys.executable,
+                str(SCRIPTS_DIR / "simulador_postgrest.py"),
+                "--porta", str(port),
+                "--chave", SUPABASE_SERVICE_ROLE_KEY,
+                "--max-linhas", str(args.max_linhas_postgrest),
+                "--latencia-ms", str(args.latencia_postgrest_ms),
+            ],
+            work_dir / "postgrest.log",
+        )
+        stack.callback(postgrest.stop)
+        urls["postgrest"] = f"http://127.0.0.1:{port}"
+
+    # Os simuladores geram os dados na partida; o backend so sobe depois que eles respondem.
+    ipesquisa.wait_ready(f"{urls['ipesquisa']}/healthz")
+    if not args.sqlite:
+        postgrest.wait_ready(f"{urls['postgrest']}/healthz")
+
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("SUPABASE_", "IPESQUISA_", "EMPETUR_"))
+    }
+    env.update(
+        {
+            "IPESQUISA_BASE_URL": urls["ipesquisa"],
+            "IPESQUISA_CLIENT_ID": IPESQUISA_CLIENT_ID,
+            "IPESQUISA_CLIENT_SECRET": IPESQUISA_CLIENT_SECRET,
+            "IPESQUISA_FORM_MAP": json.dumps(form_map, ensure_ascii=False),
+            "EMPETUR_PAYLOAD_FILE": str(work_dir / "dashboard_payload.json"),
+            "EMPETUR_BASE_CSV_FILE": str(work_dir / "empetur_tabela_base.csv"),
+            "EMPETUR_MUNICIPIOS_STATUS_FILE": str(work_dir / "municipios_status.json"),
+            "EMPETUR_PREVISTOS_FILE": str(work_dir / "previstos_atrativos.json"),
+            "EMPETUR_SYNC_STATE_FILE": str(work_dir / "sync_estado.json"),
+            "EMPETUR_SQLITE_FILE": str(work_dir / "empetur.sqlite3"),
+        }
+    )
+    if not args.sqlite:
+        env["SUPABASE_URL"] = urls["postgrest"]
+        env["SUPABASE_SERVICE_ROLE_KEY"] = SUPABASE_SERVICE_ROLE_KEY
+
+    port = free_port()
+    backend = ManagedProcess(
+        "Backend",
+        [
+            sys.executable, "-m", "uvicorn", "backend.app:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--log-level", "warning",
+        ],
+        work_dir / "backend.log",
+        env,
+    )
+    stack.callback(backend.stop)
+    urls["backend"] = f"http://127.0.0.1:{port}"
+    backend.wait_ready(f"{urls['backend']}/healthz")
+    return urls
+
+
+def build_operations(args: argparse.Namespace) -> dict[str, Operation]:
+    cadastro = load_cadastro_municipios()
+    slugs = [slugify(item["municipio"]) for item in cadastro]
+    municipios = {slugify(item["municipio"]): item for item in cadastro}
+
+    async def sync(client: httpx.AsyncClient, rnd: random.Random) -> tuple[str, httpx.Response]:
+        return "POST /api/sync/ipesquisa", await client.post("/api/sync/ipesquisa", json={"persist_local": False})
+
+    async def payload(client: httpx.AsyncClient, rnd: random.Random) -> tuple[str, httpx.Response]:
+        return "GET /api/dashboard/payload", await client.get("/api/dashboard/payload")
+
+    async def status(client: httpx.AsyncClient, rnd: random.Random) -> tuple[str, httpx.Response]:
+        if rnd.random() < args.escritas:
+            slug = rnd.choice(slugs)
+            response = await client.put(f"/api/municipios/status/{slug}", json={"concluido": rnd.random() < 0.5})
+            return "PUT /api/municipios/status/{municipio_slug}", response
+        return "GET /api/municipios/status", await client.get("/api/municipios/status")
+
+    async def previstos(client: httpx.AsyncClient, rnd: random.Random) -> tuple[str, httpx.Response]:
+        slug = rnd.choice(slugs)
+        if rnd.random() < args.escritas:
+            municipio = municipios[slug]
+            rows = [
+                {
+                    "regiao": municipio["regiao"],
+                    "municipio": municipio["municipio"],
+                    "categoria": rnd.choice(["Museu", "Igreja", "Açude", "Pousada"]),
+                    "referencia": str(idx + 1),
+                    "atrativo": f"Atrativo previsto {idx + 1}",
+                }
+                for idx in range(rnd.randint(5, 40))
+            ]
+            response = await client.put(f"/api/previstos/{slug}", json={"rows": rows})
+            return "PUT /api/previstos/{municipio_slug}", response
+        return "GET /api/previstos/{municipio_slug}", await client.get(f"/api/previstos/{slug}")
+
+    return {"sync": sync, "payload": payload, "status": status, "previstos": previstos}
+
+
+async def run_phase(
+    base_url: str, operation: Operation, usuarios: int, duracao: float, seed: int
+) -> PhaseResult:
+    result = PhaseResult()
+    limits = httpx.Limits(max_connections=usuarios, max_keepalive_connections=usuarios)
+    timeout = httpx.Timeout(600.0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        deadline = started + duracao
+
+        async def worker(worker_id: int) -> None:
+            rnd = random.Random(seed * 1000 + worker_id)
+            while True:
+                request_started = time.perf_counter()
+                try:
+                    rota, response = await operation(client, rnd)
+                    elapsed = time.perf_counter() - request_started
+                    result.record(rota, elapsed, None if response.status_code < 400 else str(response.status_code))
+                except httpx.HTTPError as exc:
+                    result.record("conexao", time.perf_counter() - request_started, type(exc).__name__)
+                if time.perf_counter() >= deadline:
+                    return
+
+        await asyncio.gather(*(worker(worker_id) for worker_id in range(usuarios)))
+        result.duracao = time.perf_counter() - started
+    return result
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    # Percentil por posicao mais proxima, sobre as latencias ja ordenadas.
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def summarize_latencies(values: list[float], erros: dict[str, int], duracao: float) -> dict[str, Any]:
+    ordered = sorted(values)
+    summary: dict[str, Any] = {
+        "requisicoes": len(ordered) + sum(erros.values()),
+        "sucessos": len(ordered),
+        "erros": dict(sorted(erros.items())),
+        "vazao_rps": round(len(ordered) / duracao, 3) if duracao else 0.0,
+    }
+    if ordered:
+        summary["latencia_ms"] = {
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "media": round(sum(ordered) / len(ordered) * 1000, 3),
+            "minimo": round(ordered[0] * 1000, 3),
+            "maximo": round(ordered[-1] * 1000, 3),
+        }
+    return summary
+
+
+def summarize_phase(cenario: str, usuarios: int, result: PhaseResult) -> dict[str, Any]:
+    rotas = sorted(set(result.latencias) | set(result.erros))
+    all_errors: dict[str, int] = {}
+    for erros in result.erros.values():
+        for status, total in erros.items():
+            all_errors[status] = all_errors.get(status, 0) + total
+    return {
+        "cenario": cenario,
+        "usuarios": usuarios,
+        "duracao_s": round(result.duracao, 3),
+        **summarize_latencies(
+            [value for values in result.latencias.values() for value in values], all_errors, result.duracao
+        ),
+        "por_rota": [
+            {
+                "rota": rota,
+                **summarize_latencies(result.latencias.get(rota, []), result.erros.get(rota, {}), result.duracao),
+            }
+            for rota in rotas
+        ],
+    }
+
+
+def print_phase(summary: dict[str, Any]) -> None:
+    latencias = summary.get("latencia_ms", {})
+    print(
+        f"{summary['cenario']:<10} {summary['requisicoes']:6d} req  {summary['vazao_rps']:8.2f} req/s  "
+        f"p50 {latencias.get('p50', 0):9.1f} ms  p95 {latencias.get('p95', 0):9.1f} ms  "
+        f"p99 {latencias.get('p99', 0):9.1f} ms  erros {sum(summary['erros'].values())}",
+        file=sys.stderr,
+    )
+
+
+def read_health(url: str | None) -> dict[str, Any] | None:
+    if not url:
+        return None
+    try:
+        return httpx.get(f"{url}/healthz", timeout=5.0).json()
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+async def run_load(args: argparse.Namespace, urls: dict[str, str]) -> dict[str, Any]:
+    operations = build_operations(args)
+    carga_inicial: dict[str, Any] | None = None
+    if "sync" in args.cenarios or "payload" in args.cenarios:
+        # A carga inicial completa fica fora das medicoes: os cenarios medem o regime com a base ja carregada.
+        async with httpx.AsyncClient(base_url=urls["backend"], timeout=httpx.Timeout(600.0)) as client:
+            started = time.perf_counter()
+            response = await client.post("/api/sync/ipesquisa", json={"persist_local": False})
+            elapsed = time.perf_counter() - started
+        body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+        carga_inicial = {
+            "status": response.status_code,
+            "tempo_ms": round(elapsed * 1000, 3),
+            "linhas_consolidadas": body.get("linhas_consolidadas"),
+            "detalhe": body.get("detail"),
+        }
+        print(f"carga inicial {response.status_code} em {elapsed:.2f} s", file=sys.stderr)
+
+    cenarios: list[dict[str, Any]] = []
+    for offset, cenario in enumerate(args.cenarios):
+        usuarios = args.usuarios_sync if cenario == "sync" else args.usuarios
+        result = await run_phase(urls["backend"], operations[cenario], usuarios, args.duracao, args.seed + offset)
+        summary = summarize_phase(cenario, usuarios, result)
+        print_phase(summary)
+        cenarios.append(summary)
+    return {"carga_inicial": carga_inicial, "cenarios": cenarios}
+
+
+def main() -> None:
+    args = parse_args()
+    with ExitStack() as stack:
+        if args.backend_url:
+            urls = {"backend": args.backend_url.rstrip("/")}
+        else:
+            work_dir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="empetur-carga-")))
+            urls = start_services(args, stack, work_dir)
+        measured = asyncio.run(run_load(args, urls))
+        simuladores = {
+            name: read_health(urls.get(name)) for name in ("ipesquisa", "postgrest") if urls.get(name)
+        }
+
+    result = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "parametros": {
+            key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()
+        },
+        "armazenamento": "externo" if args.backend_url else "sqlite" if args.sqlite else "postgrest",
+        **measured,
+        "simuladores": simuladores,
+    }
+    if args.saida is not None:
+        write_json_files((args.saida,), result)
+        print(f"Resultado gravado em {args.saida}", file=sys.stderr)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
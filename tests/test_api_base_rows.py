@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import app as backend_app
+from empetur_core.historico import BaseRowsHistory
+from empetur_core.resumos import ResumoState
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    history = BaseRowsHistory(datetime(2025, 3, 1, 8, 0, 0))
+    history.commit("0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5e01", datetime(2025, 3, 1, 10, 0, 0))
+    monkeypatch.setitem(backend_app.SYNC_CACHE, "resumo_state", ResumoState())
+    monkeypatch.setitem(backend_app.SYNC_CACHE, "history", history)
+    return TestClient(backend_app.app)
+
+
+def test_base_rows_rejects_malformed_since(client: TestClient) -> None:
+    response = client.get("/api/base-rows", params={"since": "ontem"})
+    assert response.status_code == 400
+
+
+def test_base_rows_falls_back_to_full_before_history(client: TestClient) -> None:
+    response = client.get("/api/base-rows", params={"since": "2025-02-01T00:00:00Z"})
+    assert response.status_code == 200
+    assert response.json()["mode"] == "full"
+
+
+def test_base_rows_returns_delta_inside_history(client: TestClient) -> None:
+    response = client.get("/api/base-rows", params={"since": "0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5e01"})
+    assert response.status_code == 200
+    assert response.json()["mode"] == "delta"
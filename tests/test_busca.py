@@ -0,0 +1,37 @@
+from empetur_core.busca import AtrativoSearchIndex
+
+
+def build_row(nro: int, nome: str, municipio: str) -> dict[str, str]:
+    return {
+        "codigo_pesquisa": "9035",
+        "nro_identificacao": str(nro),
+        "nome_atrativo": nome,
+        "municipio": municipio,
+        "categoria": "Atrativos Naturais",
+        "questionario_preenchido": "Atrativos Naturais",
+    }
+
+
+def test_search_breaks_ties_by_records_before_truncating() -> None:
+    rows = [build_row(1, "Cachoeira do Urubu", "Barreiros")]
+    rows += [build_row(nro, "Cachoeira do Urubu", "Primavera") for nro in range(2, 5)]
+    index = AtrativoSearchIndex.from_forms({"9035": rows})
+
+    total, results = index.search("Cachoeira do Urubu", limit=1)
+
+    assert total == 2
+    assert [(item["municipio"], item["total"]) for item in results] == [("Primavera", 3)]
+
+
+def test_search_matches_across_forms_with_the_same_ordering() -> None:
+    index = AtrativoSearchIndex.from_forms(
+        {
+            "9035": [build_row(1, "Cachoeira do Urubu", "Barreiros")],
+            "9036": [build_row(nro, "Cachoeira do Urubu", "Primavera") for nro in range(1, 3)],
+        }
+    )
+
+    total, results = index.search("Cachoeira do Urubu", limit=2)
+
+    assert total == 2
+    assert [item["municipio"] for item in results] == ["Primavera", "Barreiros"]
@@ -0,0 +1,66 @@
+import base64
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from empetur_core.cache_consolidacao import CACHED_FIELDS, cache_path, read_cached_rows, write_cached_rows
+
+
+EXEC_DATE = "02/03/2025"
+EXEC_TIMESTAMP = "02/03/2025 10:00:00"
+
+
+def build_rows() -> list[dict[str, str]]:
+    return [{field: f"{field}-{idx}" for field in CACHED_FIELDS} for idx in range(3)]
+
+
+def read_raw(cache_dir: Path) -> dict:
+    with gzip.open(cache_path(cache_dir, "chave"), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_raw(cache_dir: Path, raw: dict) -> None:
+    cache_path(cache_dir, "chave").write_bytes(gzip.compress(json.dumps(raw).encode("utf-8")))
+
+
+def test_read_cached_rows_round_trip(tmp_path: Path) -> None:
+    write_cached_rows(tmp_path, "chave", build_rows())
+    rows = read_cached_rows(tmp_path, "chave", EXEC_DATE, EXEC_TIMESTAMP)
+    assert rows is not None and len(rows) == 3
+    assert rows[1]["municipio"] == "municipio-1"
+    assert rows[1]["data_execucao_carga"] == EXEC_DATE
+    assert rows[1]["data_hora_execucao_carga"] == EXEC_TIMESTAMP
+
+
+def test_read_cached_rows_missing_file(tmp_path: Path) -> None:
+    assert read_cached_rows(tmp_path, "chave", EXEC_DATE, EXEC_TIMESTAMP) is None
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda raw: raw.update(colunas=raw["colunas"][:-1]),
+        lambda raw: raw.update(colunas=raw["colunas"] + raw["colunas"][:1]),
+        lambda raw: raw.update(colunas=None),
+        lambda raw: raw["colunas"].__setitem__(0, base64.b64encode(base64.b64decode(raw["colunas"][0])[:8]).decode()),
+        lambda raw: raw["colunas"].__setitem__(0, 42),
+        lambda raw: raw["colunas"].__setitem__(0, "nao e base64!"),
+        lambda raw: raw.update(valores=raw["valores"][:1]),
+        lambda raw: raw.update(campos=raw["campos"][:-1]),
+    ],
+)
+def test_read_cached_rows_rejects_corrupt_entries(tmp_path: Path, corrupt) -> None:
+    write_cached_rows(tmp_path, "chave", build_rows())
+    raw = read_raw(tmp_path)
+    corrupt(raw)
+    write_raw(tmp_path, raw)
+    assert read_cached_rows(tmp_path, "chave", EXEC_DATE, EXEC_TIMESTAMP) is None
+
+
+def test_read_cached_rows_rejects_truncated_gzip(tmp_path: Path) -> None:
+    write_cached_rows(tmp_path, "chave", build_rows())
+    path = cache_path(tmp_path, "chave")
+    path.write_bytes(path.read_bytes()[:20])
+    assert read_cached_rows(tmp_path, "chave", EXEC_DATE, EXEC_TIMESTAMP) is None
@@ -0,0 +1,61 @@
+from empetur_core.duplicados import detect_duplicates
+
+
+def build_row(nro: int, nome: str, municipio: str = "Recife", pesquisador: str = "Ana") -> dict[str, str]:
+    return {
+        "codigo_pesquisa": "9035",
+        "nro_identificacao": str(nro),
+        "nome_atrativo": nome,
+        "municipio": municipio,
+        "questionario_preenchido": "Atrativos Naturais",
+        "pesquisador": pesquisador,
+    }
+
+
+def test_detect_duplicates_groups_name_variants() -> None:
+    report = detect_duplicates(
+        [
+            build_row(1, "Parque da Jaqueira"),
+            build_row(2, "PARQUE DA JAQUEIRA", pesquisador="Bruno"),
+            build_row(3, "Parque Jaqueiras"),
+            build_row(4, "Praia de Boa Viagem"),
+        ]
+    )
+
+    assert len(report.clusters) == 1
+    cluster = report.clusters[0]
+    assert cluster["registros"] == [["9035", "1"], ["9035", "2"], ["9035", "3"]]
+    assert cluster["registros_excedentes"] == 2
+    assert cluster["pesquisadores"] == ["Ana", "Bruno"]
+    assert 0.75 <= cluster["similaridade_minima"] < 1.0
+    assert report.totais() == {"realizados": 4, "grupos_duplicados": 1, "registros_excedentes": 2, "deduplicados": 2}
+
+
+def test_detect_duplicates_keeps_different_numbers_apart() -> None:
+    report = detect_duplicates([build_row(1, "Igreja Matriz 1"), build_row(2, "Igreja Matriz 2")])
+
+    assert report.clusters == []
+
+
+def test_detect_duplicates_never_crosses_municipios() -> None:
+    report = detect_duplicates(
+        [build_row(1, "Parque da Jaqueira"), build_row(2, "Parque da Jaqueira", municipio="Olinda")]
+    )
+
+    assert report.clusters == []
+    assert report.deduplicated_totals() == {"Recife": 1, "Olinda": 1}
+
+
+def test_detect_duplicates_reuses_unchanged_municipios() -> None:
+    rows = [
+        build_row(1, "Parque da Jaqueira"),
+        build_row(2, "Parque Jaqueiras"),
+        build_row(3, "Praia do Paiva", municipio="Cabo de Santo Agostinho"),
+    ]
+    previous = detect_duplicates(rows)
+
+    report = detect_duplicates([*rows, build_row(4, "Praia do Paiva", municipio="Cabo de Santo Agostinho")], previous)
+
+    assert report.municipios_recalculados == 1
+    assert report.clusters_por_municipio["Recife"] is previous.clusters_por_municipio["Recife"]
+    assert [cluster["municipio"] for cluster in report.clusters] == ["Cabo de Santo Agostinho", "Recife"]
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from empetur_core.historico import BaseRowsHistory
+
+
+RUN_1 = "0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5e01"
+RUN_2 = "0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5e02"
+
+
+def build_row(nro: str, municipio: str = "Recife") -> dict[str, str]:
+    return {"codigo_pesquisa": "9035", "nro_identificacao": nro, "municipio": municipio}
+
+
+@pytest.fixture
+def history() -> BaseRowsHistory:
+    history = BaseRowsHistory(datetime(2025, 3, 1, 8, 0, 0))
+    history.replace_form("9035", [build_row("1"), build_row("2")])
+    history.commit(RUN_1, datetime(2025, 3, 1, 10, 0, 0))
+    history.replace_form("9035", [build_row("1", "Olinda"), build_row("3")])
+    history.commit(RUN_2, datetime(2025, 3, 2, 10, 0, 0))
+    return history
+
+
+def test_changes_since_sync_run_id(history: BaseRowsHistory) -> None:
+    assert history.changes_since(RUN_1) == ({("9035", "1"), ("9035", "3")}, {("9035", "2")})
+    assert history.changes_since(RUN_2) == (set(), set())
+
+
+def test_changes_since_accepts_br_and_iso_dates(history: BaseRowsHistory) -> None:
+    expected = ({("9035", "1"), ("9035", "3")}, {("9035", "2")})
+    assert history.changes_since("01/03/2025 12:00:00") == expected
+    assert history.changes_since("2025-03-01T12:00:00") == expected
+    # 15h em UTC sao 12h em Brasilia, entre as duas revisoes.
+    assert history.changes_since("2025-03-01T15:00:00Z") == expected
+    assert history.changes_since("2025-03-01T15:00:00+00:00") == expected
+
+
+def test_changes_since_falls_back_to_full_outside_history(history: BaseRowsHistory) -> None:
+    assert history.changes_since("28/02/2025 23:00:00") is None
+    assert history.changes_since("0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5eff") is None
+
+
+def test_changes_since_drops_evicted_revisions() -> None:
+    history = BaseRowsHistory(datetime(2025, 3, 1), max_revisions=2)
+    for day in range(1, 4):
+        history.replace_form("9035", [build_row(str(day))])
+        history.commit(f"0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5e0{day}", datetime(2025, 3, day, 10, 0, 0))
+    assert history.changes_since("01/03/2025 09:00:00") is None
+    assert history.changes_since("0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5e01") is None
+    assert history.changes_since("01/03/2025 12:00:00") == ({("9035", "3")}, {("9035", "1"), ("9035", "2")})
+    assert history.changes_since("0b6f3c1e-2d4a-4c7e-9f10-1a2b3c4d5e02") == ({("9035", "3")}, {("9035", "2")})
+
+
+@pytest.mark.parametrize("since", ["ontem", "2025-13-01", "32/01/2025 10:00:00"])
+def test_changes_since_rejects_malformed_values(history: BaseRowsHistory, since: str) -> None:
+    with pytest.raises(ValueError):
+        history.changes_since(since)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from backend.sqlite_repository import SqliteRepository
+from empetur_core.consolidacao import BASE_FIELDNAMES, write_csv
+
+
+def build_row(nro: str, questionario: str = "Atrativos Naturais", linha: int = 1, **values: str) -> dict[str, str]:
+    return {
+        "questionario_preenchido": questionario,
+        "nro_identificacao": nro,
+        "linha_origem": str(linha),
+        "municipio": "Recife",
+        "nome_atrativo": f"Atrativo {linha}",
+        "data_inicio_coleta": "01/03/2025 10:00:00",
+        **values,
+    }
+
+
+def build_repository(tmp_path: Path, base_rows: list[dict[str, str]] | None = None) -> SqliteRepository:
+    base_csv_path = None
+    if base_rows is not None:
+        base_csv_path = tmp_path / "empetur_tabela_base.csv"
+        write_csv(base_csv_path, BASE_FIELDNAMES, base_rows)
+    return SqliteRepository(
+        tmp_path / "empetur.db",
+        status_json_path=tmp_path / "status.json",
+        previstos_json_path=tmp_path / "previstos.json",
+        sync_state_json_path=tmp_path / "sync_estado.json",
+        base_csv_path=base_csv_path,
+        form_map={"Atrativos Naturais": 9035},
+    )
+
+
+def test_base_csv_import_keys_rows_and_skips_unmapped_forms(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    repository = build_repository(
+        tmp_path,
+        [
+            build_row("10", linha=1),
+            build_row("", linha=2),
+            build_row("11", questionario="Hospedagens", linha=3),
+        ],
+    )
+
+    with caplog.at_level(logging.WARNING, logger="empetur.backend"):
+        rows = asyncio.run(repository.read_base_rows())
+
+    assert sorted((row["codigo_pesquisa"], row["nro_identificacao"]) for row in rows) == [("9035", ""), ("9035", "10")]
+    assert "Hospedagens" in caplog.text
+
+
+def test_status_and_previstos_do_not_import_the_base_csv(tmp_path: Path) -> None:
+    repository = build_repository(tmp_path, [build_row("", questionario="Hospedagens")])
+
+    assert asyncio.run(repository.read_municipios_status()) == {}
+    assert repository.base_initialized is False
+
+
+def test_corrupt_json_file_fails_with_500(tmp_path: Path) -> None:
+    repository = build_repository(tmp_path)
+    (tmp_path / "status.json").write_text("{", encoding="utf-8")
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(repository.read_municipios_status())
+
+    assert exc_info.value.status_code == 500
+
+
+def test_full_load_accepts_rows_without_nro_identificacao(tmp_path: Path) -> None:
+    repository = build_repository(tmp_path)
+    rows = [build_row("", linha=1, codigo_pesquisa="9035"), build_row("", linha=2, codigo_pesquisa="9035")]
+
+    persisted = asyncio.run(repository.persist_base_rows(rows))
+
+    assert persisted["9035"]["inseridos"] == 2
+    assert len(asyncio.run(repository.read_base_rows())) == 2
+
+
+def test_incremental_load_rejects_rows_without_nro_identificacao(tmp_path: Path) -> None:
+    repository = build_repository(tmp_path)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(repository.persist_base_rows([build_row("", codigo_pesquisa="9035")], {9035}))
+
+    assert exc_info.value.status_code == 422
+
+
+def test_empty_full_load_clears_the_form(tmp_path: Path) -> None:
+    repository = build_repository(tmp_path)
+    asyncio.run(repository.persist_base_rows([build_row("10", codigo_pesquisa="9035")]))
+
+    assert asyncio.run(repository.persist_base_rows([], set(), {9035}))["9035"]["removidos"] == 1
+    assert asyncio.run(repository.read_base_rows()) == []
@@ -488,6 +488,9 @@ function MunicipioCard({ item }) {
       <div className="municipio-total">
         <small>Total coletado</small>
         <span>{formatNumber(item.total_realizado_num)}</span>
+        {item.total_realizado_deduplicado_num < item.total_realizado_num ? (
+          <small>{formatNumber(item.total_realizado_deduplicado_num)} sem duplicados</small>
+        ) : null}
       </div>
     </Link>
   );
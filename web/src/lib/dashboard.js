@@ -56,6 +56,7 @@ export function groupMunicipios(payload) {
     acc[item.regiao].push({
       ...item,
       total_realizado_num: Number(item.total_realizado || 0),
+      total_realizado_deduplicado_num: Number(item.total_realizado_deduplicado ?? item.total_realizado ?? 0),
       total_previsto_num: Number(item.total_previsto || 0),
       municipio_slug: slugify(item.municipio),
     });